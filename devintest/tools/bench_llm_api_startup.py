@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Measure llm_api.py startup and check that a provider imports only its own SDK.
+
+For each provider, a fresh interpreter imports llm_api, builds that
+provider's client with a dummy API key (no request is sent) and reports
+which SDK modules ended up loaded. Fails when another provider's SDK was
+imported (e.g. `--provider openai` pulling in Gemini and gRPC) or when the
+median import time exceeds the budget.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent
+
+sys.path.insert(0, str(TOOLS_DIR))
+from llm_api import PROVIDERS  # noqa: E402
+
+# Import of llm_api alone, beyond a bare interpreter, in milliseconds.
+IMPORT_BUDGET_MS = 100
+
+_PROBE = """
+import json, sys
+import llm_api
+provider = llm_api.get_provider(sys.argv[1])
+error = None
+try:
+    llm_api.create_llm_client(provider.name)
+except ImportError as e:
+    error = str(e)
+print(json.dumps({"modules": sorted(sys.modules), "error": error}))
+"""
+
+def _median_ms(argv, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, cwd=TOOLS_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def _loaded(modules, names):
+    """The names in `names` imported, as a module or as the parent of one"""
+    return sorted(name for name in names if any(m == name or m.startswith(name + ".") for m in modules))
+
+def check_provider(provider):
+    """Other providers' SDK modules imported when building `provider`'s client"""
+    env = dict(os.environ)
+    if provider.api_key_env:
+        env[provider.api_key_env] = "startup-check"
+    completed = subprocess.run([sys.executable, "-c", _PROBE, provider.name], cwd=TOOLS_DIR, env=env,
+                               capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        return None, completed.stderr.strip().splitlines()[-1:] or ["probe failed"]
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    foreign = {m for other in PROVIDERS.values() for m in other.modules} - set(provider.modules)
+    return _loaded(result["modules"], foreign), [result["error"]] if result["error"] else []
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_MS, help="milliseconds")
+    parser.add_argument("--provider", action="append", dest="providers", choices=list(PROVIDERS),
+                        help="provider to check (repeatable; default: all)")
+    args = parser.parse_args()
+
+    baseline = _median_ms([sys.executable, "-c", "pass"], args.runs)
+    elapsed = _median_ms([sys.executable, "-c", "import llm_api"], args.runs) - baseline
+    print(f"{'import llm_api':<24} {elapsed:7.1f} ms (budget {args.budget:.0f} ms)")
+    failed = elapsed > args.budget
+
+    for name in args.providers or list(PROVIDERS):
+        foreign, notes = check_provider(PROVIDERS[name])
+        if foreign is None:
+            print(f"--provider {name:<13} FAILED: {' '.join(notes)}")
+            failed = True
+        elif foreign:
+            print(f"--provider {name:<13} imports {', '.join(foreign)}")
+            failed = True
+        else:
+            # A missing SDK still proves nothing else was imported on the way.
+            suffix = f" (SDK not installed: {notes[0]})" if notes else ""
+            print(f"--provider {name:<13} ok{suffix}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
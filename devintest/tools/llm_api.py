@@ -1,19 +1,47 @@
 #!/usr/bin/env /workspace/tmp_windsurf/venv/bin/python3
 
-import google.generativeai as genai
-from openai import OpenAI, AzureOpenAI
-from anthropic import Anthropic
 import argparse
+import atexit
+import json
 import os
-from dotenv import load_dotenv
+import threading
 from pathlib import Path
 import sys
 import base64
-from typing import Optional, Union, List
+from typing import Callable, Dict, NamedTuple, Optional, Tuple, Union, List
 import mimetypes
+import time
 
-def load_environment():
-    """Load environment variables from .env files in order of precedence"""
+# Nothing provider-specific is imported here: the agent loop runs this tool
+# once per query, and importing every SDK (Gemini pulls in gRPC) cost more
+# than most calls. Each provider's factory imports its SDK when
+# create_llm_client selects it, and .env files are read on first use.
+
+# Connection pool of each shared client (see get_client); the
+# LLM_API_MAX_CONNECTIONS and LLM_API_MAX_KEEPALIVE variables override them.
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 20
+# Seconds an idle keep-alive connection stays open.
+KEEPALIVE_EXPIRY = 60.0
+
+_env_found: Optional[bool] = None  # None until load_environment() has run
+
+def load_environment(verbose: bool = False) -> bool:
+    """
+    Load environment variables from .env files in order of precedence.
+
+    Runs once per process; later calls return at once. Existing variables
+    are never overridden.
+
+    Args:
+        verbose (bool): Report the files checked and the keys they define on stderr
+
+    Returns:
+        bool: Whether any .env file was found
+    """
+    global _env_found
+    if _env_found is not None:
+        return _env_found
     # Order of precedence:
     # 1. System environment variables (already loaded)
     # 2. .env.local (user-specific overrides)
@@ -23,28 +51,30 @@ def load_environment():
     env_files = ['.env.local', '.env', '.env.example']
     env_loaded = False
     
-    print("Current working directory:", Path('.').absolute(), file=sys.stderr)
-    print("Looking for environment files:", env_files, file=sys.stderr)
+    if verbose:
+        print("Current working directory:", Path('.').absolute(), file=sys.stderr)
+        print("Looking for environment files:", env_files, file=sys.stderr)
     
     for env_file in env_files:
         env_path = Path('.') / env_file
-        print(f"Checking {env_path.absolute()}", file=sys.stderr)
+        if verbose:
+            print(f"Checking {env_path.absolute()}", file=sys.stderr)
         if env_path.exists():
-            print(f"Found {env_file}, loading variables...", file=sys.stderr)
+            from dotenv import load_dotenv
+
             load_dotenv(dotenv_path=env_path)
             env_loaded = True
-            print(f"Loaded environment variables from {env_file}", file=sys.stderr)
-            # Print loaded keys (but not values for security)
-            with open(env_path) as f:
-                keys = [line.split('=')[0].strip() for line in f if '=' in line and not line.startswith('#')]
-                print(f"Keys loaded from {env_file}: {keys}", file=sys.stderr)
+            if verbose:
+                print(f"Loaded environment variables from {env_file}", file=sys.stderr)
+                # Print loaded keys (but not values for security)
+                with open(env_path) as f:
+                    keys = [line.split('=')[0].strip() for line in f if '=' in line and not line.startswith('#')]
+                    print(f"Keys loaded from {env_file}: {keys}", file=sys.stderr)
     
-    if not env_loaded:
+    if not env_loaded and verbose:
         print("Warning: No .env files found. Using system environment variables only.", file=sys.stderr)
-        print("Available system environment variables:", list(os.environ.keys()), file=sys.stderr)
-
-# Load environment variables at module import
-load_environment()
+    _env_found = env_loaded
+    return env_loaded
 
 def encode_image_file(image_path: str) -> tuple[str, str]:
     """
@@ -65,204 +95,864 @@ def encode_image_file(image_path: str) -> tuple[str, str]:
         
     return encoded_string, mime_type
 
-def create_llm_client(provider="openai"):
-    if provider == "openai":
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not found in environment variables")
-        return OpenAI(
-            api_key=api_key
-        )
-    elif provider == "azure":
-        api_key = os.getenv('AZURE_OPENAI_API_KEY')
-        if not api_key:
-            raise ValueError("AZURE_OPENAI_API_KEY not found in environment variables")
-        return AzureOpenAI(
-            api_key=api_key,
-            api_version="2024-08-01-preview",
-            azure_endpoint="https://msopenai.openai.azure.com"
-        )
-    elif provider == "deepseek":
-        api_key = os.getenv('DEEPSEEK_API_KEY')
-        if not api_key:
-            raise ValueError("DEEPSEEK_API_KEY not found in environment variables")
-        return OpenAI(
-            api_key=api_key,
-            base_url="https://api.deepseek.com/v1",
-        )
-    elif provider == "siliconflow":
-        api_key = os.getenv('SILICONFLOW_API_KEY')
-        if not api_key:
-            raise ValueError("SILICONFLOW_API_KEY not found in environment variables")
-        return OpenAI(
-            api_key=api_key,
-            base_url="https://api.siliconflow.cn/v1"
-        )
-    elif provider == "anthropic":
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
-        return Anthropic(
-            api_key=api_key
-        )
-    elif provider == "gemini":
-        api_key = os.getenv('GOOGLE_API_KEY')
-        if not api_key:
-            raise ValueError("GOOGLE_API_KEY not found in environment variables")
-        genai.configure(api_key=api_key)
-        return genai
-    elif provider == "local":
-        return OpenAI(
-            base_url="http://192.168.180.137:8006/v1",
-            api_key="not-needed"
-        )
-    else:
-        raise ValueError(f"Unsupported provider: {provider}")
+class Provider(NamedTuple):
+    """
+    How to build a client for one API provider.
+
+    Attributes:
+        name (str): Name used with --provider and query_llm(provider=...)
+        api (str): Request format query_llm uses: "openai", "anthropic" or "gemini"
+        factory (Callable): Builds the client from (api_key, base_url, limits); imports the SDK itself
+        async_factory (Callable, optional): Same for the asyncio client; None when the SDK has
+            none worth using, and aquery_llm runs the blocking call on a thread instead
+        default_model (str): Model used when none is given
+        api_key_env (str, optional): Variable holding the API key; None when no key is needed
+        base_url (str, optional): Endpoint passed to the factory
+        modules (tuple): Top-level modules the SDK imports, for startup checks
+    """
+    name: str
+    api: str
+    factory: Callable
+    default_model: str
+    api_key_env: Optional[str] = None
+    base_url: Optional[str] = None
+    modules: Tuple[str, ...] = ()
+    async_factory: Optional[Callable] = None
+
+PROVIDERS: Dict[str, Provider] = {}
+
+def register_provider(provider: Provider) -> Provider:
+    """Add (or replace) a provider; returns it"""
+    PROVIDERS[provider.name] = provider
+    return provider
+
+def get_provider(name: str) -> Provider:
+    try:
+        return PROVIDERS[name]
+    except KeyError:
+        raise ValueError(f"Unsupported provider: {name}") from None
+
+def _http_client(client_class, limits):
+    """An httpx client of the SDK's flavour with the given pool limits, or None for the SDK default"""
+    if limits is None:
+        return None
+    import httpx
+
+    max_connections, max_keepalive = limits
+    return client_class(limits=httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=KEEPALIVE_EXPIRY
+    ))
+
+def _openai_client(api_key, base_url=None, limits=None):
+    from openai import DefaultHttpxClient, OpenAI
+
+    return OpenAI(api_key=api_key, base_url=base_url, http_client=_http_client(DefaultHttpxClient, limits))
+
+def _azure_client(api_key, base_url=None, limits=None):
+    from openai import AzureOpenAI, DefaultHttpxClient
+
+    return AzureOpenAI(
+        api_key=api_key,
+        api_version="2024-08-01-preview",
+        azure_endpoint=base_url,
+        http_client=_http_client(DefaultHttpxClient, limits)
+    )
+
+def _async_openai_client(api_key, base_url=None, limits=None):
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=_http_client(DefaultAsyncHttpxClient, limits))
+
+def _async_azure_client(api_key, base_url=None, limits=None):
+    from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
+
+    return AsyncAzureOpenAI(
+        api_key=api_key,
+        api_version="2024-08-01-preview",
+        azure_endpoint=base_url,
+        http_client=_http_client(DefaultAsyncHttpxClient, limits)
+    )
+
+def _anthropic_client(api_key, base_url=None, limits=None):
+    from anthropic import Anthropic, DefaultHttpxClient
+
+    return Anthropic(api_key=api_key, http_client=_http_client(DefaultHttpxClient, limits))
+
+def _async_anthropic_client(api_key, base_url=None, limits=None):
+    from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
+
+    return AsyncAnthropic(api_key=api_key, http_client=_http_client(DefaultAsyncHttpxClient, limits))
+
+def _gemini_client(api_key, base_url=None, limits=None):
+    # The SDK keeps one process-wide configuration and manages its own
+    # gRPC channels, so there is nothing to size here.
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key)
+    return genai
+
+_OPENAI_MODULES = ("openai", "httpx")
+
+register_provider(Provider("openai", "openai", _openai_client, "gpt-4o", "OPENAI_API_KEY",
+                           modules=_OPENAI_MODULES, async_factory=_async_openai_client))
+register_provider(Provider("azure", "openai", _azure_client, "gpt-4o-ms", "AZURE_OPENAI_API_KEY",
+                           base_url="https://msopenai.openai.azure.com", modules=_OPENAI_MODULES,
+                           async_factory=_async_azure_client))
+register_provider(Provider("deepseek", "openai", _openai_client, "deepseek-chat", "DEEPSEEK_API_KEY",
+                           base_url="https://api.deepseek.com/v1", modules=_OPENAI_MODULES,
+                           async_factory=_async_openai_client))
+register_provider(Provider("siliconflow", "openai", _openai_client, "deepseek-ai/DeepSeek-R1", "SILICONFLOW_API_KEY",
+                           base_url="https://api.siliconflow.cn/v1", modules=_OPENAI_MODULES,
+                           async_factory=_async_openai_client))
+register_provider(Provider("anthropic", "anthropic", _anthropic_client, "claude-3-7-sonnet-20250219",
+                           "ANTHROPIC_API_KEY", modules=("anthropic", "httpx"), async_factory=_async_anthropic_client))
+register_provider(Provider("gemini", "gemini", _gemini_client, "gemini-2.0-flash-exp", "GOOGLE_API_KEY",
+                           modules=("google.generativeai", "grpc")))
+register_provider(Provider("local", "openai", _openai_client, "Qwen/Qwen2.5-32B-Instruct-AWQ",
+                           base_url="http://192.168.180.137:8006/v1", modules=_OPENAI_MODULES,
+                           async_factory=_async_openai_client))
+
+def default_model(provider: str) -> str:
+    """The model used for `provider` when none is given"""
+    if provider == "azure":
+        load_environment()
+        return os.getenv('AZURE_OPENAI_MODEL_DEPLOYMENT', PROVIDERS["azure"].default_model)  # Get from env with fallback
+    return get_provider(provider).default_model
+
+def _api_key(spec: Provider) -> str:
+    load_environment()
+    if spec.api_key_env is None:
+        return "not-needed"
+    api_key = os.getenv(spec.api_key_env)
+    if not api_key:
+        raise ValueError(f"{spec.api_key_env} not found in environment variables")
+    return api_key
+
+def create_llm_client(provider="openai", limits: Optional[Tuple[int, int]] = None):
+    """
+    Build a new, unshared client for `provider`.
+
+    Args:
+        provider (str): The API provider to use
+        limits (tuple, optional): (max connections, max keep-alive connections) of its
+            connection pool; the SDK's defaults when None
+
+    Returns:
+        The provider's client
+    """
+    spec = get_provider(provider)
+    return spec.factory(_api_key(spec), spec.base_url, limits)
+
+def _pool_limits(max_connections, max_keepalive):
+    return (
+        max_connections or int(os.getenv('LLM_API_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)),
+        max_keepalive or int(os.getenv('LLM_API_MAX_KEEPALIVE', DEFAULT_MAX_KEEPALIVE)),
+    )
+
+_clients: Dict[tuple, object] = {}
+_clients_lock = threading.Lock()
+
+def get_client(provider="openai", max_connections: Optional[int] = None, max_keepalive: Optional[int] = None):
+    """
+    The process-wide client for `provider`, created on first use.
+
+    Clients are shared per (provider, base URL, API key) by every caller and
+    thread, so their keep-alive connections are reused across queries
+    instead of a new connection pool (and TLS handshake) per call. The pool
+    size is fixed by the call that creates the client.
+
+    Args:
+        provider (str): The API provider to use
+        max_connections (int, optional): Connection pool size; defaults to
+            $LLM_API_MAX_CONNECTIONS or DEFAULT_MAX_CONNECTIONS
+        max_keepalive (int, optional): Idle connections kept open; defaults to
+            $LLM_API_MAX_KEEPALIVE or DEFAULT_MAX_KEEPALIVE
+
+    Returns:
+        The shared client
+    """
+    spec = get_provider(provider)
+    api_key = _api_key(spec)
+    key = (spec.name, spec.base_url, api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = spec.factory(api_key, spec.base_url, _pool_limits(max_connections, max_keepalive))
+    return client
+
+def close_clients():
+    """Close every shared client's connections; later get_client calls create new ones"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        close = getattr(client, "close", None)
+        if callable(close):
+            close()
+
+atexit.register(close_clients)
+
+# Event loop -> {(provider, base URL, API key): client}. Async clients belong
+# to the loop they first ran on, so each loop gets its own.
+_async_clients = None
+
+def get_async_client(provider="openai", max_connections: Optional[int] = None, max_keepalive: Optional[int] = None):
+    """
+    The shared asyncio client for `provider` on the running event loop (see
+    get_client), or None when the provider has no async client.
+    """
+    global _async_clients
+    import asyncio
+    import weakref
+
+    spec = get_provider(provider)
+    if spec.async_factory is None:
+        return None
+    api_key = _api_key(spec)
+    key = (spec.name, spec.base_url, api_key)
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        if _async_clients is None:
+            _async_clients = weakref.WeakKeyDictionary()
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = spec.async_factory(api_key, spec.base_url, _pool_limits(max_connections, max_keepalive))
+    return client
+
+async def aclose_clients():
+    """Close the shared asyncio clients of the running event loop"""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        clients = list(_async_clients.pop(loop, {}).values()) if _async_clients is not None else []
+    for client in clients:
+        await client.close()
+
+def _chat_request(prompt: str, model: str, provider: str, image_path: Optional[str]) -> dict:
+    """Keyword arguments of chat.completions.create for the OpenAI-compatible APIs"""
+    messages = [{"role": "user", "content": []}]
+    
+    # Add text content
+    messages[0]["content"].append({
+        "type": "text",
+        "text": prompt
+    })
+    
+    # Add image content if provided
+    if image_path:
+        if provider == "openai":
+            encoded_image, mime_type = encode_image_file(image_path)
+            messages[0]["content"] = [
+                {"type": "text", "text": prompt},
+                {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{encoded_image}"}}
+            ]
+    
+    kwargs = {
+        "model": model,
+        "messages": messages,
+        "temperature": 0.7,
+    }
+    
+    # Add o1-specific parameters
+    if model == "o1":
+        kwargs["response_format"] = {"type": "text"}
+        kwargs["reasoning_effort"] = "low"
+        del kwargs["temperature"]
+    return kwargs
+
+def _messages_request(prompt: str, model: str, image_path: Optional[str]) -> dict:
+    """Keyword arguments of messages.create for Anthropic"""
+    messages = [{"role": "user", "content": []}]
+    
+    # Add text content
+    messages[0]["content"].append({
+        "type": "text",
+        "text": prompt
+    })
+    
+    # Add image content if provided
+    if image_path:
+        encoded_image, mime_type = encode_image_file(image_path)
+        messages[0]["content"].append({
+            "type": "image",
+            "source": {
+                "type": "base64",
+                "media_type": mime_type,
+                "data": encoded_image
+            }
+        })
+    return {"model": model, "max_tokens": 1000, "messages": messages}
+
+def _prepare(provider: str, model: str, prompt: str, image_path: Optional[str]) -> dict:
+    """The request for `provider`'s API: keyword arguments of its create call (Gemini: its inputs)"""
+    api = get_provider(provider).api
+    if api == "openai":
+        return _chat_request(prompt, model, provider, image_path)
+    if api == "anthropic":
+        return _messages_request(prompt, model, image_path)
+    return {"model": model, "prompt": prompt, "image_path": image_path}
+
+def _send(client, provider: str, request: dict) -> str:
+    """One blocking query; raises on failure"""
+    api = get_provider(provider).api
+    if api == "openai":
+        response = client.chat.completions.create(**request)
+        return response.choices[0].message.content
+        
+    elif api == "anthropic":
+        response = client.messages.create(**request)
+        return response.content[0].text
+        
+    elif api == "gemini":
+        model = client.GenerativeModel(request["model"])
+        prompt = request["prompt"]
+        if request["image_path"]:
+            file = client.upload_file(request["image_path"], mime_type="image/png")
+            chat_session = model.start_chat(
+                history=[{
+                    "role": "user",
+                    "parts": [file, prompt]
+                }]
+            )
+        else:
+            chat_session = model.start_chat(
+                history=[{
+                    "role": "user",
+                    "parts": [prompt]
+                }]
+            )
+        response = chat_session.send_message(prompt)
+        return response.text
+    raise ValueError(f"Unsupported API {api!r} for provider {provider}")
+
+# Where query_llm keeps responses unless told otherwise: see default_cache().
+CACHE_ENV = "LLM_API_CACHE"
+CACHE_TTL_ENV = "LLM_API_CACHE_TTL"
+CACHE_READ_ONLY_ENV = "LLM_API_CACHE_READ_ONLY"
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+def request_key(provider: str, request: dict) -> str:
+    """
+    SHA-256 of everything that determines a response: provider, endpoint and
+    the full request, images included (by content, not by path).
+    """
+    import hashlib
+
+    keyed = dict(request)
+    if keyed.get("image_path"):
+        with open(keyed.pop("image_path"), "rb") as f:
+            keyed["image_sha256"] = hashlib.sha256(f.read()).hexdigest()
+    spec = get_provider(provider)
+    payload = json.dumps({"provider": spec.name, "base_url": spec.base_url, "request": keyed},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Responses on disk in SQLite, keyed by request_key().
+
+    Entries older than `ttl` seconds are misses. Once the stored responses
+    exceed `max_bytes`, the least recently used are evicted. A `read_only`
+    cache answers from what is stored but never writes, not even access
+    times, so runs against it are reproducible; with no file at `path` it
+    is empty and misses every lookup. Safe to share between
+    threads; several processes may use one file.
+
+    Attributes:
+        hits, misses, writes, evictions (int): Counters since the cache was opened
+    """
 
-def query_llm(prompt: str, client=None, model=None, provider="openai", image_path: Optional[str] = None) -> Optional[str]:
+    def __init__(self, path: Union[str, Path], ttl: Optional[float] = None,
+                 max_bytes: int = DEFAULT_CACHE_MAX_BYTES, read_only: bool = False):
+        import sqlite3
+
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.read_only = read_only
+        self.hits = self.misses = self.writes = self.evictions = 0
+        self._lock = threading.Lock()
+        if read_only:
+            # SQLite cannot open a missing file read-only; there is nothing to read anyway.
+            self._db = None
+            if self.path.exists():
+                self._db = sqlite3.connect(f"{self.path.absolute().as_uri()}?mode=ro", uri=True,
+                                           check_same_thread=False, timeout=30)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """The stored response for `key`, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = None
+            if self._db is not None:
+                row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                self.misses += 1
+                return None
+            if not self.read_only:
+                self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        """Store `response` under `key` and evict beyond max_bytes; a no-op when read-only"""
+        if self.read_only:
+            return
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                             (key, response, size, now, now))
+            if self.ttl is not None:
+                self.evictions += self._db.execute("DELETE FROM responses WHERE created < ?",
+                                                   (now - self.ttl,)).rowcount
+            # Most recently used first; everything past the cap goes.
+            self.evictions += self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM "
+                "(SELECT key, SUM(size) OVER (ORDER BY last_used DESC, key) AS total FROM responses) "
+                "WHERE total > ?)", (self.max_bytes,)
+            ).rowcount
+            self._db.commit()
+            self.writes += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = 0, 0
+            if self._db is not None:
+                entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "writes": self.writes,
+                "evictions": self.evictions, "entries": entries, "bytes": size}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_set = False
+_default_cache_lock = threading.Lock()
+
+def set_default_cache(cache: Optional[ResponseCache]):
+    """Use `cache` for every query not given one (None: no caching)"""
+    global _default_cache, _default_cache_set
+    with _default_cache_lock:
+        _default_cache, _default_cache_set = cache, True
+
+def default_cache() -> Optional[ResponseCache]:
+    """
+    The cache used when a query is not given one: the one set with
+    set_default_cache, else one at $LLM_API_CACHE (with $LLM_API_CACHE_TTL
+    and $LLM_API_CACHE_READ_ONLY), else None.
+    """
+    global _default_cache, _default_cache_set
+    if not _default_cache_set:
+        load_environment()
+        path = os.getenv(CACHE_ENV)
+        cache = None
+        if path:
+            ttl = os.getenv(CACHE_TTL_ENV)
+            read_only = os.getenv(CACHE_READ_ONLY_ENV, "").lower() in ("1", "true", "yes", "on")
+            cache = ResponseCache(path, ttl=float(ttl) if ttl else None, read_only=read_only)
+        with _default_cache_lock:
+            if not _default_cache_set:
+                _default_cache, _default_cache_set = cache, True
+            elif cache is not None:
+                cache.close()
+    return _default_cache
+
+def _cache_for(cache) -> Optional[ResponseCache]:
+    if cache is None:
+        return default_cache()
+    return cache or None  # False: no caching for this query
+
+def query_llm(prompt: str, client=None, model=None, provider="openai", image_path: Optional[str] = None,
+              cache: Union[ResponseCache, bool, None] = None) -> Optional[str]:
     """
     Query an LLM with a prompt and optional image attachment.
     
     Args:
         prompt (str): The text prompt to send
-        client: The LLM client instance
+        client: The LLM client instance; the shared one from get_client when None
         model (str, optional): The model to use
         provider (str): The API provider to use
         image_path (str, optional): Path to an image file to attach
+        cache (ResponseCache, optional): Where to look the response up and store it;
+            default_cache() when None, no caching when False
         
     Returns:
         Optional[str]: The LLM's response or None if there was an error
     """
-    if client is None:
-        client = create_llm_client(provider)
+    get_provider(provider)
     
     try:
+        cache = _cache_for(cache)
         # Set default model
         if model is None:
-            if provider == "openai":
-                model = "gpt-4o"
-            elif provider == "azure":
-                model = os.getenv('AZURE_OPENAI_MODEL_DEPLOYMENT', 'gpt-4o-ms')  # Get from env with fallback
-            elif provider == "deepseek":
-                model = "deepseek-chat"
-            elif provider == "siliconflow":
-                model = "deepseek-ai/DeepSeek-R1"
-            elif provider == "anthropic":
-                model = "claude-3-7-sonnet-20250219"
-            elif provider == "gemini":
-                model = "gemini-2.0-flash-exp"
-            elif provider == "local":
-                model = "Qwen/Qwen2.5-32B-Instruct-AWQ"
-        
-        if provider in ["openai", "local", "deepseek", "azure", "siliconflow"]:
-            messages = [{"role": "user", "content": []}]
-            
-            # Add text content
-            messages[0]["content"].append({
-                "type": "text",
-                "text": prompt
-            })
-            
-            # Add image content if provided
-            if image_path:
-                if provider == "openai":
-                    encoded_image, mime_type = encode_image_file(image_path)
-                    messages[0]["content"] = [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{encoded_image}"}}
-                    ]
-            
-            kwargs = {
-                "model": model,
-                "messages": messages,
-                "temperature": 0.7,
-            }
-            
-            # Add o1-specific parameters
-            if model == "o1":
-                kwargs["response_format"] = {"type": "text"}
-                kwargs["reasoning_effort"] = "low"
-                del kwargs["temperature"]
-            
-            response = client.chat.completions.create(**kwargs)
-            return response.choices[0].message.content
-            
-        elif provider == "anthropic":
-            messages = [{"role": "user", "content": []}]
-            
-            # Add text content
-            messages[0]["content"].append({
-                "type": "text",
-                "text": prompt
-            })
-            
-            # Add image content if provided
-            if image_path:
-                encoded_image, mime_type = encode_image_file(image_path)
-                messages[0]["content"].append({
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": mime_type,
-                        "data": encoded_image
-                    }
-                })
-            
-            response = client.messages.create(
-                model=model,
-                max_tokens=1000,
-                messages=messages
-            )
-            return response.content[0].text
-            
-        elif provider == "gemini":
-            model = client.GenerativeModel(model)
-            if image_path:
-                file = genai.upload_file(image_path, mime_type="image/png")
-                chat_session = model.start_chat(
-                    history=[{
-                        "role": "user",
-                        "parts": [file, prompt]
-                    }]
-                )
-            else:
-                chat_session = model.start_chat(
-                    history=[{
-                        "role": "user",
-                        "parts": [prompt]
-                    }]
-                )
-            response = chat_session.send_message(prompt)
-            return response.text
-            
+            model = default_model(provider)
+        request = _prepare(provider, model, prompt, image_path)
+        if cache is not None:
+            key = request_key(provider, request)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
     except Exception as e:
         print(f"Error querying LLM: {e}", file=sys.stderr)
         return None
+    
+    try:
+        if client is None:
+            client = get_client(provider)
+        response = _send(client, provider, request)
+    except Exception as e:
+        print(f"Error querying LLM: {e}", file=sys.stderr)
+        return None
+    if cache is not None and response is not None:
+        cache.put(key, response)
+    return response
+
+# asyncio is imported inside the async API only: it costs more at startup
+# than the rest of this module, and a one-shot query does not need it.
+
+# Queries in flight per provider in aquery_many unless told otherwise.
+DEFAULT_CONCURRENCY = 8
+
+class QueryRequest(NamedTuple):
+    """One prompt for aquery_many"""
+    prompt: str
+    provider: str = "openai"
+    model: Optional[str] = None
+    image_path: Optional[str] = None
+
+class QueryResult(NamedTuple):
+    """
+    Outcome of one request of aquery_many.
+
+    Attributes:
+        index (int): Position of the request in the input
+        request (QueryRequest): The request
+        response (str, optional): The LLM's response; None when it failed
+        error (str, optional): What went wrong, as "ExceptionType: message"
+        seconds (float, optional): Time the query took, not counting the wait for a free slot
+    """
+    index: int
+    request: QueryRequest
+    response: Optional[str] = None
+    error: Optional[str] = None
+    seconds: Optional[float] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+async def aquery_llm(prompt: str, client=None, model=None, provider="openai", image_path: Optional[str] = None,
+                     cache: Union[ResponseCache, bool, None] = None) -> str:
+    """
+    Query an LLM without blocking the event loop.
+
+    Takes the same arguments as query_llm, with an asyncio client (the shared
+    one from get_async_client when None). Providers without one (Gemini) run
+    the blocking call on a worker thread. Unlike query_llm, failures raise.
+
+    Returns:
+        str: The LLM's response
+    """
+    import asyncio
+
+    spec = get_provider(provider)
+    cache = _cache_for(cache)
+    if model is None:
+        model = default_model(provider)
+    request = _prepare(provider, model, prompt, image_path)
+    if cache is not None:
+        key = request_key(provider, request)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    if spec.async_factory is None:
+        response = await asyncio.to_thread(_send, client or get_client(provider), provider, request)
+    else:
+        if client is None:
+            client = get_async_client(provider)
+        if spec.api == "openai":
+            response = (await client.chat.completions.create(**request)).choices[0].message.content
+        else:
+            response = (await client.messages.create(**request)).content[0].text
+    if cache is not None and response is not None:
+        cache.put(key, response)
+    return response
+
+def _as_request(item) -> QueryRequest:
+    if isinstance(item, QueryRequest):
+        return item
+    if isinstance(item, str):
+        return QueryRequest(item)
+    return QueryRequest(**item)
+
+async def aquery_many(requests, concurrency: Union[int, Dict[str, int]] = DEFAULT_CONCURRENCY, ordered: bool = True,
+                      cache: Union[ResponseCache, bool, None] = None):
+    """
+    Run many queries concurrently and yield a QueryResult for each.
+
+    A failed request yields a result carrying its error; the others carry
+    on. At most `concurrency` requests per provider are in flight at once.
+
+    Args:
+        requests: QueryRequests, dicts of QueryRequest fields, or prompt strings
+        concurrency (int or dict): Limit for every provider, or {provider: limit}
+            (DEFAULT_CONCURRENCY for providers not listed)
+        ordered (bool): Yield results in input order; otherwise as they complete
+        cache (ResponseCache, optional): As for query_llm
+
+    Yields:
+        QueryResult: One per request
+    """
+    import asyncio
+
+    requests = [_as_request(item) for item in requests]
+    semaphores = {}
+
+    def semaphore(provider):
+        # Created on first use, so a request for an unknown provider fails
+        # on its own instead of before any request starts.
+        get_provider(provider)
+        if provider not in semaphores:
+            limit = concurrency if isinstance(concurrency, int) else concurrency.get(provider, DEFAULT_CONCURRENCY)
+            semaphores[provider] = asyncio.Semaphore(limit)
+        return semaphores[provider]
+
+    async def run(index, request):
+        started = time.perf_counter()
+        try:
+            async with semaphore(request.provider):
+                started = time.perf_counter()
+                response = await aquery_llm(request.prompt, model=request.model, provider=request.provider,
+                                            image_path=request.image_path, cache=cache)
+        except Exception as e:
+            return QueryResult(index, request, error=f"{type(e).__name__}: {e}",
+                               seconds=time.perf_counter() - started)
+        return QueryResult(index, request, response, seconds=time.perf_counter() - started)
+
+    tasks = [asyncio.ensure_future(run(index, request)) for index, request in enumerate(requests)]
+    try:
+        for task in (tasks if ordered else asyncio.as_completed(tasks)):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def query_many(requests, concurrency: Union[int, Dict[str, int]] = DEFAULT_CONCURRENCY,
+               cache: Union[ResponseCache, bool, None] = None) -> List[QueryResult]:
+    """Blocking aquery_many for code without an event loop; results in input order"""
+    import asyncio
+
+    async def collect():
+        try:
+            return [result async for result in aquery_many(requests, concurrency, cache=cache)]
+        finally:
+            await aclose_clients()
+    return asyncio.run(collect())
+
+def _read_done(output_path: str) -> Tuple[set, set]:
+    """
+    IDs answered in an earlier run's output, and IDs of the records it
+    reported invalid; other failures and truncated lines count as neither
+    """
+    done, invalid = set(), set()
+    try:
+        with open(output_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # cut short by an interruption
+                if not isinstance(record, dict) or not _valid_id(record.get("id")):
+                    continue
+                if record.get("error") is None:
+                    done.add(record["id"])
+                elif record.get("invalid"):
+                    invalid.add(record["id"])
+    except FileNotFoundError:
+        pass
+    return done, invalid
+
+def _valid_id(record_id) -> bool:
+    return isinstance(record_id, (str, int)) and not isinstance(record_id, bool)
+
+def run_batch(input_path: str, output_path: Optional[str] = None, provider: str = "openai",
+              model: Optional[str] = None, concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, int]:
+    """
+    Answer every record of a JSONL file and write one JSON line per result as it completes.
+
+    Each input line is an object with "prompt" and optionally "provider",
+    "model", "image" (a path) and "id" (the line number otherwise);
+    `provider` and `model` fill in for records without their own. Output
+    lines carry the record's id, provider, model, the response or error
+    and the query's latency in seconds, in completion order. A record
+    that cannot be queried gets a line with its error and "invalid": true,
+    under its line number when it has no string or integer id. With an
+    `output_path`, lines are appended to it and records it already
+    answered successfully or reported invalid are skipped, so an
+    interrupted run resumes where it stopped and failed queries are
+    retried.
+
+    Returns:
+        dict: Counts of "done", "failed" and "skipped" records
+    """
+    import asyncio
+
+    get_provider(provider)
+    done, reported = _read_done(output_path) if output_path else (set(), set())
+    pending, invalid = [], []
+    skipped = 0
+    with open(input_path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict) or not isinstance(record.get("prompt"), str):
+                    raise ValueError("expected an object with a \"prompt\" string")
+                if not _valid_id(record.get("id", number)):
+                    raise ValueError("\"id\" must be a string or an integer")
+            except ValueError as e:
+                if number in reported:
+                    skipped += 1
+                else:
+                    invalid.append({"id": number, "error": f"invalid record on line {number}: {e}", "invalid": True})
+                continue
+            record_id = record.get("id", number)
+            if record_id in done:
+                skipped += 1
+                continue
+            record_provider = record.get("provider") or provider
+            if record_provider not in PROVIDERS:
+                if record_id in reported:
+                    skipped += 1
+                else:
+                    invalid.append({"id": record_id, "provider": record_provider,
+                                    "error": f"invalid record on line {number}: unsupported provider {record_provider!r}",
+                                    "invalid": True})
+                continue
+            pending.append((record_id, QueryRequest(
+                record["prompt"],
+                record_provider,
+                record.get("model") or (model if record_provider == provider else None),
+                record.get("image")
+            )))
+
+    out = open(output_path, "a", encoding="utf-8") if output_path else sys.stdout
+    counts = {"done": 0, "failed": len(invalid), "skipped": skipped}
+    latencies = []
+
+    def emit(line):
+        out.write(json.dumps(line, ensure_ascii=False) + "\n")
+        out.flush()
+
+    async def run():
+        try:
+            async for result in aquery_many([request for _, request in pending], concurrency, ordered=False):
+                record_id, request = pending[result.index]
+                emit({
+                    "id": record_id,
+                    "provider": request.provider,
+                    "model": request.model or default_model(request.provider),
+                    "response": result.response,
+                    "error": result.error,
+                    "seconds": round(result.seconds, 3),
+                })
+                counts["done" if result.ok else "failed"] += 1
+                latencies.append(result.seconds)
+        finally:
+            await aclose_clients()
+
+    try:
+        for line in invalid:
+            emit(line)
+        if pending:
+            asyncio.run(run())
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if latencies:
+            latencies.sort()
+            print(f"{counts['done']} done, {counts['failed']} failed, {counts['skipped']} skipped; "
+                  f"latency p50 {latencies[len(latencies) // 2]:.2f}s, "
+                  f"p95 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]:.2f}s, "
+                  f"max {latencies[-1]:.2f}s", file=sys.stderr)
+    return counts
+
+def _report_cache(verbose: bool):
+    cache = _default_cache
+    if verbose and cache is not None:
+        stats = cache.stats()
+        print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['writes']} writes, "
+              f"{stats['evictions']} evictions; {stats['entries']} entries, {stats['bytes']} bytes", file=sys.stderr)
 
 def main():
     parser = argparse.ArgumentParser(description='Query an LLM with a prompt')
-    parser.add_argument('--prompt', type=str, help='The prompt to send to the LLM', required=True)
-    parser.add_argument('--provider', choices=['openai','anthropic','gemini','local','deepseek','azure','siliconflow'], default='openai', help='The API provider to use')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--prompt', type=str, help='The prompt to send to the LLM')
+    source.add_argument('--batch', type=str, metavar='INPUT.jsonl',
+                        help='Answer every record of a JSONL file (see run_batch); one JSON line per result')
+    parser.add_argument('--provider', choices=list(PROVIDERS), default='openai', help='The API provider to use')
     parser.add_argument('--model', type=str, help='The model to use (default depends on provider)')
     parser.add_argument('--image', type=str, help='Path to an image file to attach to the prompt')
+    parser.add_argument('--verbose', action='store_true', help='Report the .env files loaded on stderr')
+    parser.add_argument('--output', type=str, help='With --batch: append results here and skip records it already answered')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'With --batch: queries in flight per provider (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--cache', type=str, metavar='PATH', help=f'SQLite response cache (default: ${CACHE_ENV}, if set)')
+    parser.add_argument('--cache-ttl', type=float, metavar='SECONDS', help='Ignore cached responses older than this')
+    parser.add_argument('--cache-max-mb', type=float,
+                        help=f'Evict least recently used responses beyond this size '
+                             f'(default: {DEFAULT_CACHE_MAX_BYTES // 2**20})')
+    parser.add_argument('--cache-read-only', action='store_true', help='Use the cache without writing to it')
     args = parser.parse_args()
 
+    load_environment(verbose=args.verbose)
+    cache_options = [name for name, given in (('--cache-ttl', args.cache_ttl is not None),
+                                              ('--cache-max-mb', args.cache_max_mb is not None),
+                                              ('--cache-read-only', args.cache_read_only)) if given]
+    cache_path = args.cache or (os.getenv(CACHE_ENV) if cache_options else None)
+    if cache_options and not cache_path:
+        parser.error(f"{', '.join(cache_options)} requires --cache (or ${CACHE_ENV})")
+    if cache_path:
+        max_mb = args.cache_max_mb if args.cache_max_mb is not None else DEFAULT_CACHE_MAX_BYTES / 2**20
+        set_default_cache(ResponseCache(cache_path, ttl=args.cache_ttl, max_bytes=int(max_mb * 2**20),
+                                        read_only=args.cache_read_only))
+    atexit.register(_report_cache, args.verbose or bool(args.batch))
+    if args.batch:
+        try:
+            counts = run_batch(args.batch, args.output, provider=args.provider, model=args.model,
+                               concurrency=args.concurrency)
+        except KeyboardInterrupt:
+            if args.output:
+                print(f"Interrupted; run again with --output {args.output} to resume", file=sys.stderr)
+            sys.exit(130)
+        sys.exit(1 if counts["failed"] else 0)
     if not args.model:
-        if args.provider == 'openai':
-            args.model = "gpt-4o" 
-        elif args.provider == "deepseek":
-            args.model = "deepseek-chat"
-        elif args.provider == "siliconflow":
-            args.model = "deepseek-ai/DeepSeek-R1"
-        elif args.provider == 'anthropic':
-            args.model = "claude-3-7-sonnet-20250219"
-        elif args.provider == 'gemini':
-            args.model = "gemini-2.0-flash-exp"
-        elif args.provider == 'azure':
-            args.model = os.getenv('AZURE_OPENAI_MODEL_DEPLOYMENT', 'gpt-4o-ms')  # Get from env with fallback
-
-    client = create_llm_client(args.provider)
-    response = query_llm(args.prompt, client, model=args.model, provider=args.provider, image_path=args.image)
+        args.model = default_model(args.provider)
+
+    # No client up front: a cached response needs neither the SDK nor an API key.
+    response = query_llm(args.prompt, model=args.model, provider=args.provider, image_path=args.image)
     if response:
         print(response)
     else:
@@ -2,21 +2,31 @@
 """
 Script to add Firebase files to Xcode project
 This script systematically adds all Firebase-related files to the project.pbxproj
+and makes sure they build in the main app target, in a single transaction.
 """
 
-import re
-import uuid
+import sys
+from pathlib import Path
 
-def generate_uuid():
-    """Generate a UUID for Xcode project references"""
-    return str(uuid.uuid4()).replace('-', '').upper()[:24]
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "tools"))
+
+from pbxproj import PBXProj, TransactionError
+
+MAIN_TARGET = "on brand"
+TEST_TARGET = "on brandTests"
+
+def find_in_group(project, group, filename):
+    """Return the file reference for `filename` directly under `group`"""
+    for child_id in group.children:
+        child = project.get(child_id)
+        if child is not None and child.isa == "PBXFileReference" and filename in (child.path, child.name):
+            return child
+    return None
 
 def add_firebase_files():
     """Add Firebase files to the Xcode project"""
     
-    # Read the project file
-    with open('on brand.xcodeproj/project.pbxproj', 'r') as f:
-        content = f.read()
+    project = PBXProj.load('on brand.xcodeproj')
     
     # Firebase files to add
     firebase_files = [
@@ -47,79 +57,36 @@ def add_firebase_files():
         }
     ]
     
-    # Generate UUIDs for each file
-    file_refs = {}
-    build_files = {}
-    
+    # Adding the files, moving them out of the test target and wiring up
+    # their build files all happen in one transaction and one write
+    tx = project.transaction()
     for file_info in firebase_files:
-        file_id = generate_uuid()
-        build_id = generate_uuid()
-        
-        file_refs[file_info['name']] = {
-            'id': file_id,
-            'path': file_info['path'],
-            'group': file_info['group']
-        }
-        
-        build_files[file_info['name']] = {
-            'id': build_id,
-            'file_ref': file_id
-        }
-    
-    # Add PBXFileReference entries
-    file_ref_section = "/* Begin PBXFileReference section */"
-    file_ref_entries = []
-    
-    for name, info in file_refs.items():
-        entry = f"\t\t{info['id']} /* {name} */ = {{isa = PBXFileReference; fileEncoding = 4; lastKnownFileType = sourcecode.swift; path = \"{info['path']}\"; sourceTree = \"<group>\"; }};"
-        file_ref_entries.append(entry)
-    
-    # Insert file references
-    file_ref_pattern = r'(/\* Begin PBXFileReference section \*/)'
-    file_ref_replacement = file_ref_section + '\n' + '\n'.join(file_ref_entries)
-    content = re.sub(file_ref_pattern, file_ref_replacement, content)
-    
-    # Add PBXBuildFile entries
-    build_file_section = "/* Begin PBXBuildFile section */"
-    build_file_entries = []
-    
-    for name, info in build_files.items():
-        entry = f"\t\t{info['id']} /* {name} in Sources */ = {{isa = PBXBuildFile; fileRef = {info['file_ref']} /* {name} */; }};"
-        build_file_entries.append(entry)
-    
-    # Insert build files
-    build_file_pattern = r'(/\* Begin PBXBuildFile section \*/)'
-    build_file_replacement = build_file_section + '\n' + '\n'.join(build_file_entries)
-    content = re.sub(build_file_pattern, build_file_replacement, content)
-    
-    # Add files to PBXSourcesBuildPhase
-    sources_section_pattern = r'(files = \([\s\S]*?\);[\s]*inputPaths = \([\s\S]*?\);[\s]*outputPaths = \([\s\S]*?\);[\s]*runOnlyForDeploymentPostprocessing = 0;[\s]*shellPath = /bin/sh;[\s]*buildPhases = \([\s\S]*?\);[\s]*buildRules = \([\s\S]*?\);[\s]*dependencies = \([\s\S]*?\);[\s]*name = "on brand";[\s]*productName = "on brand";[\s]*productReference = [\s\S]*?;[\s]*productType = "com\.apple\.product-type\.application";[\s]*targets = \([\s\S]*?\);[\s]*\);[\s]*/\* End PBXNativeTarget section \*/)'
-    
-    # Find the sources build phase
-    sources_pattern = r'(files = \([\s\S]*?)(\s*\);[\s]*inputPaths = \()'
-    
-    def add_sources_files(match):
-        files_section = match.group(1)
-        rest = match.group(2)
-        
-        # Add Firebase build files to sources
-        firebase_sources = []
-        for name, info in build_files.items():
-            firebase_sources.append(f"\t\t\t\t{info['id']} /* {name} in Sources */,")
-        
-        return files_section + '\n' + '\n'.join(firebase_sources) + rest
-    
-    content = re.sub(sources_pattern, add_sources_files, content)
-    
-    # Write the updated project file
-    with open('on brand.xcodeproj/project.pbxproj', 'w') as f:
-        f.write(content)
+        # Queues any group missing between "on brand" and the file's folder
+        group_id = project.groups.ensure_group(f"on brand/{file_info['group']}", tx=tx)
+        group = project.get(group_id)
+        existing = find_in_group(project, group, file_info['name']) if group is not None else None
+        if existing is None:
+            tx.add_file(file_info['name'], group_id, targets=[MAIN_TARGET])
+            print(f"  + {file_info['name']}")
+        else:
+            tx.move_to_target(existing, MAIN_TARGET, source_target=TEST_TARGET)
+            print(f"  = {file_info['name']} (already referenced, ensuring main target)")
+    
+    try:
+        tx.commit()
+    except TransactionError as e:
+        print("❌ Could not update the project:")
+        for problem in e.problems:
+            print(f"  - {problem}")
+        return False
     
     print("✅ Firebase files added to Xcode project successfully!")
     print("Added files:")
     for file_info in firebase_files:
         print(f"  - {file_info['name']}")
+    return True
 
 if __name__ == "__main__":
-    add_firebase_files()
+    if not add_firebase_files():
+        sys.exit(1)
 
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Benchmark the project tools on synthetic projects.
+
+For each size, a project is generated (see pbxproj/synthetic.py) and
+written to disk with its source tree, then every benchmark runs in a fresh
+interpreter so its peak memory is its own:
+
+    parse       PBXProj.load without the parse cache
+    load        PBXProj.load from a warm parse cache
+    serialize   full canonical dumps()
+    save        incremental dumps() after renaming one built file
+    dedupe      find_duplicates + prune_duplicates
+    sync        sync_project against the files on disk (not saved)
+    move-target move 1% of the app's sources into the test target
+    lint        lint_project without disk checks
+
+The garbage collector is paused while a benchmark is timed, as timeit
+does. Results are appended to tools/.benchmarks/pbxproj.jsonl with the
+commit they were measured at; --compare prints the change against an
+earlier commit and --fail-on-regression turns slowdowns into a non-zero
+exit. A benchmark whose median time per object grows with project size (as a
+backtracking regex or a list scan per item would) is superlinear and
+always fails the run.
+
+    python3 tools/bench_pbxproj.py --sizes 1000,10000
+    python3 tools/bench_pbxproj.py --sizes 1000,10000,100000 --compare HEAD~1
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent
+RESULTS_PATH = TOOLS_DIR / ".benchmarks" / "pbxproj.jsonl"
+BENCHMARKS = ("parse", "load", "serialize", "save", "dedupe", "sync", "move-target", "lint")
+PROJECT_NAME = "Synthetic"
+
+# Per-object median time may grow this much more than load's between the
+# two largest sizes (and the two before, with three or more sizes) before
+# it counts as superlinear. Loading touches every object once, so its own
+# growth is what the CPU caches cost as the heap outgrows them, not the
+# code.
+SCALING_TOLERANCE = 1.5
+SCALING_REFERENCE = "load"
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# -- benchmarks (run in the child) ------------------------------------------
+
+def _setup(bench, project_path):
+    from pbxproj import PBXProj
+
+    if bench == "parse":
+        return project_path
+    if bench == "load":
+        from pbxproj.cache import ParseCache
+
+        cache = ParseCache(Path(project_path).parent / ".parse-cache")
+        PBXProj.load(project_path, cache=cache)
+        return project_path, cache
+    project = PBXProj.load(project_path, cache=False)
+    if bench == "save":
+        # A load from the parse cache comes with the index.
+        project.index
+    return project
+
+
+def _run(bench, state):
+    if bench == "parse":
+        from pbxproj import PBXProj
+
+        PBXProj.load(state, cache=False)
+    elif bench == "load":
+        from pbxproj import PBXProj
+
+        PBXProj.load(*state)
+    elif bench == "serialize":
+        state.dumps(canonical=True)
+    elif bench == "save":
+        # A built source, so the phase listing it has a comment to update.
+        sources = state.build_phases(state.targets()[0], "PBXSourcesBuildPhase")[0]
+        ref = state[state[sources.files[0]].file_ref]
+        ref["path"] = "Renamed" + ref["path"]
+        state.dumps()
+    elif bench == "dedupe":
+        from pbxproj import find_duplicates, prune_duplicates
+
+        prune_duplicates(state, find_duplicates(state))
+    elif bench == "sync":
+        from pbxproj import sync_project
+
+        sync_project(state, root=PROJECT_NAME, use_cache=False, save=False)
+    elif bench == "move-target":
+        app, tests = state.targets()[:2]
+        sources = state.build_phases(app, "PBXSourcesBuildPhase")[0].files
+        tx = state.transaction()
+        for build_file_id in sources[::100]:
+            build_file = state.get(build_file_id)
+            if build_file is not None and build_file.file_ref in state.objects:
+                tx.move_to_target(build_file.file_ref, tests, source_target=app)
+        tx.apply()
+    elif bench == "lint":
+        from pbxproj import lint_project
+
+        lint_project(state, root=PROJECT_NAME, disk=False)
+
+
+def _child(bench, project_path, repeat):
+    """Time one benchmark in this process and print the result as JSON"""
+    samples = []
+    setup_rss = None
+    for _ in range(repeat):
+        state = _setup(bench, project_path)
+        if setup_rss is None:
+            setup_rss = _peak_rss_mb()
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        _run(bench, state)
+        samples.append(time.perf_counter() - start)
+        gc.enable()
+        del state
+    print(json.dumps({
+        "seconds": min(samples),
+        "median": statistics.median(samples),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "setup_rss_mb": round(setup_rss, 1),
+    }))
+
+
+# -- harness ----------------------------------------------------------------
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=TOOLS_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _prepare(size, seed, work_dir):
+    """Generate and materialize the project for `size` once per seed"""
+    from pbxproj.synthetic import generate, materialize
+
+    base_dir = work_dir / f"{size}-{seed}"
+    project_path = base_dir / f"{PROJECT_NAME}.xcodeproj"
+    marker = base_dir / ".complete"
+    if not marker.exists():
+        synthetic = generate(files=size, seed=seed, name=PROJECT_NAME)
+        materialize(str(base_dir), synthetic, name=PROJECT_NAME, seed=seed)
+        marker.write_text(json.dumps({"objects": synthetic.object_count}))
+    return project_path, json.loads(marker.read_text())["objects"]
+
+
+def _measure(bench, project_path, repeat):
+    result = subprocess.run(
+        [sys.executable, __file__, "--child", bench, str(project_path), "--repeat", str(repeat)],
+        capture_output=True, text=True, cwd=TOOLS_DIR,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{bench} failed:\n{result.stderr}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def _load_results(path):
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _baseline(history, ref, machine, current_commit):
+    """Latest result per (size, bench) at `ref`, or at the last other commit"""
+    runs = [r for r in history if r["machine"] == machine]
+    if ref:
+        commit = _git("rev-parse", "--short", ref) or ref
+        runs = [r for r in runs if r["commit"] == commit]
+    else:
+        earlier = [r["commit"] for r in runs if r["commit"] != current_commit]
+        runs = [r for r in runs if earlier and r["commit"] == earlier[-1]]
+    return {(r["size"], r["bench"]): r for r in runs}
+
+
+def _growth(results, bench, pair=1):
+    """
+    How much the median time per object grows from one size to the next,
+    `pair` steps back from the largest, or None
+    """
+    rows = sorted((r for r in results if r["bench"] == bench), key=lambda r: r["objects"])
+    if len(rows) < pair + 1:
+        return None
+    small, large = rows[-pair - 1], rows[-pair]
+    if small["median"] <= 0:
+        return None
+    return (large["median"] / large["objects"]) / (small["median"] / small["objects"])
+
+
+def _scaling(results):
+    """
+    (bench, growth relative to load) for benchmarks that scale
+    superlinearly between the two largest sizes and, when measured, the
+    two before; one noisy pair of sizes does not fail the run
+    """
+    flagged = []
+    for bench in BENCHMARKS:
+        if bench == SCALING_REFERENCE:
+            continue
+        relative = []
+        for pair in (1, 2):
+            growth = _growth(results, bench, pair)
+            if growth is not None:
+                reference = max(_growth(results, SCALING_REFERENCE, pair) or 1.0, 1.0)
+                relative.append(growth / reference)
+        if relative and min(relative) > SCALING_TOLERANCE:
+            flagged.append((bench, relative[0]))
+    return flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated file counts")
+    parser.add_argument("--bench", default=",".join(BENCHMARKS), help="comma-separated benchmarks to run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark (1 above 50k files)")
+    parser.add_argument("--work-dir", type=Path, default=Path(tempfile.gettempdir()) / "pbxproj-bench")
+    parser.add_argument("--results", type=Path, default=RESULTS_PATH)
+    parser.add_argument("--no-save", action="store_true", help="do not record the results")
+    parser.add_argument("--compare", nargs="?", const="", metavar="COMMIT",
+                        help="compare with results at COMMIT (default: the last other commit measured)")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--child", nargs=2, metavar=("BENCH", "PROJECT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child[0], args.child[1], args.repeat)
+        return
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    benches = [b for b in args.bench.split(",") if b]
+    unknown = set(benches) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+    if len(sizes) > 1 and SCALING_REFERENCE not in benches:
+        benches.insert(0, SCALING_REFERENCE)  # the scaling check measures against it
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    dirty = bool(_git("status", "--porcelain", "--", "."))
+    machine = platform.node()
+    stamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    history = _load_results(args.results)
+    baseline = _baseline(history, args.compare, machine, commit) if args.compare is not None else {}
+
+    results = []
+    regressions = []
+    print(f"{'size':>7} {'bench':<12} {'seconds':>9} {'peak MB':>8} {'change':>8}")
+    for size in sizes:
+        project_path, objects = _prepare(size, args.seed, args.work_dir)
+        repeat = 1 if size > 50_000 else args.repeat
+        for bench in benches:
+            measured = _measure(bench, project_path, repeat)
+            row = {"commit": commit, "dirty": dirty, "time": stamp, "machine": machine,
+                   "python": platform.python_version(), "size": size, "objects": objects, "seed": args.seed,
+                   "bench": bench, **measured}
+            results.append(row)
+            change = ""
+            before = baseline.get((size, bench))
+            if before:
+                delta = (row["seconds"] - before["seconds"]) / before["seconds"] * 100
+                change = f"{delta:+.1f}%"
+                if delta > args.threshold:
+                    regressions.append((size, bench, delta))
+            print(f"{size:>7} {bench:<12} {row['seconds']:>9.4f} {row['peak_rss_mb']:>8.1f} {change:>8}")
+
+    superlinear = _scaling(results)
+    for bench, growth in superlinear:
+        print(f"superlinear: {bench} time per object grows {growth:.1f}x more than {SCALING_REFERENCE}'s "
+              f"between the two largest sizes")
+    if args.compare is not None and not baseline:
+        print("no earlier results to compare with")
+    for size, bench, delta in regressions:
+        print(f"regression: {bench} at {size} files is {delta:.1f}% slower")
+
+    if not args.no_save:
+        args.results.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            for row in results:
+                f.write(json.dumps(row) + "\n")
+        print(f"results appended to {args.results}")
+    sys.exit(1 if superlinear or (regressions and args.fail_on_regression) else 0)
+
+
+if __name__ == "__main__":
+    main()
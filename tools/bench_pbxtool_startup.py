@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Measure pbxtool cold start and fail when it exceeds the budget.
+
+Runs `pbxtool.py --help` (which imports the CLI but no command module) and
+each command's `--help` in fresh interpreters, and compares the median
+wall time, minus a bare interpreter's, with STARTUP_BUDGET_MS.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from pbxproj.cli import COMMANDS, STARTUP_BUDGET_MS
+
+PBXTOOL = Path(__file__).resolve().parent / "pbxtool.py"
+
+
+def _median_ms(argv, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_MS, help="milliseconds")
+    args = parser.parse_args()
+
+    baseline = _median_ms([sys.executable, "-c", "pass"], args.runs)
+    print(f"{'python -c pass':<22} {baseline:7.1f} ms")
+    worst = 0.0
+    for label, extra in [("pbxtool --help", []), *((f"{name} --help", [name]) for name in COMMANDS)]:
+        elapsed = _median_ms([sys.executable, str(PBXTOOL), *extra, "--help"], args.runs) - baseline
+        worst = max(worst, elapsed)
+        print(f"{label:<22} {elapsed:7.1f} ms")
+    print(f"slowest {worst:.1f} ms, budget {args.budget:.0f} ms")
+    sys.exit(0 if worst <= args.budget else 1)
+
+
+if __name__ == "__main__":
+    main()
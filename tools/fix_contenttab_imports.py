@@ -1,23 +1,21 @@
 #!/usr/bin/env python3
 """
 Fix ContentTab references by adding ProfileModels import to files that need it.
+
+The files are the ones the Swift index (pbxproj/swiftindex.py) finds using
+ContentTab without declaring it.
 """
 
 import os
 import re
 
+from pbxproj.swiftindex import build_index
+
 def fix_contenttab_imports():
     """Add ProfileModels import to files that reference ContentTab"""
     
     # Files that need the ProfileModels import
-    files_to_fix = [
-        "on brand/Features/Profile/Views/InstagramProfileView.swift",
-        "on brand/Features/Profile/Components/InstagramProfileHeader.swift",
-        "on brand/Features/Profile/Components/InstagramContentTabs.swift",
-        "on brand/Features/Profile/Components/ContentTabsSection.swift",
-        "on brand/Features/Profile/Components/BioSection.swift",
-        "on brand/Features/Profile/Components/ProfileHeaderSection.swift"
-    ]
+    files_to_fix = build_index(".").references_to("ContentTab")
     
     for file_path in files_to_fix:
         if os.path.exists(file_path):
@@ -4,107 +4,68 @@ Fix On Brand Project Duplicates
 Fixes duplicate file references in the on brand Xcode project
 """
 
-import re
+import sys
 from pathlib import Path
 
+from pbxproj import PBXProj, find_duplicates, prune_duplicates
+from pbxproj.cli import find_project
+from pbxproj.duplicates import NAME_COLLISION
+
+
+def _remove_from_phases(project, phase_isa, matches):
+    """Take build files whose file name satisfies `matches` out of every `phase_isa`"""
+    removed = 0
+    for phase in list(project.objects_of(phase_isa)):
+        for build_file_id in phase.files:
+            build_file = project.get(build_file_id)
+            ref = project.get(build_file.file_ref) if build_file is not None else None
+            if ref is not None and matches(ref.display_name() or ""):
+                project.remove_build_file(build_file_id)
+                removed += 1
+    return removed
+
 def fix_onbrand_duplicates():
     """Fix duplicate references in on brand project"""
-    
-    project_file = Path("/Users/piersondavis/Documents/on brand/on brand.xcodeproj/project.pbxproj")
-    
-    if not project_file.exists():
+
+    project_file = Path(sys.argv[1]) if len(sys.argv) > 1 else find_project()
+
+    if project_file is None or not project_file.exists():
         print("❌ Project file not found")
         return
-    
+
     print("🔧 Fixing on brand project duplicates...")
-    
+
     # Read the project file
-    with open(project_file, 'r') as f:
-        content = f.read()
-    
+    project = PBXProj.load(project_file)
+
     # Fix 1: Remove Info.plist from Copy Bundle Resources phase
     print("📄 Removing Info.plist from Copy Bundle Resources...")
-    
-    # Find the Copy Bundle Resources section
-    copy_resources_pattern = r'(PBXResourcesBuildPhase.*?files = \(\s*)(.*?)(\s*\);.*?runOnlyForDeploymentPostprocessing = 0;)'
-    
-    def remove_info_plist_from_resources(match):
-        files_section = match.group(2)
-        # Remove any Info.plist references
-        files_section = re.sub(r'.*Info\.plist.*\n?', '', files_section)
-        return f"{match.group(1)}{files_section}{match.group(3)}"
-    
-    content = re.sub(copy_resources_pattern, remove_info_plist_from_resources, content, flags=re.DOTALL)
-    
-    # Fix 2: Remove duplicate ContentView references
-    print("📄 Removing duplicate ContentView references...")
-    
-    # Count ContentView references
-    contentview_count = content.count('ContentView.swift')
-    print(f"Found {contentview_count} ContentView.swift references")
-    
-    # Remove duplicate ContentView build file references
-    contentview_pattern = r'(.*?)(\s*[A-F0-9]{24}.*?ContentView\.swift.*?in Sources.*?)(.*?)(\s*[A-F0-9]{24}.*?ContentView\.swift.*?in Sources.*?)(.*)'
-    
-    def remove_duplicate_contentview(match):
-        # Keep only the first ContentView reference
-        return f"{match.group(1)}{match.group(2)}{match.group(3)}{match.group(5)}"
-    
-    # Apply multiple times to remove all duplicates
-    for _ in range(5):  # Max 5 iterations to avoid infinite loop
-        new_content = re.sub(contentview_pattern, remove_duplicate_contentview, content, flags=re.DOTALL)
-        if new_content == content:
-            break
-        content = new_content
-    
-    # Fix 3: Remove Assets.xcassets from Compile Sources phase
+    _remove_from_phases(project, "PBXResourcesBuildPhase", lambda name: name == "Info.plist")
+
+    # Fix 2: Remove Assets.xcassets from Compile Sources phase
     print("📄 Removing Assets.xcassets from Compile Sources...")
-    
-    # Find the Compile Sources section
-    compile_sources_pattern = r'(PBXSourcesBuildPhase.*?files = \(\s*)(.*?)(\s*\);.*?runOnlyForDeploymentPostprocessing = 0;)'
-    
-    def remove_assets_from_sources(match):
-        files_section = match.group(2)
-        # Remove any Assets.xcassets references
-        files_section = re.sub(r'.*Assets\.xcassets.*\n?', '', files_section)
-        return f"{match.group(1)}{files_section}{match.group(3)}"
-    
-    content = re.sub(compile_sources_pattern, remove_assets_from_sources, content, flags=re.DOTALL)
-    
-    # Fix 4: Remove duplicate file references
+    _remove_from_phases(project, "PBXSourcesBuildPhase", lambda name: name.endswith(".xcassets"))
+
+    # Fix 3: Remove duplicate file references, build files and group entries
     print("📄 Removing duplicate file references...")
-    
-    # Remove duplicate file references (same file path)
-    file_refs = {}
-    file_ref_pattern = r'([A-F0-9]{24}) /\* ([^*]+) \*/ = \{isa = PBXFileReference;.*?path = ([^;]+);.*?\};'
-    
-    def replace_duplicate_file_refs(match):
-        ref_id = match.group(1)
-        file_name = match.group(2)
-        file_path = match.group(3)
-        
-        key = f"{file_name}|{file_path}"
-        
-        if key in file_refs:
-            # This is a duplicate, remove it
-            return ""
-        else:
-            file_refs[key] = ref_id
-            return match.group(0)
-    
-    content = re.sub(file_ref_pattern, replace_duplicate_file_refs, content, flags=re.DOTALL)
-    
+    report = find_duplicates(project)
+
+    # Count ContentView references
+    contentview = [d for d in report.of_kind(NAME_COLLISION) if d.key[1] == "ContentView.swift"]
+    print(f"Found {sum(len(d.ids) for d in contentview)} colliding ContentView.swift references")
+
+    # Keep only the first reference of each file and of each file name
+    # compiled by a phase
+    removals = prune_duplicates(project, report, keep="first", collisions=True)
+
     # Write the fixed project file
-    with open(project_file, 'w') as f:
-        f.write(content)
-    
+    project.save()
+
     print("✅ Fixed on brand project duplicates!")
     print("\nFixed issues:")
     print("- Removed Info.plist from Copy Bundle Resources")
-    print("- Removed duplicate ContentView references")
     print("- Removed Assets.xcassets from Compile Sources")
-    print("- Removed duplicate file references")
+    print(f"- Removed {len(removals)} duplicate references")
 
 if __name__ == "__main__":
     fix_onbrand_duplicates()
-
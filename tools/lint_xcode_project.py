@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Validate the Xcode project structure and print a lint report.
+
+Exits 1 when errors are found, so it can run as a git pre-commit hook:
+
+    #!/bin/sh
+    git diff --cached --quiet -- "on brand.xcodeproj" "on brand" || python3 tools/lint_xcode_project.py
+"""
+
+import argparse
+import sys
+
+from pbxproj import PBXProj
+from pbxproj.lint import lint_project
+from pbxproj.sync import DEFAULT_ROOT
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("project", nargs="?", default="on brand.xcodeproj/project.pbxproj")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="source folder checked against the project")
+    parser.add_argument("--no-disk", action="store_true", help="skip the missing/untracked file checks")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings too")
+    args = parser.parse_args()
+
+    project = PBXProj.load(args.project)
+    report = lint_project(project, root=args.root, disk=not args.no_disk)
+
+    if args.json:
+        print(report.to_json())
+    else:
+        for issue in report:
+            print(f"{issue.severity}: [{issue.code}] {issue.message}")
+        print(f"{len(report.errors)} errors, {len(report) - len(report.errors)} warnings")
+
+    failed = report.errors or (args.strict and len(report))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Git merge driver for project.pbxproj: merges base/ours/theirs object by
+object (see pbxproj/merge.py) and leaves conflict markers only around
+entries both sides changed differently.
+
+Enable it once per clone (.gitattributes already routes *.pbxproj here):
+
+    git config merge.pbxproj.name "structural project.pbxproj merge"
+    git config merge.pbxproj.driver "python3 tools/merge_xcode_project.py %O %A %B %L %P"
+
+Without that configuration git keeps using its text merge.
+"""
+
+import argparse
+import sys
+import time
+
+from pbxproj.merge import merge_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", help="common ancestor (%%O)")
+    parser.add_argument("ours", help="our version, overwritten with the result (%%A)")
+    parser.add_argument("theirs", help="their version (%%B)")
+    parser.add_argument("marker_size", nargs="?", type=int, default=7, help="conflict marker length (%%L)")
+    parser.add_argument("path", nargs="?", help="path of the file in the repository (%%P), for messages")
+    parser.add_argument("--timings", action="store_true", help="print how long the merge took")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    conflicts = merge_files(args.base, args.ours, args.theirs, marker_size=args.marker_size)
+    if conflicts:
+        print(f"{args.path or args.ours}: {conflicts} conflicting changes left in conflict markers", file=sys.stderr)
+    if args.timings:
+        print(f"merged in {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+    sys.exit(1 if conflicts else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Shared project.pbxproj parser, object model and writer for the tools/ and
+on brand/Scripts/ fixers.
+
+    from pbxproj import PBXProj
+
+    project = PBXProj.load("on brand.xcodeproj")
+    for ref in project.objects_of("PBXFileReference"):
+        print(ref.id, ref.path)
+    project.save()
+
+Batches of edits go through a transaction so the file is written once:
+
+    with project.transaction() as tx:
+        tx.add_file("NewView.swift", "on brand/Features/Home/Views", targets=["on brand"])
+"""
+
+import importlib
+
+from .objects import (
+    PBXBuildFile,
+    PBXBuildPhase,
+    PBXFileReference,
+    PBXGroup,
+    PBXNativeTarget,
+    PBXObject,
+    PBXProject,
+    PBXSourcesBuildPhase,
+    PBXFrameworksBuildPhase,
+    PBXResourcesBuildPhase,
+    PBXVariantGroup,
+    XCBuildConfiguration,
+    XCConfigurationList,
+)
+from .cache import ParseCache
+from .groups import GroupTree
+from .ids import IDAllocator
+from .membership import Membership
+from .parser import ParseError, parse
+from .project import PBXProj, resolve_pbxproj_path
+from .transaction import Transaction, TransactionError
+from .writer import dumps
+
+# Loaded on first use, so short-lived commands only import what they run
+# (sync pulls in concurrent.futures, for one).
+_LAZY = {
+    "BuildSettings": "settings",
+    "DuplicateReport": "duplicates",
+    "GCReport": "gc",
+    "collect_garbage": "gc",
+    "find_duplicates": "duplicates",
+    "prune_duplicates": "duplicates",
+    "LintReport": "lint",
+    "lint_project": "lint",
+    "merge_texts": "merge",
+    "SwiftIndex": "swiftindex",
+    "SyncPlan": "sync",
+    "build_index": "swiftindex",
+    "sync_project": "sync",
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def load(path, cache=True):
+    """Parse the project at `path` (.xcodeproj bundle or project.pbxproj)"""
+    return PBXProj.load(path, cache=cache)
+
+
+def loads(text):
+    """Parse project.pbxproj text"""
+    return PBXProj.loads(text)
+
+
+__all__ = [
+    "BuildSettings",
+    "DuplicateReport",
+    "GCReport",
+    "GroupTree",
+    "IDAllocator",
+    "LintReport",
+    "Membership",
+    "PBXBuildFile",
+    "PBXBuildPhase",
+    "PBXFileReference",
+    "PBXFrameworksBuildPhase",
+    "PBXGroup",
+    "PBXNativeTarget",
+    "PBXObject",
+    "PBXProj",
+    "PBXProject",
+    "PBXResourcesBuildPhase",
+    "PBXSourcesBuildPhase",
+    "PBXVariantGroup",
+    "ParseCache",
+    "ParseError",
+    "SwiftIndex",
+    "SyncPlan",
+    "Transaction",
+    "TransactionError",
+    "XCBuildConfiguration",
+    "XCConfigurationList",
+    "build_index",
+    "collect_garbage",
+    "dumps",
+    "lint_project",
+    "find_duplicates",
+    "load",
+    "loads",
+    "merge_texts",
+    "parse",
+    "prune_duplicates",
+    "resolve_pbxproj_path",
+    "sync_project",
+]
@@ -0,0 +1,174 @@
+"""
+One pbxtool command chain over many projects.
+
+The app variants and branches we keep checked out side by side each have
+their own .xcodeproj. With --projects (a glob, repeatable) or --worktrees
+(every worktree of the current git repository) pbxtool runs the same
+chain against each of them on a process pool, one project per worker:
+
+    pbxtool --projects "variants/*/*.xcodeproj" lint
+    pbxtool --worktrees --json dedupe + lint
+    pbxtool --projects "../*" -j 4 --dry-run sync
+
+A glob may match .xcodeproj bundles, project.pbxproj files or folders
+holding an .xcodeproj. Each project is parsed, changed and saved by its
+own worker exactly as a single run would; the text output of a project
+is printed in one block when it finishes, and --json prints one report
+with every project's. The exit status is the worst of all projects, so a
+lint that fails anywhere fails the batch, and a project that cannot be
+loaded or whose command fails counts as failed without stopping the rest.
+"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+from argparse import Namespace
+from pathlib import Path
+
+from .cli import EXIT_FAILED, EXIT_ISSUES, EXIT_OK, _parse_commands, print_error, run_project
+
+
+def _projects_in(path):
+    if path.suffix == ".xcodeproj":
+        return [path]
+    if path.name == "project.pbxproj":
+        return [path.parent]
+    if path.is_dir():
+        return sorted(path.glob("*.xcodeproj"))
+    return []
+
+
+def worktrees(cwd=None):
+    """Folders of every worktree of the git repository at `cwd`"""
+    completed = subprocess.run(["git", "worktree", "list", "--porcelain"], cwd=cwd, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise ValueError(f"git worktree list failed: {completed.stderr.strip() or completed.returncode}")
+    return [Path(line[len("worktree "):]) for line in completed.stdout.splitlines() if line.startswith("worktree ")]
+
+
+def find_projects(patterns=(), include_worktrees=False):
+    """
+    (projects, empty): the .xcodeproj bundles named by `patterns` and, with
+    `include_worktrees`, found in the worktrees, each once; and the folders
+    that matched but hold no project. A pattern matching nothing is a
+    ValueError.
+    """
+    candidates = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(os.path.expanduser(pattern), recursive=True))
+        if not matches:
+            raise ValueError(f"{pattern}: no such project or folder")
+        candidates.extend(Path(match) for match in matches)
+    if include_worktrees:
+        candidates.extend(worktrees())
+    projects, empty, seen = [], [], set()
+    for candidate in candidates:
+        found = _projects_in(candidate)
+        if not found:
+            empty.append(candidate)
+        for project in found:
+            key = project.resolve()
+            if key not in seen:
+                seen.add(key)
+                projects.append(project)
+    return projects, empty
+
+
+def run_one(project_path, chain, dry_run=False, no_parse_cache=False):
+    """The report of one project; runs in the worker processes"""
+    started = time.perf_counter()
+    options = Namespace(dry_run=dry_run, no_parse_cache=no_parse_cache)
+    lines = []
+    try:
+        commands = _parse_commands(chain, options, lambda message: None)
+        status, report, _ = run_project(project_path, commands, options, lines.append)
+    except Exception as e:  # noqa: BLE001 - one broken project must not stop the batch
+        status = EXIT_FAILED
+        report = {"project": str(project_path), "saved": False, "results": [],
+                  "error": {"command": "load", "message": f"{type(e).__name__}: {e}", "problems": []}}
+    report["status"] = status
+    report["output"] = lines
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def run_batch(projects, chain, dry_run=False, no_parse_cache=False, jobs=None, on_report=None):
+    """
+    Run the command `chain` (lists of words, as split on "+") against every
+    project, `jobs` at a time. Returns the reports in `projects` order;
+    `on_report` is called with each one as soon as it is done.
+    """
+    projects = [str(p) for p in projects]
+    reports = [None] * len(projects)
+    jobs = min(jobs or os.cpu_count() or 1, len(projects)) or 1
+    if jobs == 1:
+        for position, project in enumerate(projects):
+            reports[position] = run_one(project, chain, dry_run, no_parse_cache)
+            if on_report is not None:
+                on_report(reports[position])
+        return reports
+
+    # Imported here: single-project runs never need it.
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(run_one, project, chain, dry_run, no_parse_cache): position
+                   for position, project in enumerate(projects)}
+        for future in as_completed(futures):
+            report = reports[futures[future]] = future.result()
+            if on_report is not None:
+                on_report(report)
+    return reports
+
+
+def _print_report(report):
+    print(f"== {report['project']}")
+    for line in report["output"]:
+        print(line)
+    if "error" in report:
+        print_error(report["error"], file=sys.stdout)
+    elif report["saved"]:
+        print(f"saved {report['project']}")
+    elif report.get("modified"):
+        print("dry run: project not written")
+    sys.stdout.flush()
+
+
+def main(chain, options, started, error):
+    """pbxtool's --projects/--worktrees mode; returns the worst exit status"""
+    try:
+        projects, empty = find_projects(options.projects, options.worktrees)
+    except ValueError as e:
+        error(str(e))
+    if options.project:
+        projects.insert(0, Path(options.project))
+    if not projects and not empty:
+        error("no .xcodeproj found")
+    mark = time.perf_counter()
+    reports = run_batch(projects, chain, dry_run=options.dry_run, no_parse_cache=options.no_parse_cache,
+                        jobs=options.jobs, on_report=None if options.json else _print_report)
+    for folder in empty:
+        report = {"project": str(folder), "saved": False, "results": [], "status": EXIT_FAILED, "output": [],
+                  "error": {"command": "load", "message": "no .xcodeproj in this folder", "problems": []}}
+        if not options.json:
+            _print_report(report)
+        reports.append(report)
+    wall = time.perf_counter() - mark
+
+    status = max((report["status"] for report in reports), default=EXIT_OK)
+    failed = sum(1 for report in reports if report["status"] == EXIT_FAILED)
+    issues = sum(1 for report in reports if report["status"] == EXIT_ISSUES)
+    if options.json:
+        print(json.dumps({"projects": reports, "failed": failed, "issues": issues, "status": status}, indent=2))
+    else:
+        print(f"{len(reports)} projects: {len(reports) - failed - issues} ok, {issues} with issues, {failed} failed")
+    if options.timings:
+        print(f"{'startup':>12}: {(mark - started) * 1000:7.1f} ms", file=sys.stderr)
+        for report in reports:
+            if "seconds" in report:
+                print(f"{report['seconds'] * 1000:10.1f} ms  {report['project']}", file=sys.stderr)
+        print(f"{'wall':>12}: {wall * 1000:7.1f} ms", file=sys.stderr)
+    return status
@@ -0,0 +1,197 @@
+"""
+On-disk cache of parsed projects.
+
+Parsing is most of what a short command spends on a large project, and
+most invocations parse a file that has not changed since the last one. A
+ParseCache keeps the parse result (document, comments, entry and section
+offsets) together with the index tables in marshal form, keyed by the
+SHA-1 of the file's bytes:
+
+    cache = ParseCache()
+    project = PBXProj.load(path, cache=cache)   # PBXProj.load uses the default cache
+
+Every project path also gets a small stamp file mapping its size and
+mtime to the last hash seen, so an unchanged file is not even hashed. An
+entry written by another parser or Python version is discarded as a miss,
+and since entries are content addressed an edited file never picks up a
+stale graph; the old entry just ages out. Hits refresh an entry's mtime
+and writes evict the least recently used entries beyond `max_bytes`.
+
+Set PBXPROJ_CACHE=0 to disable the default cache and PBXPROJ_CACHE_DIR
+to move it. Problems reading or writing the cache are never fatal: the
+file is parsed as if there were no cache.
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+from pathlib import Path
+
+from .parser import ParseResult
+
+CACHE_ENV = "PBXPROJ_CACHE"
+CACHE_DIR_ENV = "PBXPROJ_CACHE_DIR"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Bump when the parse result or the index tables change shape.
+_FORMAT_VERSION = 2
+_MAGIC = b"PBXC"
+_HEADER = _MAGIC + bytes([_FORMAT_VERSION, sys.version_info[0], sys.version_info[1], 0])
+_ENTRY_SUFFIX = ".pbxc"
+_STAMP_SUFFIX = ".stamp"
+
+
+def default_cache_dir():
+    """$PBXPROJ_CACHE_DIR, or a folder under $XDG_CACHE_HOME (or ~/.cache)"""
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(base) / "pbxproj" / "parse"
+
+
+def default_cache():
+    """The cache PBXProj.load uses unless told otherwise; None when disabled"""
+    if os.environ.get(CACHE_ENV, "1").lower() in ("0", "false", "no", "off"):
+        return None
+    return ParseCache()
+
+
+def _path_key(path):
+    return hashlib.sha1(str(Path(path).resolve()).encode("utf-8")).hexdigest()[:16]
+
+
+class ParseCache:
+    """Parse results plus index tables, content addressed and size bounded"""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, digest):
+        return self.directory / f"{digest}{_ENTRY_SUFFIX}"
+
+    def _stamp_path(self, path):
+        return self.directory / f"{_path_key(path)}{_STAMP_SUFFIX}"
+
+    def digest(self, path, data, stat=None):
+        """SHA-1 of `data` (the bytes of `path`), skipped when the stamp still matches"""
+        if stat is not None:
+            try:
+                with open(self._stamp_path(path), "r", encoding="ascii") as f:
+                    size, mtime_ns, digest = f.read().split()
+                if int(size) == stat.st_size == len(data) and int(mtime_ns) == stat.st_mtime_ns:
+                    return digest
+            except (OSError, ValueError):
+                pass
+        return hashlib.sha1(data).hexdigest()
+
+    def get(self, path, data, stat=None):
+        """(ParseResult, index tables or None) cached for these bytes, or None"""
+        digest = self.digest(path, data, stat)
+        entry = self._entry_path(digest)
+        try:
+            with open(entry, "rb") as f:
+                blob = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            if not blob.startswith(_HEADER):
+                raise ValueError("written by another version")
+            length, fields, tables = marshal.loads(memoryview(blob)[len(_HEADER):])
+            if length != len(data):
+                raise ValueError("length mismatch")
+            result = ParseResult(*fields)
+        except (ValueError, EOFError, TypeError):
+            self._unlink(entry)
+            self.misses += 1
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        if stat is not None:
+            self._write_stamp(path, stat, digest)
+        self.hits += 1
+        return result, tables
+
+    def put(self, path, data, result, tables=None, stat=None):
+        """Store the parse result (and index tables) of `data`, the bytes of `path`"""
+        digest = self.digest(path, data, stat)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            blob = _HEADER + marshal.dumps((len(data), tuple(result), tables))
+            entry = self._entry_path(digest)
+            tmp_path = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            os.replace(tmp_path, entry)
+        except (OSError, ValueError):
+            return
+        if stat is not None:
+            self._write_stamp(path, stat, digest)
+        self.evict()
+
+    def _write_stamp(self, path, stat, digest):
+        stamp = self._stamp_path(path)
+        try:
+            tmp_path = stamp.with_name(f"{stamp.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="ascii") as f:
+                f.write(f"{stat.st_size} {stat.st_mtime_ns} {digest}\n")
+            os.replace(tmp_path, stamp)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def entries(self):
+        """[(path, size, mtime)] of the cached parse results, oldest first"""
+        found = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(_ENTRY_SUFFIX):
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        found.append((Path(entry.path), st.st_size, st.st_mtime))
+        except OSError:
+            return []
+        found.sort(key=lambda item: item[2])
+        return found
+
+    def evict(self, max_bytes=None):
+        """Drop the least recently used entries until the rest fit; returns how many went"""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= limit:
+                break
+            self._unlink(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        """Remove every entry and stamp"""
+        removed = self.evict(0)
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(_STAMP_SUFFIX):
+                        self._unlink(entry.path)
+        except OSError:
+            pass
+        return removed
@@ -0,0 +1,515 @@
+"""
+pbxtool: one entry point for the project maintenance commands.
+
+    pbxtool [options] COMMAND [args] [+ COMMAND [args] ...]
+
+    pbxtool dedupe --keep modular + fix-ids + lint
+    pbxtool move-target FirebaseAuthService.swift --from "on brandTests" --to "on brand"
+    pbxtool move-target --under "on brand/Tests" --from "on brand" --to "on brandTests"
+    pbxtool --dry-run sync
+    pbxtool --dry-run gc
+    pbxtool settings --config Release --expect SWIFT_VERSION=5.* PRODUCT_BUNDLE_IDENTIFIER
+    pbxtool symbols --duplicates --declares ContentTab
+    pbxtool --projects "variants/*" --json lint
+
+Commands joined with "+" run in order against one parsed project, which is
+saved once at the end if any of them changed it. The project is found
+from --project, $PBXTOOL_PROJECT, or the nearest folder (from the current
+one upwards) holding an .xcodeproj. Unchanged projects are loaded from the
+parse cache (pbxproj/cache.py) unless --no-parse-cache is given. With
+--projects or --worktrees the chain runs against many projects on a
+process pool instead (pbxproj/batch.py).
+
+Only the module behind the commands being run is imported, and argument
+parsers are built for those commands alone, so startup stays within
+STARTUP_BUDGET_MS (checked by tools/bench_pbxtool_startup.py).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+
+# Process start to the first command, in milliseconds.
+STARTUP_BUDGET_MS = 100
+
+PROJECT_ENV = "PBXTOOL_PROJECT"
+CHAIN_SEPARATOR = "+"
+
+EXIT_OK = 0
+EXIT_ISSUES = 1
+EXIT_FAILED = 2
+
+# `configure(parser)` adds the command's options; `run(project, args, out)`
+# performs it and returns a JSON-ready result. Both import lazily.
+Command = namedtuple("Command", ["name", "help", "configure", "run"])
+
+
+class CommandFailed(Exception):
+    """A command could not be carried out; nothing is saved"""
+
+    def __init__(self, message, problems=()):
+        super().__init__(message)
+        self.problems = list(problems)
+
+
+# -- dedupe -----------------------------------------------------------------
+
+def _dedupe_configure(parser):
+    from .duplicates import KEEP_POLICIES
+
+    parser.add_argument("--keep", choices=KEEP_POLICIES, default="first",
+                        help="which member of a duplicate set survives (default: first)")
+    parser.add_argument("--collisions", action="store_true",
+                        help="also resolve different files with one name in a build phase")
+
+
+def _dedupe_run(project, args, out):
+    from .duplicates import find_duplicates, prune_duplicates
+
+    report = find_duplicates(project)
+    removals = prune_duplicates(project, report, keep=args.keep, collisions=args.collisions)
+    for removal in removals:
+        out(f"removed {removal.kind} {removal.removed} (kept {removal.kept})")
+    out(f"{len(removals)} duplicates removed")
+    return {"duplicates": report.to_dict(), "removed": [r._asdict() for r in removals]}
+
+
+# -- sync -------------------------------------------------------------------
+
+def _sync_configure(parser):
+    from .sync import DEFAULT_ROOT
+
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="folder to sync, relative to the .xcodeproj")
+    parser.add_argument("--target", help="target new files join (default: the app target)")
+    parser.add_argument("--keep-stale", action="store_true", help="keep references to missing files")
+    parser.add_argument("--no-regroup", action="store_true", help="leave misplaced references where they are")
+    parser.add_argument("--no-cache", action="store_true", help="rescan every directory")
+
+
+def _sync_run(project, args, out):
+    from .sync import sync_project
+    from .transaction import TransactionError
+
+    # The directory cache compares against the file on disk, which earlier
+    # commands in the chain may have made stale.
+    use_cache = not args.no_cache and not project.modified
+    try:
+        plan = sync_project(project, root=args.root, target=args.target, remove_stale=not args.keep_stale,
+                            regroup=not args.no_regroup, dry_run=args.dry_run, use_cache=use_cache, save=False)
+    except ValueError as e:
+        raise CommandFailed(f"sync: {e}") from e
+    except TransactionError as e:
+        raise CommandFailed("sync failed", e.problems) from e
+    if plan.skipped:
+        out("nothing changed since the last sync")
+    for path, targets in plan.added:
+        out(f"added {path}" + (f" to {', '.join(targets)}" if targets else ""))
+    for _, path in plan.removed:
+        out(f"removed {path}")
+    for _, old, new in plan.moved:
+        out(f"moved {old} to {new}")
+    for _, path in plan.regrouped:
+        out(f"regrouped {path}")
+    for _, path in plan.rephased:
+        out(f"fixed build phase of {path}")
+    for path in plan.conflicts:
+        out(f"not built (name already used in target): {path}")
+    return plan.to_dict()
+
+
+# -- move-target ------------------------------------------------------------
+
+def _move_configure(parser):
+    parser.add_argument("files", nargs="*", help="file names or project paths")
+    parser.add_argument("--to", required=True, dest="destination", help="target to build the files in")
+    parser.add_argument("--from", dest="source", help="target to take them out of (default: every other)")
+    parser.add_argument("--under", metavar="DIR",
+                        help="also every file the source targets build under this project-relative folder")
+    parser.add_argument("--copy", action="store_true", help="keep the files in their other targets")
+    parser.add_argument("--missing-ok", action="store_true", help="skip files not in the project")
+
+
+def _move_run(project, args, out):
+    from .transaction import TransactionError
+
+    if not args.files and not args.under:
+        raise CommandFailed("move-target needs files or --under")
+    index = project.index
+    moved, skipped = [], []
+    for name in args.files:
+        if args.missing_ok and not (index.file_references(path=name) or index.file_references(basename=name)):
+            skipped.append(name)
+            out(f"skipped {name}: not in the project")
+            continue
+        moved.append(name)
+    if args.under:
+        membership = project.membership
+        try:
+            sources = [args.source] if args.source else [t for t in membership.targets if t.name != args.destination]
+            bits = 0
+            for source in sources:
+                bits |= membership.row(source)
+        except KeyError as e:
+            raise CommandFailed(f"move-target: {e.args[0]}") from e
+        found = membership.ids(bits & membership.under(args.under))
+        paths = membership.paths
+    else:
+        found, paths = [], {}
+    tx = project.transaction()
+    tx.move_files(moved + found, args.destination, source_target=args.source, copy=args.copy)
+    try:
+        tx.apply()
+    except TransactionError as e:
+        raise CommandFailed("move-target failed", e.problems) from e
+    verb = "copied" if args.copy else "moved"
+    moved.extend(paths.get(ref_id, ref_id) for ref_id in found)
+    for name in moved:
+        out(f"{verb} {name} to {args.destination}")
+    return {verb: moved, "skipped": skipped}
+
+
+# -- lint -------------------------------------------------------------------
+
+def _lint_configure(parser):
+    from .sync import DEFAULT_ROOT
+
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="source folder checked against the project")
+    parser.add_argument("--no-disk", action="store_true", help="skip the missing/untracked file checks")
+    parser.add_argument("--strict", action="store_true", help="fail on warnings too")
+
+
+def _lint_run(project, args, out):
+    from .lint import lint_project
+
+    report = lint_project(project, root=args.root, disk=not args.no_disk)
+    for issue in report:
+        out(f"{issue.severity}: [{issue.code}] {issue.message}")
+    out(f"{len(report.errors)} errors, {len(report) - len(report.errors)} warnings")
+    if report.errors or (args.strict and len(report)):
+        args.exit_status = EXIT_ISSUES
+    return report.to_dict()
+
+
+# -- fix-ids ----------------------------------------------------------------
+
+def _fix_ids_configure(parser):
+    pass
+
+
+def _fix_ids_run(project, args, out):
+    from .ids import repair_ids
+
+    fixes = repair_ids(project)
+    for action, object_id, detail in fixes:
+        out(f"{action.replace('_', ' ')} {object_id}" + (f" -> {detail}" if detail else ""))
+    out(f"{len(fixes)} references fixed")
+    if project.duplicate_ids:
+        out(f"warning: {len(project.duplicate_ids)} IDs are defined more than once; the last definition was kept")
+    return {"fixes": [{"action": a, "id": i, "detail": d} for a, i, d in fixes],
+            "duplicate_ids": list(project.duplicate_ids)}
+
+
+# -- gc ---------------------------------------------------------------------
+
+def _gc_configure(parser):
+    parser.add_argument("--keep", action="append", default=[], metavar="ID",
+                        help="treat this object as reachable (repeatable)")
+
+
+def _gc_run(project, args, out):
+    from .gc import collect_garbage
+
+    try:
+        report = collect_garbage(project, dry_run=args.dry_run, keep=args.keep)
+    except ValueError as e:
+        raise CommandFailed(f"gc: {e}") from e
+    verb = "would remove" if args.dry_run else "removed"
+    for item in report:
+        out(f"{verb} {item.isa} {item.id}" + (f" ({item.name})" if item.name else ""))
+    out(f"{len(report)} of {report.total} objects unreachable ({report.size} bytes)")
+    return report.to_dict()
+
+
+# -- settings ---------------------------------------------------------------
+
+def _settings_configure(parser):
+    parser.add_argument("keys", nargs="*", help="settings to show (default: all)")
+    parser.add_argument("--target", action="append", dest="targets", metavar="NAME",
+                        help="target to resolve (repeatable; default: every target)")
+    parser.add_argument("--config", action="append", dest="configurations", metavar="NAME",
+                        help="configuration to resolve (repeatable; default: every configuration)")
+    parser.add_argument("--condition", action="append", default=[], metavar="NAME=VALUE",
+                        help="condition for conditional settings, e.g. sdk=iphoneos17.0")
+    parser.add_argument("--expect", action="append", default=[], metavar="KEY=PATTERN",
+                        help="exit 1 unless KEY matches the glob PATTERN in every target and configuration")
+
+
+def _pairs(items, option):
+    pairs = {}
+    for item in items:
+        key, sep, value = item.partition("=")
+        if not sep or not key:
+            raise CommandFailed(f"settings: {option} expects NAME=VALUE, got {item!r}")
+        pairs[key] = value
+    return pairs
+
+
+def _settings_run(project, args, out):
+    import fnmatch
+
+    from .settings import BuildSettings
+
+    expected = _pairs(args.expect, "--expect")
+    settings = BuildSettings(project, conditions=_pairs(args.condition, "--condition"))
+    try:
+        table = settings.table(args.targets, args.configurations)
+    except KeyError as e:
+        raise CommandFailed(f"settings: {e.args[0]}") from e
+    keys = args.keys + [k for k in expected if k not in args.keys]
+    results, mismatches = {}, []
+    for (target, configuration), values in table.items():
+        if keys:
+            values = {key: values.get(key, "") for key in keys}
+        results[f"{target} ({configuration})"] = values
+        out(f'Build settings for target "{target}" ({configuration}):')
+        for key, value in values.items():
+            out(f"    {key} = {value}")
+        for key, pattern in expected.items():
+            if not fnmatch.fnmatchcase(values[key], pattern):
+                mismatches.append({"target": target, "configuration": configuration, "key": key,
+                                   "value": values[key], "expected": pattern})
+    for problem in settings.problems:
+        out(f"warning: {problem}")
+    for m in mismatches:
+        out(f"error: {m['key']} is {m['value']!r} in {m['target']} ({m['configuration']}), expected {m['expected']!r}")
+    if mismatches:
+        args.exit_status = EXIT_ISSUES
+    return {"settings": results, "problems": list(settings.problems), "mismatches": mismatches}
+
+
+# -- symbols ----------------------------------------------------------------
+
+def _symbols_configure(parser):
+    from .sync import DEFAULT_ROOT
+
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="Swift source folder, relative to the .xcodeproj")
+    parser.add_argument("--declares", action="append", default=[], metavar="NAME",
+                        help="list the top-level declarations of NAME, extensions included (repeatable)")
+    parser.add_argument("--references", action="append", default=[], metavar="NAME",
+                        help="list the files using NAME without declaring it (repeatable)")
+    parser.add_argument("--duplicates", action="store_true",
+                        help="list types declared in more than one file; exits 1 if there are any")
+    parser.add_argument("--workers", type=int, help="processes parsing changed files (default: one per CPU)")
+    parser.add_argument("--no-cache", action="store_true", help="parse every file again")
+
+
+def _symbols_run(project, args, out):
+    from .swiftindex import build_index
+
+    if project.path is None:
+        raise CommandFailed("symbols: the project has no location on disk")
+    index = build_index(project.path.parent.parent, root=args.root, use_cache=not args.no_cache,
+                        workers=args.workers)
+    out(f"{len(index)} Swift files indexed, {len(index.parsed)} parsed")
+    result = {"files": len(index), "parsed": len(index.parsed), "removed": len(index.removed)}
+    if args.declares:
+        result["declarations"] = {}
+        for name in args.declares:
+            found = index.declarers(name, extensions=True)
+            result["declarations"][name] = [d._asdict() for d in found]
+            for d in found:
+                out(f"{d.path}:{d.line}: {d.kind} {d.name}")
+            if not found:
+                out(f"{name} is not declared")
+    if args.references:
+        result["references"] = {}
+        for name in args.references:
+            paths = result["references"][name] = index.references_to(name)
+            for path in paths:
+                out(f"{path}: uses {name}")
+    if args.duplicates:
+        duplicates = index.duplicates()
+        result["duplicates"] = {name: [d._asdict() for d in found] for name, found in duplicates.items()}
+        for name, found in duplicates.items():
+            out(f"{name} is declared in {len({d.path for d in found})} files:")
+            for d in found:
+                out(f"    {d.path}:{d.line}: {d.kind}")
+        if duplicates:
+            args.exit_status = EXIT_ISSUES
+    return result
+
+
+COMMANDS = {
+    command.name: command
+    for command in (
+        Command("dedupe", "remove duplicate file references, build files and group entries",
+                _dedupe_configure, _dedupe_run),
+        Command("sync", "add, remove and regroup references to match the files on disk",
+                _sync_configure, _sync_run),
+        Command("move-target", "move (or --copy) files into another target", _move_configure, _move_run),
+        Command("lint", "report structural problems; exits 1 on errors", _lint_configure, _lint_run),
+        Command("fix-ids", "repair references to missing object IDs", _fix_ids_configure, _fix_ids_run),
+        Command("gc", "remove objects not reachable from the root object", _gc_configure, _gc_run),
+        Command("settings", "show effective build settings per target and configuration",
+                _settings_configure, _settings_run),
+        Command("symbols", "index the Swift sources: who declares what, duplicate types",
+                _symbols_configure, _symbols_run),
+    )
+}
+
+
+def find_project(start=None):
+    """The .xcodeproj named by $PBXTOOL_PROJECT, or the nearest one from `start` upwards"""
+    env = os.environ.get(PROJECT_ENV)
+    if env:
+        return Path(env)
+    directory = Path(start or os.getcwd()).resolve()
+    for candidate in (directory, *directory.parents):
+        projects = sorted(candidate.glob("*.xcodeproj"))
+        if projects:
+            return projects[0]
+    return None
+
+
+def _split_chain(argv):
+    chain, current = [], []
+    for arg in argv:
+        if arg == CHAIN_SEPARATOR:
+            chain.append(current)
+            current = []
+        else:
+            current.append(arg)
+    chain.append(current)
+    return chain
+
+
+def _global_parser():
+    lines = [f"  {name:<12} {command.help}" for name, command in COMMANDS.items()]
+    parser = argparse.ArgumentParser(
+        prog="pbxtool",
+        usage="pbxtool [options] COMMAND [args] [+ COMMAND [args] ...]",
+        description="Xcode project maintenance. Commands joined with '+' share one parse and one save.",
+        epilog="commands:\n" + "\n".join(lines) + "\n\nRun 'pbxtool COMMAND --help' for a command's options.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("-p", "--project", help=f"the .xcodeproj or project.pbxproj (default: ${PROJECT_ENV} "
+                                                "or the nearest .xcodeproj)")
+    parser.add_argument("--projects", action="append", default=[], metavar="GLOB",
+                        help="run against every .xcodeproj matching GLOB, or found in a matching folder "
+                             "(repeatable); see pbxproj/batch.py")
+    parser.add_argument("--worktrees", action="store_true",
+                        help="run against the .xcodeproj of every worktree of the current git repository")
+    parser.add_argument("-j", "--jobs", type=int, help="projects processed at once with --projects/--worktrees "
+                                                       "(default: one per CPU)")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="do not write the project")
+    parser.add_argument("--json", action="store_true", help="print one JSON object with every command's result")
+    parser.add_argument("--timings", action="store_true", help="print phase timings to stderr")
+    parser.add_argument("--no-parse-cache", action="store_true", help="parse the project even if a cached parse "
+                                                                       "of the same bytes exists")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return parser
+
+
+def _parse_commands(chain, options, error):
+    parsed = []
+    for words in chain:
+        if not words:
+            error(f"empty command around '{CHAIN_SEPARATOR}'")
+        command = COMMANDS.get(words[0])
+        if command is None:
+            error(f"unknown command {words[0]!r} (choose from {', '.join(COMMANDS)})")
+        parser = argparse.ArgumentParser(prog=f"pbxtool {command.name}", description=command.help)
+        command.configure(parser)
+        args = parser.parse_args(words[1:])
+        args.dry_run = options.dry_run
+        args.exit_status = EXIT_OK
+        parsed.append((command, args))
+    return parsed
+
+
+def run_project(project_path, commands, options, out):
+    """
+    Run parsed `commands` against one project and save it if they changed
+    it. Returns (exit status, report, timings); a failed command ends the
+    run with nothing saved and its error in the report.
+    """
+    from .project import PBXProj
+
+    timings = {}
+    mark = time.perf_counter()
+    project = PBXProj.load(project_path, cache=not options.no_parse_cache)
+    timings["parse"] = time.perf_counter() - mark
+
+    report = {"project": str(project.path), "saved": False, "results": []}
+    status = EXIT_OK
+    for command, args in commands:
+        mark = time.perf_counter()
+        try:
+            result = command.run(project, args, out)
+        except CommandFailed as e:
+            report["error"] = {"command": command.name, "message": str(e), "problems": e.problems}
+            return EXIT_FAILED, report, timings
+        timings[command.name] = time.perf_counter() - mark
+        report["results"].append({"command": command.name, "result": result})
+        status = max(status, args.exit_status)
+
+    if project.modified and not options.dry_run:
+        mark = time.perf_counter()
+        project.save()
+        timings["save"] = time.perf_counter() - mark
+        report["saved"] = True
+    report["modified"] = project.modified
+    return status, report, timings
+
+
+def print_error(error, file=sys.stderr):
+    print(f"pbxtool {error['command']}: {error['message']}", file=file)
+    for problem in error["problems"]:
+        print(f"  - {problem}", file=file)
+
+
+def main(argv=None, started=None):
+    """Run pbxtool with `argv`; `started` is the perf_counter() at process start"""
+    started = started if started is not None else time.perf_counter()
+    argv = sys.argv[1:] if argv is None else argv
+    parser = _global_parser()
+    options = parser.parse_args(argv)
+    if not options.command:
+        parser.print_help()
+        return EXIT_FAILED
+    chain = _split_chain(options.command)
+    commands = _parse_commands(chain, options, parser.error)
+
+    if options.projects or options.worktrees:
+        from .batch import main as batch_main
+
+        return batch_main(chain, options, started, parser.error)
+
+    timings = {"startup": time.perf_counter() - started}
+    project_path = options.project or find_project()
+    if project_path is None:
+        parser.error("no .xcodeproj found; pass --project")
+
+    out = (lambda line: None) if options.json else print
+    status, report, project_timings = run_project(project_path, commands, options, out)
+    timings.update(project_timings)
+    if "error" in report:
+        print_error(report["error"])
+        return status
+
+    if options.json:
+        print(json.dumps(report, indent=2))
+    elif report["saved"]:
+        print(f"saved {report['project']}")
+    elif report["modified"]:
+        print("dry run: project not written")
+    if options.timings:
+        for name, seconds in timings.items():
+            print(f"{name:>12}: {seconds * 1000:7.1f} ms", file=sys.stderr)
+        if timings["startup"] * 1000 > STARTUP_BUDGET_MS:
+            print(f"warning: startup exceeded the {STARTUP_BUDGET_MS} ms budget", file=sys.stderr)
+    return status
@@ -0,0 +1,295 @@
+"""
+Duplicate detection and pruning.
+
+One pass over the objects table hashes every entry under the key that makes
+two entries interchangeable:
+
+- file references: (path, sourceTree, parent group)
+- build files: (fileRef, build phase)
+- group children: (group, child ID) listed more than once
+- name collisions: two different file references with the same file name
+  in one build phase, which Xcode reports as "Multiple commands produce"
+
+Any key seen more than once is a duplicate. prune_duplicates() keeps one
+member of each set according to a keep policy and removes the rest
+through the object API, so indexes and incremental saves stay correct:
+
+    project = PBXProj.load("on brand.xcodeproj")
+    report = find_duplicates(project)
+    prune_duplicates(project, report, keep="modular")
+    project.save()
+"""
+
+from collections import namedtuple
+
+from .objects import BUILD_PHASE_ISAS, GROUP_ISAS
+
+KEEP_POLICIES = ("first", "newest", "modular")
+
+FILE_REFERENCE = "file_reference"
+BUILD_FILE = "build_file"
+GROUP_CHILD = "group_child"
+NAME_COLLISION = "name_collision"
+
+# `ids` are in file order; `key` is the tuple the members share.
+Duplicate = namedtuple("Duplicate", ["kind", "key", "ids"])
+
+Removal = namedtuple("Removal", ["kind", "removed", "kept"])
+
+
+class DuplicateReport:
+    """Duplicate sets found in a project, grouped by kind"""
+
+    def __init__(self, duplicates=()):
+        self.duplicates = list(duplicates)
+
+    def __iter__(self):
+        return iter(self.duplicates)
+
+    def __len__(self):
+        return len(self.duplicates)
+
+    def of_kind(self, kind):
+        return [d for d in self.duplicates if d.kind == kind]
+
+    def to_dict(self):
+        """JSON-ready summary"""
+        result = {kind: [] for kind in (FILE_REFERENCE, BUILD_FILE, GROUP_CHILD, NAME_COLLISION)}
+        for dup in self.duplicates:
+            result[dup.kind].append({"key": list(dup.key), "ids": list(dup.ids)})
+        return result
+
+
+def _seen_twice(first, repeats, key, object_id):
+    """Record `object_id` under `key`; only repeated keys build a list"""
+    previous = first.setdefault(key, object_id)
+    if previous is not object_id:
+        bucket = repeats.get(key)
+        if bucket is None:
+            repeats[key] = [previous, object_id]
+        else:
+            bucket.append(object_id)
+
+
+def find_duplicates(project):
+    """Scan the project once and return a DuplicateReport"""
+    objects = project.objects
+    parents = project.index.parents
+    ref_first, ref_repeats = {}, {}
+    bf_first, bf_repeats = {}, {}
+    name_first, name_repeats = {}, {}
+    ref_names = {}
+    children = []
+    for obj in objects.values():
+        isa = obj.isa
+        if isa == "PBXBuildFile":
+            continue  # visited through their build phase
+        fields = obj.fields
+        if isa == "PBXFileReference":
+            parent = parents.get(obj.id)
+            key = (fields.get("path"), fields.get("sourceTree"), parent[0] if parent else None)
+            _seen_twice(ref_first, ref_repeats, key, obj.id)
+        elif isa in BUILD_PHASE_ISAS:
+            phase_id = obj.id
+            for build_file_id in fields.get("files", ()):
+                build_file = objects.get(build_file_id)
+                if build_file is None:
+                    continue
+                bf_fields = build_file.fields
+                ref_id = bf_fields.get("fileRef") or bf_fields.get("productRef")
+                if ref_id is None:
+                    continue  # empty entries are broken, not duplicates
+                _seen_twice(bf_first, bf_repeats, (ref_id, phase_id), build_file_id)
+                name = ref_names.get(ref_id)
+                if name is None:
+                    ref = objects.get(ref_id)
+                    name = ""
+                    if ref is not None and ref.isa == "PBXFileReference":
+                        name = ref.fields.get("name") or (ref.fields.get("path") or "").rpartition("/")[2]
+                    ref_names[ref_id] = name
+                if name:
+                    key = (phase_id, name)
+                    previous = name_first.setdefault(key, ref_id)
+                    if previous != ref_id:
+                        bucket = name_repeats.setdefault(key, [previous])
+                        if ref_id not in bucket:
+                            bucket.append(ref_id)
+        if isa in GROUP_ISAS:
+            items = fields.get("children", ())
+            if len(items) != len(set(items)):
+                counts = {}
+                for child in items:
+                    counts[child] = counts.get(child, 0) + 1
+                children.extend(
+                    Duplicate(GROUP_CHILD, (obj.id, child), (child,) * n) for child, n in counts.items() if n > 1
+                )
+
+    report = DuplicateReport()
+    report.duplicates.extend(Duplicate(FILE_REFERENCE, k, tuple(v)) for k, v in ref_repeats.items())
+    report.duplicates.extend(Duplicate(BUILD_FILE, k, tuple(v)) for k, v in bf_repeats.items())
+    report.duplicates.extend(children)
+    # Identical references are already covered above; only report names
+    # that collide between references that are not duplicates of each other.
+    identical = {ref_id: ids[0] for ids in ref_repeats.values() for ref_id in ids}
+    for key, ref_ids in name_repeats.items():
+        if len({identical.get(r, r) for r in ref_ids}) > 1:
+            report.duplicates.append(Duplicate(NAME_COLLISION, key, tuple(ref_ids)))
+    return report
+
+
+def _keeper(ids, keep, locations):
+    """
+    Choose the member to keep:
+
+    - first: the first occurrence in the file
+    - newest: the last occurrence; Xcode's IDs sort chronologically and
+      scripts append, so later entries were added later
+    - modular: the reference in the most deeply nested group (the feature
+      module copy rather than the old top-level file), then the first
+    """
+    if keep == "first":
+        return ids[0]
+    if keep == "newest":
+        return ids[-1]
+    if keep == "modular":
+        return max(ids, key=lambda i: (locations.depth(i), -ids.index(i)))
+    raise ValueError(f"Unknown keep policy {keep!r}; expected one of {', '.join(KEEP_POLICIES)}")
+
+
+class _Removals:
+    """
+    Entries to take out of list fields and objects to drop, applied in one
+    pass per list: removing them one at a time rescans the list for each.
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self._reset()
+
+    def _reset(self):
+        self.entries = {}      # (owner ID, list key) -> IDs to remove from it
+        self.keep_first = {}   # group ID -> children to keep only once
+        self.objects = []      # removed from the table
+        self.build_files = []  # removed once no build phase lists them
+
+    def entry(self, owner_id, key, object_id):
+        self.entries.setdefault((owner_id, key), set()).add(object_id)
+
+    def drop_build_file(self, build_file_id, phase_ids):
+        for phase_id in phase_ids:
+            self.entry(phase_id, "files", build_file_id)
+        self.build_files.append(build_file_id)
+
+    def apply(self):
+        project = self.project
+        objects = project.objects
+        for (owner_id, key), ids in self.entries.items():
+            owner = objects.get(owner_id)
+            if owner is not None:
+                owner.remove_references(key, ids)
+        for group_id, ids in self.keep_first.items():
+            objects[group_id].remove_references("children", ids, keep_first=True)
+        index = project.index
+        for build_file_id in self.build_files:
+            if build_file_id in objects and not index.phases(build_file_id):
+                project.remove(build_file_id)
+        for object_id in self.objects:
+            if object_id in objects:
+                project.remove(object_id)
+        self._reset()
+
+
+def _merge_file_reference(project, removed_id, kept_id, pending):
+    """Move build memberships of `removed_id` onto `kept_id`; the rest goes into `pending`"""
+    index = project.index
+    kept_phases = {phase.id for bf in index.build_files(kept_id) for phase in index.phases(bf.id)}
+    for build_file in index.build_files(removed_id):
+        phases = {phase.id for phase in index.phases(build_file.id)}
+        if phases and not phases & kept_phases:
+            key = "fileRef" if build_file.get("fileRef") == removed_id else "productRef"
+            build_file[key] = kept_id
+            kept_phases |= phases
+        else:
+            pending.drop_build_file(build_file.id, phases)
+    for group_id in index.parents.get(removed_id, ()):
+        pending.entry(group_id, "children", removed_id)
+    pending.objects.append(removed_id)
+
+
+def prune_duplicates(project, report=None, keep="first", collisions=False, scope=None):
+    """
+    Remove the duplicates in `report` (found afresh when omitted), keeping
+    one member of each set according to `keep`. Name collisions are only
+    resolved when `collisions` is true, by taking the losing references out
+    of that build phase. With `scope` (a set of IDs) only sets with a
+    member in it are touched. Returns the list of Removals.
+    """
+    if keep not in KEEP_POLICIES:
+        raise ValueError(f"Unknown keep policy {keep!r}; expected one of {', '.join(KEEP_POLICIES)}")
+    if report is None:
+        report = find_duplicates(project)
+    # Collisions are matched against the references left after merging,
+    # so their scope is checked then.
+    collided = report.of_kind(NAME_COLLISION)
+    if scope is not None:
+        report = DuplicateReport(dup for dup in report if not scope.isdisjoint(dup.ids))
+    objects = project.objects
+    locations = project.groups if keep == "modular" else None
+    pending = _Removals(project)
+    removals = []
+    merged_into = {}  # removed file reference ID -> the one kept
+
+    for dup in report.of_kind(FILE_REFERENCE):
+        ids = [i for i in dup.ids if i in objects]
+        if len(ids) < 2:
+            continue
+        kept = _keeper(ids, keep, locations)
+        for ref_id in ids:
+            if ref_id != kept:
+                _merge_file_reference(project, ref_id, kept, pending)
+                merged_into[ref_id] = kept
+                removals.append(Removal(FILE_REFERENCE, ref_id, kept))
+    pending.apply()
+
+    # Merging never pairs a build file with a phase the kept reference is
+    # already in (that copy is dropped instead), so the report's build file
+    # sets still hold.
+    for dup in report.of_kind(BUILD_FILE):
+        ids = [i for i in dup.ids if i in objects]
+        if len(ids) < 2 or (scope is not None and scope.isdisjoint(ids)):
+            continue
+        phase_id = dup.key[1]
+        kept = ids[0] if keep == "first" or keep == "modular" else ids[-1]
+        for build_file_id in ids:
+            if build_file_id != kept:
+                pending.drop_build_file(build_file_id, (phase_id,))
+                removals.append(Removal(BUILD_FILE, build_file_id, kept))
+
+    for dup in report.of_kind(GROUP_CHILD):
+        group_id, child = dup.key
+        group = objects.get(group_id)
+        if group is None:
+            continue
+        # Trailing copies go, so the child keeps its first position.
+        copies = group.children.count(child) - 1
+        if copies > 0:
+            pending.keep_first.setdefault(group_id, set()).add(child)
+            removals.extend([Removal(GROUP_CHILD, child, child)] * copies)
+    pending.apply()
+
+    if collisions:
+        for dup in collided:
+            phase = objects[dup.key[0]]
+            ids = [i for i in dict.fromkeys(merged_into.get(i, i) for i in dup.ids) if i in objects]
+            if len(ids) < 2 or (scope is not None and scope.isdisjoint(ids)):
+                continue
+            kept = _keeper(ids, keep, locations)
+            for ref_id in ids:
+                if ref_id == kept:
+                    continue
+                for build_file in project.index.build_files(ref_id):
+                    if phase in project.index.phases(build_file.id):
+                        pending.drop_build_file(build_file.id, (phase.id,))
+                removals.append(Removal(NAME_COLLISION, ref_id, kept))
+        pending.apply()
+    return removals
@@ -0,0 +1,80 @@
+"""
+File type and build phase defaults for new file references.
+"""
+
+import posixpath
+
+# Extension -> lastKnownFileType, matching what Xcode records for new files.
+FILE_TYPES = {
+    ".swift": "sourcecode.swift",
+    ".m": "sourcecode.c.objc",
+    ".mm": "sourcecode.cpp.objcpp",
+    ".c": "sourcecode.c.c",
+    ".cpp": "sourcecode.cpp.cpp",
+    ".h": "sourcecode.c.h",
+    ".metal": "sourcecode.metal",
+    ".xcassets": "folder.assetcatalog",
+    ".storyboard": "file.storyboard",
+    ".xib": "file.xib",
+    ".strings": "text.plist.strings",
+    ".xcstrings": "text.json.xcstrings",
+    ".plist": "text.plist.xml",
+    ".entitlements": "text.plist.entitlements",
+    ".xcconfig": "text.xcconfig",
+    ".json": "text.json",
+    ".md": "net.daringfireball.markdown",
+    ".txt": "text",
+    ".png": "image.png",
+    ".jpg": "image.jpeg",
+    ".jpeg": "image.jpeg",
+    ".pdf": "image.pdf",
+    ".ttf": "file",
+    ".otf": "file",
+    ".sh": "text.script.sh",
+    ".py": "text.script.python",
+    ".framework": "wrapper.framework",
+    ".xcframework": "wrapper.xcframework",
+    ".bundle": "wrapper.plug-in",
+}
+
+# Types that are compiled rather than copied.
+_SOURCE_PREFIX = "sourcecode."
+_HEADER_TYPES = frozenset({"sourcecode.c.h"})
+
+# Types that belong to no build phase at all: configuration, signing and
+# documentation files are referenced by build settings or not used.
+_UNBUILT_TYPES = frozenset({
+    "text.plist.entitlements",
+    "text.xcconfig",
+    "net.daringfireball.markdown",
+    "text",
+    "text.script.sh",
+    "text.script.python",
+})
+
+_UNBUILT_NAMES = frozenset({"Info.plist"})
+
+
+def file_type(path):
+    """lastKnownFileType for `path`, or None when Xcode would infer it"""
+    _, ext = posixpath.splitext(path.rstrip("/"))
+    return FILE_TYPES.get(ext.lower())
+
+
+def default_phase_isa(path, last_known_file_type=None):
+    """
+    Build phase a file with this path/type is added to by default, or None
+    for files that are only referenced (Info.plist, xcconfig, docs).
+    """
+    if posixpath.basename(path) in _UNBUILT_NAMES:
+        return None
+    kind = last_known_file_type or file_type(path)
+    if kind is None or kind in _UNBUILT_TYPES:
+        return None
+    if kind in _HEADER_TYPES:
+        return None
+    if kind.startswith(_SOURCE_PREFIX):
+        return "PBXSourcesBuildPhase"
+    if kind.startswith("wrapper.framework") or kind == "wrapper.xcframework":
+        return "PBXFrameworksBuildPhase"
+    return "PBXResourcesBuildPhase"
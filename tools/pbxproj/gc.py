@@ -0,0 +1,124 @@
+"""
+Mark-and-sweep collection of unreachable objects.
+
+Scripts that delete lines by regex (the old fix_test_targets.py, for one)
+drop the reference to an object but leave the object itself behind:
+build files no phase lists, file references no group or build file
+points at, groups nothing contains. Xcode ignores them, but they stay in
+the file forever.
+
+collect_garbage() marks every object reachable from rootObject by
+following the ID-valued fields of each object it reaches, then removes
+everything left unmarked in one pass. Only unreachable objects are
+removed, and nothing reachable can refer to one, so no reference lists
+need editing:
+
+    report = collect_garbage(project, dry_run=True)
+    for item in report:
+        print(item.isa, item.id, item.name)
+"""
+
+import json
+from collections import namedtuple
+
+from .objects import NON_REFERENCE_KEYS, _walk_references
+
+# `size` is the length of the object's entry in the loaded text (0 for
+# objects added since).
+Collected = namedtuple("Collected", ["id", "isa", "name", "size"])
+
+
+class GCReport:
+    """Unreachable objects found (and removed unless `dry_run`), in file order"""
+
+    def __init__(self, collected=(), total=0, dry_run=False):
+        self.collected = list(collected)
+        self.total = total
+        self.dry_run = dry_run
+
+    def __iter__(self):
+        return iter(self.collected)
+
+    def __len__(self):
+        return len(self.collected)
+
+    @property
+    def size(self):
+        """Characters of project text the unreachable objects take up"""
+        return sum(item.size for item in self.collected)
+
+    def counts(self):
+        """isa -> number of unreachable objects"""
+        counts = {}
+        for item in self.collected:
+            counts[item.isa] = counts.get(item.isa, 0) + 1
+        return counts
+
+    def to_dict(self):
+        """JSON-ready summary"""
+        return {
+            "dry_run": self.dry_run,
+            "objects": self.total,
+            "unreachable": len(self.collected),
+            "size": self.size,
+            "counts": self.counts(),
+            "collected": [item._asdict() for item in self.collected],
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent)
+
+
+def reachable(project, roots=None):
+    """IDs of the objects reachable from `roots` (default: the root object)"""
+    objects = project.objects
+    if roots is None:
+        roots = [project.root_id] if project.root_id in objects else []
+    marked = set(roots)
+    pending = list(marked)
+    while pending:
+        obj = objects[pending.pop()]
+        found = []
+        # Plain IDs and ID lists inline; nested dicts (settings,
+        # attributes) through the generic walk.
+        for key, value in obj.fields.items():
+            if key in NON_REFERENCE_KEYS:
+                continue
+            if value.__class__ is str:
+                if value in objects:
+                    found.append(value)
+            elif value.__class__ is list and all(item.__class__ is str for item in value):
+                found.extend(value)
+            else:
+                found.extend(_walk_references(value, project, key))
+        for ref in found:
+            if ref not in marked and ref in objects:
+                marked.add(ref)
+                pending.append(ref)
+    return marked
+
+
+def _entry_size(project, object_id):
+    source = project._source
+    spans = source.entries.get(object_id) if source is not None else None
+    return sum(span.length for span in spans) if spans else 0
+
+
+def collect_garbage(project, dry_run=False, keep=()):
+    """
+    Remove every object not reachable from rootObject and return a
+    GCReport. IDs in `keep` are treated as extra roots. With `dry_run`
+    the project is left untouched.
+    """
+    if project.root_id not in project.objects:
+        # Everything would be unreachable; that is a broken file, not garbage.
+        raise ValueError(f"root object {project.root_id} is missing")
+    marked = reachable(project, [project.root_id, *(i for i in keep if i in project.objects)])
+    report = GCReport(total=len(project.objects), dry_run=dry_run)
+    for object_id, obj in project.objects.items():
+        if object_id not in marked:
+            report.collected.append(Collected(object_id, obj.isa, obj.display_name(), _entry_size(project, object_id)))
+    if not dry_run:
+        for item in report.collected:
+            project.remove(item.id)
+    return report
@@ -0,0 +1,336 @@
+"""
+Materialised PBXGroup tree.
+
+Where a file reference lives on disk follows from the chain of groups
+above it: each `<group>`-relative path is joined onto its parent's
+directory, up to the main group and the project's projectDirPath.
+GroupTree walks the tree once to record every object's parent, then
+resolves paths on demand and memoizes them, so asking for the path of
+every reference costs one join per object in total:
+
+    groups = project.groups
+    groups.path_of(ref_id)           # "on brand/Features/Home/Views/HomeView.swift"
+    groups.group_at("on brand/Features/Home")
+    groups.ensure_group("on brand/Features/Deals/Models")   # creates what is missing
+
+The tree follows edits made through the object API: adding or removing a
+child updates the parent links and forgets the memoized paths of that
+child's subtree only, and changing a `path` or `sourceTree` does the same
+for the object edited. The directory maps (group_dirs, dir_groups,
+file_paths) are rebuilt lazily after a group moves and patched in place
+when a file or an empty group is added.
+"""
+
+import os
+import posixpath
+
+from .objects import GROUP_ISAS
+
+# Groups whose children are localized variants of one file, not folders.
+_LEAF_GROUP_ISAS = frozenset({"PBXVariantGroup"})
+
+
+def resolve(obj, parent_dir):
+    """Project-relative path of `obj` inside `parent_dir`, or None when it is not in the source tree"""
+    if parent_dir is None:
+        return None
+    tree = obj.get("sourceTree")
+    path = obj.get("path") or ""
+    if tree == "<group>":
+        joined = posixpath.join(parent_dir, path) if path else parent_dir
+    elif tree == "SOURCE_ROOT":
+        joined = path
+    else:
+        return None  # SDK, build products and absolute paths are not ours
+    joined = posixpath.normpath(joined) if joined else ""
+    return "" if joined == "." else joined
+
+
+class GroupTree:
+    """Parent links and memoized paths for every object under the main group"""
+
+    def __init__(self, project):
+        self.project = project
+        self.parents = {}   # child ID -> group ID
+        self._paths = {}    # object ID -> project-relative path (None: outside the source tree)
+        self._group_dirs = None
+        self._dir_groups = None
+        self._file_paths = None
+        main_group = project.main_group()
+        self.root_id = main_group.id if main_group is not None else None
+        project_dir = project.root.get("projectDirPath") if project.root is not None else ""
+        self.root_dir = posixpath.normpath(project_dir) if project_dir else ""
+        self._walk()
+
+    # -- building -------------------------------------------------------
+
+    def _walk(self):
+        """Record parent links and the directory maps in one depth-first pass"""
+        objects = self.project.objects
+        self._group_dirs = group_dirs = {}
+        self._dir_groups = dir_groups = {}
+        self._file_paths = file_paths = {}
+        if self.root_id is None:
+            return
+        parents = self.parents
+        paths = self._paths
+        stack = [self.root_id]
+        seen = set()
+        while stack:
+            group_id = stack.pop()
+            if group_id in seen:
+                continue
+            seen.add(group_id)
+            group = objects[group_id]
+            group_dir = self.path_of(group_id)
+            group_dirs[group_id] = group_dir
+            if group.get("path") or group_dir not in dir_groups:
+                dir_groups[group_dir] = group_id
+            for child_id in group.get("children", ()):
+                child = objects.get(child_id)
+                if child is None:
+                    continue
+                isa = child.isa
+                if isa in GROUP_ISAS:
+                    # A group listed twice keeps the first parent seen.
+                    parent_id = parents.setdefault(child_id, group_id)
+                    if isa in _LEAF_GROUP_ISAS:
+                        for variant_id in child.get("children", ()):
+                            parents.setdefault(variant_id, child_id)
+                        continue
+                else:
+                    # A reference listed by two groups resolves under the one seen last.
+                    parent_id = parents[child_id] = group_id
+                    paths.pop(child_id, None)
+                if child_id in paths:
+                    path = paths[child_id]
+                elif parent_id == group_id:
+                    path = paths[child_id] = resolve(child, group_dir)
+                else:
+                    path = self.path_of(child_id)
+                if path is None:
+                    continue
+                if isa in GROUP_ISAS:
+                    stack.append(child_id)
+                elif isa == "PBXFileReference":
+                    file_paths[child_id] = path
+
+    def _maps(self):
+        if self._file_paths is None:
+            self._walk()
+
+    def _forget(self, object_id):
+        """Drop the memoized paths of `object_id` and everything below it"""
+        objects = self.project.objects
+        pending = [object_id]
+        seen = set()
+        while pending:
+            current = pending.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            self._paths.pop(current, None)
+            obj = objects.get(current)
+            if obj is not None and obj.isa in GROUP_ISAS:
+                pending.extend(c for c in obj.get("children", ()) if self.parents.get(c) == current)
+
+    def _drop_maps(self):
+        self._group_dirs = self._dir_groups = self._file_paths = None
+
+    # -- queries --------------------------------------------------------
+
+    def path_of(self, object_id):
+        """Project-relative path of a group or file reference (memoized), or None"""
+        paths = self._paths
+        if object_id in paths:
+            return paths[object_id]
+        chain = []
+        node = object_id
+        while node not in paths:
+            if node in chain[:-1] or len(chain) > len(self.parents) + 1:
+                # A group cycle: nothing on it has a path.
+                for item in chain:
+                    paths[item] = None
+                return None
+            chain.append(node)
+            if node == self.root_id:
+                break
+            node = self.parents.get(node)
+            if node is None:
+                break
+        parent_dir = paths.get(node) if node is not None and node != chain[-1] else None
+        objects = self.project.objects
+        for node in reversed(chain):
+            if node == self.root_id:
+                path = self.root_dir
+            else:
+                obj = objects.get(node)
+                path = resolve(obj, parent_dir) if obj is not None else None
+            paths[node] = parent_dir = path
+        return paths[object_id]
+
+    def absolute_path(self, object_id):
+        """Path on disk of a group or file reference, or None"""
+        obj = self.project.get(object_id)
+        if obj is not None and obj.get("sourceTree") == "<absolute>":
+            return obj.get("path")
+        path = self.path_of(object_id)
+        if path is None or self.project.path is None:
+            return None
+        return os.path.join(self.project.path.parent.parent, path) if path else str(self.project.path.parent.parent)
+
+    def parent(self, object_id):
+        """The group holding `object_id` in the tree, or None"""
+        parent_id = self.parents.get(object_id)
+        return self.project.get(parent_id) if parent_id is not None else None
+
+    def depth(self, object_id):
+        """Number of groups above `object_id`"""
+        depth = 0
+        seen = set()
+        node = self.parents.get(object_id)
+        while node is not None and node not in seen:
+            seen.add(node)
+            depth += 1
+            node = self.parents.get(node)
+        return depth
+
+    @property
+    def group_dirs(self):
+        """group ID -> project-relative directory"""
+        self._maps()
+        return self._group_dirs
+
+    @property
+    def dir_groups(self):
+        """directory -> group ID (a group with its own path wins over one that only names it)"""
+        self._maps()
+        return self._dir_groups
+
+    @property
+    def file_paths(self):
+        """file reference ID -> project-relative path, for references in the source tree"""
+        self._maps()
+        return self._file_paths
+
+    def group_at(self, directory):
+        """The group for project-relative `directory`, or None"""
+        group_id = self.dir_groups.get(posixpath.normpath(directory) if directory else "")
+        return self.project.get(group_id) if group_id is not None else None
+
+    # -- editing --------------------------------------------------------
+
+    def ensure_group(self, directory, created=None, tx=None):
+        """
+        The group for project-relative `directory`, creating every missing
+        group between it and the nearest existing ancestor. The directories
+        of new groups are appended to `created` when given. With a
+        transaction `tx` the missing groups are queued on it instead, and
+        the group's ID is returned: nothing changes unless it is applied.
+        """
+        project = self.project
+        directory = posixpath.normpath(directory) if directory and directory != "." else ""
+        missing = []
+        current = directory
+        dir_groups = self.dir_groups
+        while current not in dir_groups:
+            if current in ("", self.root_dir) or current == posixpath.dirname(current):
+                break
+            missing.append(current)
+            current = posixpath.dirname(current)
+        group_id = dir_groups.get(current, self.root_id)
+        if group_id is None:
+            raise ValueError("project has no main group")
+        if tx is not None:
+            for path in reversed(missing):
+                name = posixpath.basename(path)
+                queued = tx.queued_group(group_id, name)
+                if queued is None:
+                    queued = tx.add_group(name, group_id)
+                    if created is not None:
+                        created.append(path)
+                group_id = queued
+            return group_id
+        parent = project[group_id]
+        for path in reversed(missing):
+            name = posixpath.basename(path)
+            group = project.new_object(
+                "PBXGroup", project.new_id("PBXGroup", parent.id, name), children=[], path=name, sourceTree="<group>"
+            )
+            parent.add_child(group.id)
+            if created is not None:
+                created.append(path)
+            parent = group
+        return parent
+
+    # -- maintenance (called by PBXProj) --------------------------------
+
+    def children_changed(self, group, added=(), removed=()):
+        children = group.get("children", ())
+        if len(removed) > 1:
+            children = set(children)
+        for child_id in removed:
+            if self.parents.get(child_id) == group.id and child_id not in children:
+                self._forget(child_id)
+                del self.parents[child_id]
+                self._detached(child_id)
+        if group.id != self.root_id and group.id not in self.parents:
+            return  # not part of the tree
+        objects = self.project.objects
+        for child_id in added:
+            child = objects.get(child_id)
+            if child is None or self.parents.get(child_id) == group.id:
+                continue
+            self._forget(child_id)
+            self.parents[child_id] = group.id
+            self._attached(child, group)
+
+    def _detached(self, object_id):
+        if self._file_paths is None:
+            return
+        obj = self.project.get(object_id)
+        if obj is not None and obj.isa in GROUP_ISAS:
+            self._drop_maps()
+        else:
+            self._file_paths.pop(object_id, None)
+
+    def _attached(self, child, group):
+        if self._file_paths is None:
+            return
+        if group.isa in _LEAF_GROUP_ISAS:
+            return
+        if child.isa in GROUP_ISAS:
+            if child.get("children") or child.isa in _LEAF_GROUP_ISAS:
+                self._drop_maps()
+                return
+            path = self.path_of(child.id)
+            if path is not None:
+                self._group_dirs[child.id] = path
+                if child.get("path") or path not in self._dir_groups:
+                    self._dir_groups[path] = child.id
+        elif child.isa == "PBXFileReference":
+            path = self.path_of(child.id)
+            if path is not None:
+                self._file_paths[child.id] = path
+
+    def object_changed(self, obj, key=None):
+        if key not in (None, "path", "sourceTree"):
+            return
+        if obj.id != self.root_id and obj.id not in self.parents:
+            return
+        self._forget(obj.id)
+        if obj.isa in GROUP_ISAS:
+            self._drop_maps()
+        elif self._file_paths is not None:
+            self._file_paths.pop(obj.id, None)
+            if obj.isa == "PBXFileReference":
+                path = self.path_of(obj.id)
+                if path is not None:
+                    self._file_paths[obj.id] = path
+
+    def object_removed(self, obj):
+        if obj.id not in self.parents:
+            return
+        self._forget(obj.id)
+        del self.parents[obj.id]
+        self._detached(obj.id)
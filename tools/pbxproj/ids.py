@@ -0,0 +1,147 @@
+"""
+Object ID allocation.
+
+Xcode object IDs are 24 upper-case hex digits. IDAllocator hands out IDs
+that are unused in the project and not already handed out, checking both
+with set/dict membership, so allocating thousands of IDs never rescans the
+objects table.
+
+In deterministic mode an ID is derived from a key describing the object,
+e.g. ("PBXBuildFile", "on brand", "Features/Home/HomeView.swift"), so
+running the same script against the same project yields the same IDs and
+re-runs produce reviewable, stable diffs:
+
+    project.ids = IDAllocator(project, deterministic=True)
+    file_ref_id = project.new_id("PBXFileReference", group.id, "HomeView.swift")
+
+repair_ids() fixes the reverse problem: references to IDs that do not
+exist, as left behind by scripts that pasted IDs into the file by hand.
+"""
+
+import hashlib
+import os
+
+from .objects import BUILD_PHASE_ISAS, GROUP_ISAS, TARGET_ISAS
+
+ID_LENGTH = 24
+
+
+class IDAllocator:
+    """Collision-free ID source for one project"""
+
+    def __init__(self, project, deterministic=False, namespace=""):
+        self.project = project
+        self.deterministic = deterministic
+        self.namespace = namespace
+        self.reserved = set()
+
+    def is_free(self, object_id):
+        return object_id not in self.project.objects and object_id not in self.reserved
+
+    def reserve(self, object_id):
+        """Mark an ID chosen elsewhere as taken; False when it already was"""
+        if not self.is_free(object_id):
+            return False
+        self.reserved.add(object_id)
+        return True
+
+    def _candidates(self, key):
+        if self.deterministic and key:
+            seed = "\0".join([self.namespace, *map(str, key)])
+            attempt = 0
+            while True:
+                digest = hashlib.sha1(f"{seed}\0{attempt}".encode("utf-8")).hexdigest()
+                yield digest[:ID_LENGTH].upper()
+                attempt += 1
+        while True:
+            yield os.urandom(ID_LENGTH // 2).hex().upper()
+
+    def allocate(self, *key):
+        """
+        Return a new ID and reserve it. `key` identifies the object in
+        deterministic mode and is ignored otherwise; if the derived ID is
+        taken the next one in the key's sequence is used.
+        """
+        for object_id in self._candidates(key):
+            if self.reserve(object_id):
+                return object_id
+
+    def allocate_many(self, keys):
+        """
+        Allocate one ID per entry of `keys` (an iterable of key tuples, or
+        an int for that many keyless IDs), in order.
+        """
+        if isinstance(keys, int):
+            keys = [()] * keys
+        return [self.allocate(*key) for key in keys]
+
+
+def _comment_name(comment):
+    """File name from a "Name in Sources" style comment, or None"""
+    if not comment:
+        return None
+    name, sep, _ = comment.rpartition(" in ")
+    return name if sep else comment
+
+
+def repair_ids(project):
+    """
+    Fix references left pointing at the wrong ID by hand edits, the way
+    the old fix_firebase_uuids/fix_firebase_build scripts did for one
+    phase with regexes:
+
+    - a build phase entry naming a missing ID is re-pointed at the build
+      file for the file its comment names (an orphan one if there is one,
+      else a new one), or dropped when no such file exists
+    - group children and target build phases naming missing IDs are dropped
+    - build files with neither fileRef nor productRef are removed
+
+    Returns a list of (action, object ID, detail) tuples.
+    """
+    objects = project.objects
+    index = project.index
+    comments = project.source_comments
+    fixes = []
+
+    orphans = {}
+    for build_file in list(project.objects_of("PBXBuildFile")):
+        if not build_file.get("fileRef") and not build_file.get("productRef"):
+            project.remove_build_file(build_file.id)
+            fixes.append(("removed_empty_build_file", build_file.id, None))
+            continue
+        if not index.phases(build_file.id):
+            ref = objects.get(build_file.file_ref)
+            if ref is not None:
+                orphans.setdefault(ref.display_name(), []).append(build_file.id)
+
+    for phase in [obj for obj in objects.values() if obj.isa in BUILD_PHASE_ISAS]:
+        for entry in [e for e in phase.files if e not in objects]:
+            position = phase.files.index(entry)
+            name = _comment_name(comments.get(entry))
+            replacement = None
+            if name and orphans.get(name):
+                replacement = orphans[name].pop(0)
+            elif name:
+                refs = index.file_references(basename=name)
+                if len(refs) == 1:
+                    replacement = project.new_id("PBXBuildFile", phase.id, refs[0].id)
+                    project.new_object("PBXBuildFile", replacement, fileRef=refs[0].id)
+            phase.remove_file(entry)
+            if replacement is None:
+                fixes.append(("dropped_phase_entry", entry, phase.display_name()))
+                continue
+            phase.add_file(replacement, position)
+            fixes.append(("relinked_phase_entry", entry, replacement))
+
+    for obj in list(objects.values()):
+        if obj.isa in GROUP_ISAS:
+            key = "children"
+        elif obj.isa in TARGET_ISAS:
+            key = "buildPhases"
+        else:
+            continue
+        for entry in [e for e in obj.get(key, ()) if e not in objects]:
+            while obj.remove_reference(key, entry):
+                pass
+            fixes.append((f"dropped_{key}_entry", entry, obj.id))
+    return fixes
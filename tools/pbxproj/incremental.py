@@ -0,0 +1,319 @@
+"""
+Incremental serializer: re-emit only the object entries that changed.
+
+A project loaded from text keeps that text together with a SourceMap of
+where every `ID = {...};` entry and every `/* Begin/End X section */`
+marker lives. Saving then splices the re-rendered entries of dirty objects
+into the original buffer, deletes the entries of removed objects, and
+inserts new objects into their section at the position Xcode's ID order
+would put them. Everything else is copied verbatim, so formatting the
+output and the resulting diff scale with the edit rather than the project.
+
+Offsets are not rewritten after each save. Instead every save appends a
+_Layer describing the edits it made, and a span recorded against an older
+generation of the text is mapped forward through the layers when it is
+next needed. The map is flattened once the layer stack gets deep.
+"""
+
+from bisect import bisect_right
+
+from .writer import Writer, quote
+
+# Flatten every span into current coordinates after this many saves.
+_MAX_LAYERS = 16
+
+
+class _Span:
+    """A range of source text recorded against generation `gen`"""
+
+    __slots__ = ("gen", "start", "length", "whole_lines")
+
+    def __init__(self, gen, start, length, whole_lines=True):
+        self.gen = gen
+        self.start = start
+        self.length = length
+        self.whole_lines = whole_lines
+
+
+class _Layer:
+    """The edits one save made, used to map older offsets forward"""
+
+    def __init__(self, edits):
+        self.ends = []
+        self.shifts = []
+        shift = 0
+        for start, end, text in edits:
+            shift += len(text) - (end - start)
+            self.ends.append(end)
+            self.shifts.append(shift)
+
+    def map(self, pos):
+        # Only edits that finish at or before `pos` move it; spans of
+        # untouched entries never straddle an edit.
+        i = bisect_right(self.ends, pos)
+        return pos + self.shifts[i - 1] if i else pos
+
+
+class _Section:
+    def __init__(self, isa, begin, end):
+        self.isa = isa
+        self.begin = begin
+        self.end = end
+        self.ids = []  # entry IDs inside the section, in file order
+
+
+def _line_span(text, start, end, gen=0):
+    """Widen [start, end) to whole lines when nothing else shares them"""
+    s = start
+    while s > 0 and text[s - 1] in " \t":
+        s -= 1
+    e = end
+    while e < len(text) and text[e] in " \t":
+        e += 1
+    if (s == 0 or text[s - 1] == "\n") and (e == len(text) or text[e] == "\n"):
+        if e < len(text):
+            e += 1
+        return _Span(gen, s, e - s, True)
+    return _Span(gen, start, end - start, False)
+
+
+def _refresh_comments(entry, object_ids, writer):
+    """
+    `entry` with the comment after each of `object_ids` regenerated, or
+    None when one of them has no comment to replace
+    """
+    for object_id in object_ids:
+        key = quote(object_id)
+        marker = key + " /* "
+        replacement = writer.reference(object_id, None)
+        pieces = []
+        cursor = 0
+        pos = entry.find(marker)
+        while pos >= 0:
+            close = entry.find(" */", pos + len(marker))
+            newline = entry.find("\n", pos)
+            if close < 0 or (0 <= newline < close):
+                return None
+            if pos == 0 or not (entry[pos - 1].isalnum() or entry[pos - 1] in '_"'):
+                pieces.append(entry[cursor:pos])
+                pieces.append(replacement)
+                cursor = close + 3
+            pos = entry.find(marker, close + 3)
+        if not pieces:
+            return None
+        pieces.append(entry[cursor:])
+        entry = "".join(pieces)
+    return entry
+
+
+class SourceMap:
+    """Original project text plus the location of every object entry"""
+
+    def __init__(self, text, entry_spans, section_markers):
+        self.text = text
+        self.layers = []
+        self.entries = {
+            object_id: [_line_span(text, start, end) for start, end in spans]
+            for object_id, spans in entry_spans.items()
+        }
+        self.sections = {}
+        begins = {}
+        for kind, isa, start, end in section_markers:
+            span = _line_span(text, start, end)
+            if kind == "Begin":
+                begins[isa] = span
+            elif isa in begins and isa not in self.sections:
+                self.sections[isa] = _Section(isa, begins.pop(isa), span)
+        # Assign entries to the section whose markers enclose them.
+        ordered = sorted(self.sections.values(), key=lambda s: s.begin.start)
+        starts = [s.begin.start for s in ordered]
+        for object_id, spans in sorted(self.entries.items(), key=lambda item: item[1][-1].start):
+            span = spans[-1]
+            i = bisect_right(starts, span.start) - 1
+            if i >= 0 and span.start < ordered[i].end.start:
+                ordered[i].ids.append(object_id)
+
+    @property
+    def generation(self):
+        return len(self.layers)
+
+    def position(self, span):
+        """Start of `span` in the current text"""
+        pos = span.start
+        for layer in self.layers[span.gen:]:
+            pos = layer.map(pos)
+        return pos
+
+    def end(self, span):
+        return self.position(span) + span.length
+
+    # -- rendering ------------------------------------------------------
+
+    def render(self, project, dirty, removed, comments=None):
+        """
+        Splice the changes into the source text.
+
+        `dirty` holds the IDs whose entries must be re-rendered (new objects
+        included) and `removed` the IDs dropped from the table. `comments`
+        maps other entries to the IDs whose `/* ... */` comments in them
+        must be refreshed; only those comments are rewritten. Returns
+        (text, plan), or (None, None) when the layout cannot be patched and
+        the caller should write the whole file instead. Pass the plan to
+        commit() once the text has been written.
+        """
+        writer = Writer(project)
+        objects = project.objects
+        edits = []  # (start, end, [(key, text)]) in current coordinates
+        added = {}  # isa -> new objects
+
+        def line(obj):
+            return f"\t\t{writer.object_entry(obj)}\n"
+
+        def rerender(obj, spans):
+            # Duplicated entries collapse into the last one, which is the
+            # one the parser kept.
+            for span in spans[:-1]:
+                edits.append((self.position(span), self.end(span), []))
+            span = spans[-1]
+            text = line(obj) if span.whole_lines else writer.object_entry(obj)
+            edits.append((self.position(span), self.end(span), [(obj.id, text)]))
+
+        for object_id in dirty:
+            obj = objects.get(object_id)
+            if obj is None:
+                continue
+            spans = self.entries.get(object_id)
+            if spans is None:
+                added.setdefault(obj.isa, []).append(obj)
+                continue
+            rerender(obj, spans)
+
+        for object_id, referenced in (comments or {}).items():
+            obj = objects.get(object_id)
+            spans = self.entries.get(object_id)
+            if obj is None or spans is None or object_id in dirty:
+                continue
+            text = None
+            if len(spans) == 1:
+                start, end = self.position(spans[0]), self.end(spans[0])
+                text = _refresh_comments(self.text[start:end], referenced, writer)
+            if text is None:
+                rerender(obj, spans)
+            else:
+                edits.append((start, end, [(object_id, text)]))
+
+        gone = {i for i in removed if i in self.entries and i not in objects}
+        dropped = {
+            section.isa
+            for section in self.sections.values()
+            if section.ids and section.isa not in added and all(i in gone for i in section.ids)
+        }
+        dropped_ranges = []
+        for isa in dropped:
+            section = self.sections[isa]
+            start = self.position(section.begin)
+            if self.text[start - 2:start] == "\n\n":
+                start -= 1
+            dropped_ranges.append((start, self.end(section.end)))
+            edits.append((start, self.end(section.end), []))
+        for object_id in gone:
+            for span in self.entries[object_id]:
+                start = self.position(span)
+                if not any(a <= start < b for a, b in dropped_ranges):
+                    edits.append((start, start + span.length, []))
+
+        orders = {}
+        for isa, new_objects in added.items():
+            new_objects.sort(key=lambda o: o.id)
+            section = self.sections.get(isa)
+            if section is not None:
+                orders[isa] = self._insert(section, new_objects, line, edits)
+                continue
+            kept = [s for s in self.sections.values() if s.isa not in dropped]
+            if not kept:
+                return None, None
+            pieces = [(("begin", isa), f"/* Begin {isa} section */\n")]
+            pieces += [(obj.id, line(obj)) for obj in new_objects]
+            pieces.append((("end", isa), f"/* End {isa} section */\n"))
+            later = [s for s in kept if s.isa > isa]
+            if later:
+                pos = self.position(min(later, key=lambda s: s.isa).begin)
+                pieces.append((None, "\n"))
+            else:
+                pos = max(self.end(s.end) for s in kept)
+                pieces.insert(0, (None, "\n"))
+            edits.append((pos, pos, pieces))
+
+        edits.sort(key=lambda e: (e[0], e[1]))
+        out = []
+        placed = {}
+        new_sections = {}
+        cursor = length = 0
+        for start, end, pieces in edits:
+            chunk = self.text[cursor:start]
+            out.append(chunk)
+            length += len(chunk)
+            for key, text in pieces:
+                if isinstance(key, tuple):
+                    new_sections.setdefault(key[1], {})[key[0]] = (length, len(text))
+                elif key is not None:
+                    placed[key] = (length, len(text))
+                out.append(text)
+                length += len(text)
+            cursor = end
+        out.append(self.text[cursor:])
+        text = "".join(out)
+        layer = _Layer([(s, e, "".join(t for _, t in pieces)) for s, e, pieces in edits])
+        return text, (text, layer, placed, gone, dropped, orders, new_sections, added)
+
+    def _insert(self, section, new_objects, line, edits):
+        """
+        Queue zero-length edits that put `new_objects` before the first
+        existing entry with a larger ID, which is where Xcode's ordering
+        places them. Returns the section's entry order afterwards.
+        """
+        order = []
+        existing = section.ids
+        j = 0
+        for obj in new_objects:
+            while j < len(existing) and existing[j] < obj.id:
+                order.append(existing[j])
+                j += 1
+            anchor = self.entries[existing[j]][-1] if j < len(existing) else section.end
+            pos = self.position(anchor)
+            edits.append((pos, pos, [(obj.id, line(obj))]))
+            order.append(obj.id)
+        order.extend(existing[j:])
+        return order
+
+    def commit(self, plan):
+        """Adopt the text produced by render() as the new source"""
+        text, layer, placed, gone, dropped, orders, new_sections, added = plan
+        self.layers.append(layer)
+        gen = self.generation
+        if gone:
+            for section in self.sections.values():
+                if section.isa not in orders:
+                    section.ids = [i for i in section.ids if i not in gone]
+            for object_id in gone:
+                del self.entries[object_id]
+        for isa in dropped:
+            del self.sections[isa]
+        for object_id, (start, length) in placed.items():
+            self.entries[object_id] = [_Span(gen, start, length, text.endswith("\n", 0, start + length))]
+        for isa, order in orders.items():
+            self.sections[isa].ids = [i for i in order if i not in gone]
+        for isa, markers in new_sections.items():
+            section = self.sections[isa] = _Section(isa, _Span(gen, *markers["begin"]), _Span(gen, *markers["end"]))
+            section.ids = [obj.id for obj in added[isa]]
+        self.text = text
+        if len(self.layers) > _MAX_LAYERS:
+            self._flatten()
+
+    def _flatten(self):
+        spans = [span for entry in self.entries.values() for span in entry]
+        spans += [span for s in self.sections.values() for span in (s.begin, s.end)]
+        starts = [self.position(span) for span in spans]
+        for span, start in zip(spans, starts):
+            span.start, span.gen = start, 0
+        self.layers = []
@@ -0,0 +1,232 @@
+"""
+Hash indexes over the objects table.
+
+The index is built in one pass the first time `project.index` is used and
+is then kept up to date by the mutation hooks on PBXProj and PBXObject, so
+lookups stay O(1) while a script edits the project.
+"""
+
+import posixpath
+
+from .ids import ID_LENGTH
+from .objects import BUILD_PHASE_ISAS, GROUP_ISAS, NON_REFERENCE_KEYS
+
+
+def _add(table, key, value):
+    bucket = table.get(key)
+    if bucket is None:
+        table[key] = [value]
+    elif value not in bucket:
+        bucket.append(value)
+
+
+def _discard(table, key, value):
+    bucket = table.get(key)
+    if bucket is None:
+        return
+    try:
+        bucket.remove(value)
+    except ValueError:
+        return
+    if not bucket:
+        del table[key]
+
+
+def _is_id(value, objects):
+    # Objects may point at one added after them, so well-formed IDs count
+    # before they exist.
+    return value in objects or (len(value) == ID_LENGTH and value.isalnum() and value.isupper())
+
+
+def _referenced(fields, objects, skip=None, found=None):
+    """IDs in `fields` (but not under `skip`), as objects.PBXObject.references() finds them"""
+    found = [] if found is None else found
+    for key, value in fields.items():
+        if key in NON_REFERENCE_KEYS or key == "isa" or key == skip:
+            continue
+        if isinstance(value, str):
+            if _is_id(value, objects):
+                found.append(value)
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, str):
+                    if _is_id(item, objects):
+                        found.append(item)
+                elif isinstance(item, dict):
+                    _referenced(item, objects, found=found)
+        elif isinstance(value, dict):
+            _referenced(value, objects, found=found)
+    return found
+
+
+class ProjectIndex:
+    """
+    Reverse lookups used by the fixers.
+
+    - `by_path`: PBXFileReference `path` value -> [file ref IDs]
+    - `by_basename`: last path component (or `name`) -> [file ref IDs]
+    - `build_files_by_ref`: fileRef/productRef -> [PBXBuildFile IDs]
+    - `phases_by_build_file`: PBXBuildFile ID -> [build phase IDs]
+    - `parents`: child ID -> [PBXGroup IDs]
+    - `referrers`: object ID -> [IDs of the other objects that point at
+      it, beyond the build files, phases and groups above]
+
+    All buckets keep insertion order, i.e. the order the objects appear in
+    the project file.
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self.by_path = {}
+        self.by_basename = {}
+        self.build_files_by_ref = {}
+        self.phases_by_build_file = {}
+        self.parents = {}
+        self.referrers = {}
+        for obj in project.objects.values():
+            self.add_object(obj)
+
+    _TABLES = ("by_path", "by_basename", "build_files_by_ref", "phases_by_build_file", "parents", "referrers")
+
+    def tables(self):
+        """The lookup tables as plain dicts, for the parse cache"""
+        return tuple(getattr(self, name) for name in self._TABLES)
+
+    @classmethod
+    def from_tables(cls, project, tables):
+        """An index over `project` restored from tables() output"""
+        index = cls.__new__(cls)
+        index.project = project
+        for name, table in zip(cls._TABLES, tables):
+            setattr(index, name, table)
+        return index
+
+    # -- lookups --------------------------------------------------------
+
+    def file_references(self, path=None, basename=None):
+        """File reference objects with the given `path` value or basename"""
+        if path is not None:
+            ids = self.by_path.get(path, ())
+        else:
+            ids = self.by_basename.get(basename, ())
+        objects = self.project.objects
+        return [objects[i] for i in ids if i in objects]
+
+    def build_files(self, file_ref_id):
+        objects = self.project.objects
+        return [objects[i] for i in self.build_files_by_ref.get(file_ref_id, ()) if i in objects]
+
+    def phases(self, build_file_id):
+        objects = self.project.objects
+        return [objects[i] for i in self.phases_by_build_file.get(build_file_id, ()) if i in objects]
+
+    def phase(self, build_file_id):
+        """The build phase that owns `build_file_id`, or None"""
+        phases = self.phases(build_file_id)
+        return phases[0] if phases else None
+
+    def referring(self, object_id):
+        """Objects that point at `object_id`"""
+        objects = self.project.objects
+        tables = (self.build_files_by_ref, self.phases_by_build_file, self.parents, self.referrers)
+        return [objects[i] for table in tables for i in table.get(object_id, ()) if i in objects]
+
+    def parent(self, object_id):
+        """The group that lists `object_id` as a child, or None"""
+        objects = self.project.objects
+        for group_id in self.parents.get(object_id, ()):
+            if group_id in objects:
+                return objects[group_id]
+        return None
+
+    # -- maintenance ----------------------------------------------------
+
+    @staticmethod
+    def _names(obj):
+        path = obj.get("path")
+        names = set()
+        if path:
+            names.add(posixpath.basename(path))
+        if obj.get("name"):
+            names.add(obj.get("name"))
+        return path, names
+
+    def _references(self, obj):
+        """What obj adds to `referrers`: the references no other table holds"""
+        isa = obj.isa
+        # A file reference points at nothing and a build file only at what
+        # build_files_by_ref records.
+        if isa == "PBXFileReference" or isa == "PBXBuildFile":
+            return ()
+        if isa in BUILD_PHASE_ISAS:
+            skip = "files"
+        elif isa in GROUP_ISAS:
+            skip = "children"
+        else:
+            skip = None
+        return _referenced(obj.fields, self.project.objects, skip)
+
+    def add_object(self, obj):
+        isa = obj.isa
+        if isa == "PBXFileReference":
+            path, names = self._names(obj)
+            if path is not None:
+                _add(self.by_path, path, obj.id)
+            for name in names:
+                _add(self.by_basename, name, obj.id)
+        elif isa == "PBXBuildFile":
+            target = obj.get("fileRef") or obj.get("productRef")
+            if target:
+                _add(self.build_files_by_ref, target, obj.id)
+        elif isa in BUILD_PHASE_ISAS:
+            for build_file_id in obj.get("files", ()):
+                _add(self.phases_by_build_file, build_file_id, obj.id)
+        if isa in GROUP_ISAS:
+            for child_id in obj.get("children", ()):
+                _add(self.parents, child_id, obj.id)
+        for object_id in self._references(obj):
+            _add(self.referrers, object_id, obj.id)
+
+    def remove_object(self, obj):
+        isa = obj.isa
+        if isa == "PBXFileReference":
+            path, names = self._names(obj)
+            if path is not None:
+                _discard(self.by_path, path, obj.id)
+            for name in names:
+                _discard(self.by_basename, name, obj.id)
+        elif isa == "PBXBuildFile":
+            target = obj.get("fileRef") or obj.get("productRef")
+            if target:
+                _discard(self.build_files_by_ref, target, obj.id)
+        elif isa in BUILD_PHASE_ISAS:
+            for build_file_id in obj.get("files", ()):
+                _discard(self.phases_by_build_file, build_file_id, obj.id)
+        if isa in GROUP_ISAS:
+            for child_id in obj.get("children", ()):
+                _discard(self.parents, child_id, obj.id)
+        for object_id in self._references(obj):
+            _discard(self.referrers, object_id, obj.id)
+
+    def list_changed(self, obj, key, added=(), removed=()):
+        if key == "files" and obj.isa in BUILD_PHASE_ISAS:
+            table = self.phases_by_build_file
+        elif key == "children" and obj.isa in GROUP_ISAS:
+            table = self.parents
+        elif key not in NON_REFERENCE_KEYS and obj.isa not in ("PBXFileReference", "PBXBuildFile"):
+            table = self.referrers
+            objects = self.project.objects
+            added = [i for i in added if isinstance(i, str) and _is_id(i, objects)]
+            removed = [i for i in removed if isinstance(i, str)]
+        else:
+            return
+        remaining = obj.fields.get(key, ())
+        if len(removed) > 1:
+            remaining = set(remaining)
+        for item in removed:
+            # A list may legitimately hold the same ID twice; only drop the
+            # index entry once the last copy is gone.
+            if item not in remaining:
+                _discard(table, item, obj.id)
+        for item in added:
+            _add(table, item, obj.id)
@@ -0,0 +1,298 @@
+"""
+Structural validation of a project.
+
+lint_project() walks the objects table once, recording what each build
+file, build phase, group and target refers to, then resolves those tables
+against each other. The checks replace the one-problem-per-script regexes
+in the fixers:
+
+- dangling_reference: a fileRef, group child, phase entry or target
+  build phase that points at an ID missing from the objects table
+- empty_build_file: a PBXBuildFile with neither fileRef nor productRef
+- orphan_build_file: a PBXBuildFile no build phase lists
+- duplicate_child / duplicate_phase_entry: the same ID listed twice
+- unbuilt_file_in_phase: Info.plist, xcconfig, entitlements or docs in a
+  build phase (Info.plist in Copy Bundle Resources)
+- wrong_phase: asset catalogs in Compile Sources, sources in Resources
+- test_file_in_app_target: files from a "*Tests" folder, or named
+  "*Tests.swift", built by a non-test target
+- cross_target_leak: app sources compiled into a test target as well
+  (tests should use `@testable import`)
+- missing_from_phases: a source file under the app folder no target builds
+- missing_file / untracked_file: references to files that are not on disk
+  and files on disk the project does not reference (with `disk=True`)
+
+    report = lint_project(PBXProj.load("on brand.xcodeproj"))
+    print(report.to_json())
+"""
+
+import json
+import os
+import posixpath
+from collections import namedtuple
+
+from . import sync as _sync
+from .filetypes import default_phase_isa, file_type
+from .objects import BUILD_PHASE_ISAS, GROUP_ISAS
+
+ERROR = "error"
+WARNING = "warning"
+
+# code -> severity
+CHECKS = {
+    "dangling_reference": ERROR,
+    "empty_build_file": ERROR,
+    "orphan_build_file": WARNING,
+    "duplicate_child": WARNING,
+    "duplicate_phase_entry": ERROR,
+    "unbuilt_file_in_phase": ERROR,
+    "wrong_phase": ERROR,
+    "test_file_in_app_target": ERROR,
+    "cross_target_leak": WARNING,
+    "missing_from_phases": WARNING,
+    "missing_file": ERROR,
+    "untracked_file": WARNING,
+}
+
+# Types compiled by the Sources phase besides `sourcecode.*`.
+_COMPILED_TYPES = frozenset({
+    "wrapper.xcdatamodel",
+    "wrapper.xcmappingmodel",
+    "file.intentdefinition",
+    "file.mlmodel",
+    "folder.mlpackage",
+})
+
+_PHASES_CHECKED = frozenset({"PBXSourcesBuildPhase", "PBXResourcesBuildPhase"})
+
+# Build settings that point at files the project uses without a reference.
+_FILE_SETTINGS = ("INFOPLIST_FILE", "CODE_SIGN_ENTITLEMENTS")
+
+Issue = namedtuple("Issue", ["code", "severity", "message", "ids", "path"])
+
+
+class LintReport:
+    """Issues found in a project, in check order"""
+
+    def __init__(self, issues=()):
+        self.issues = list(issues)
+
+    def __iter__(self):
+        return iter(self.issues)
+
+    def __len__(self):
+        return len(self.issues)
+
+    def add(self, code, message, ids=(), path=None):
+        self.issues.append(Issue(code, CHECKS[code], message, tuple(ids), path))
+
+    def of_code(self, code):
+        return [i for i in self.issues if i.code == code]
+
+    @property
+    def errors(self):
+        return [i for i in self.issues if i.severity == ERROR]
+
+    def to_dict(self):
+        """JSON-ready summary"""
+        counts = {}
+        for issue in self.issues:
+            counts[issue.code] = counts.get(issue.code, 0) + 1
+        return {
+            "errors": len(self.errors),
+            "warnings": len(self.issues) - len(self.errors),
+            "counts": counts,
+            "issues": [issue._asdict() for issue in self.issues],
+        }
+
+    def to_json(self, indent=2):
+        return json.dumps(self.to_dict(), indent=indent)
+
+
+def _repeated(items):
+    """Items listed more than once, sorted"""
+    seen, repeated = set(), set()
+    for item in items:
+        if item in seen:
+            repeated.add(item)
+        seen.add(item)
+    return sorted(repeated)
+
+
+def _is_test_path(path):
+    directories, _, name = path.rpartition("/")
+    if any(c.endswith("Tests") for c in directories.split("/") if c):
+        return True
+    return posixpath.splitext(name)[0].endswith("Tests")
+
+
+def _kind(ref):
+    fields = ref.fields
+    return fields.get("lastKnownFileType") or fields.get("explicitFileType") or file_type(fields.get("path") or "")
+
+
+def lint_project(project, root=_sync.DEFAULT_ROOT, excludes=_sync.DEFAULT_EXCLUDES, keep=_sync.DEFAULT_KEEP,
+                 disk=True):
+    """
+    Validate `project` and return a LintReport. With `disk`, file
+    references are also checked against the files under `root` (relative
+    to the folder holding the .xcodeproj); this needs a project loaded
+    from disk. Files matching `keep` are per-environment and skipped by
+    the disk checks.
+    """
+    report = LintReport()
+    objects = project.objects
+
+    # -- one pass over the objects table --------------------------------
+    build_files = {}   # build file ID -> ref ID (None when empty)
+    phase_isa = {}     # phase ID -> isa
+    phase_files = {}   # phase ID -> build file IDs
+    targets = []
+    setting_files = set()
+    for obj in objects.values():
+        isa = obj.isa
+        fields = obj.fields
+        if isa == "PBXBuildFile":
+            ref_id = fields.get("fileRef") or fields.get("productRef")
+            build_files[obj.id] = ref_id
+            if ref_id is None:
+                report.add("empty_build_file", f"build file {obj.id} has no fileRef or productRef", [obj.id])
+            elif ref_id not in objects:
+                report.add("dangling_reference", f"build file {obj.id} refers to missing {ref_id}", [obj.id, ref_id])
+        elif isa in BUILD_PHASE_ISAS:
+            items = fields.get("files", ())
+            phase_isa[obj.id] = isa
+            phase_files[obj.id] = items
+            if len(items) != len(set(items)):
+                for item in _repeated(items):
+                    report.add("duplicate_phase_entry", f"{obj.display_name()} lists {item} more than once",
+                               [obj.id, item])
+        elif isa in GROUP_ISAS:
+            items = fields.get("children", ())
+            for child in items:
+                if child not in objects:
+                    report.add("dangling_reference", f"group {obj.display_name()!r} lists missing child {child}",
+                               [obj.id, child])
+            if len(items) != len(set(items)):
+                for child in _repeated(items):
+                    report.add("duplicate_child", f"group {obj.display_name()!r} lists {child} more than once",
+                               [obj.id, child])
+        elif isa == "PBXNativeTarget":
+            targets.append(obj)
+        elif isa == "XCBuildConfiguration":
+            settings = fields.get("buildSettings") or {}
+            for key in _FILE_SETTINGS:
+                value = settings.get(key)
+                if isinstance(value, str):
+                    setting_files.add(posixpath.normpath(value.replace("$(SRCROOT)/", "")))
+
+    # -- resolve phases to targets --------------------------------------
+    layout = project.groups
+    paths = layout.file_paths
+    phase_target = {}
+    for target in targets:
+        for phase_id in target.build_phases:
+            if phase_id not in objects:
+                report.add("dangling_reference", f"target {target.name!r} lists missing build phase {phase_id}",
+                           [target.id, phase_id])
+            phase_target[phase_id] = target
+
+    listed = set()
+    built_by = {}  # ref ID -> {target ID}
+    kinds = {}
+    for phase_id, items in phase_files.items():
+        isa = phase_isa[phase_id]
+        target = phase_target.get(phase_id)
+        is_test_target = target is not None and "test" in (target.get("productType") or "")
+        phase_name = objects[phase_id].display_name()
+        for build_file_id in items:
+            listed.add(build_file_id)
+            if build_file_id not in build_files:
+                if build_file_id not in objects:
+                    report.add("dangling_reference", f"{phase_name} lists missing build file {build_file_id}",
+                               [phase_id, build_file_id])
+                continue
+            ref_id = build_files[build_file_id]
+            ref = objects.get(ref_id) if ref_id is not None else None
+            if ref is None or ref.isa != "PBXFileReference":
+                continue
+            if target is not None:
+                built_by.setdefault(ref_id, set()).add(target.id)
+            path = paths.get(ref_id) or ref.get("path") or ""
+            name = ref.get("name") or posixpath.basename(path)
+            if isa in _PHASES_CHECKED:
+                kind = kinds.get(ref_id)
+                if kind is None:
+                    kind = kinds[ref_id] = _kind(ref) or ""
+                if kind:
+                    expected = default_phase_isa(name, kind)
+                    if kind in _COMPILED_TYPES:
+                        expected = "PBXSourcesBuildPhase"
+                    if expected is None and kind != "sourcecode.c.h":
+                        report.add("unbuilt_file_in_phase", f"{name} should not be in {phase_name}",
+                                   [phase_id, build_file_id, ref_id], path)
+                    elif expected is not None and expected != isa:
+                        report.add("wrong_phase", f"{name} is in {phase_name}, expected "
+                                   f"{expected[3:-len('BuildPhase')]}", [phase_id, build_file_id, ref_id], path)
+            if target is not None and not is_test_target and _is_test_path(path or name):
+                report.add("test_file_in_app_target", f"{name} is built by {target.name!r}",
+                           [target.id, build_file_id, ref_id], path)
+
+    for build_file_id in build_files:
+        if build_file_id not in listed:
+            report.add("orphan_build_file", f"build file {build_file_id} is not in any build phase", [build_file_id])
+
+    test_targets = {t.id for t in targets if "test" in (t.get("productType") or "")}
+    for ref_id, target_ids in built_by.items():
+        if target_ids & test_targets and target_ids - test_targets:
+            path = paths.get(ref_id)
+            if path is not None and _is_test_path(path):
+                continue
+            if default_phase_isa(path or "", kinds.get(ref_id)) != "PBXSourcesBuildPhase":
+                continue  # shared resources are fine
+            names = sorted(objects[t].name for t in target_ids)
+            report.add("cross_target_leak", f"{posixpath.basename(path or ref_id)} is compiled by {', '.join(names)}",
+                       [ref_id, *sorted(target_ids)], path)
+
+    root = posixpath.normpath(root)
+    for ref_id, path in paths.items():
+        if ref_id in built_by or not _sync._under(path, root) or _is_test_path(path):
+            continue
+        if _sync._excluded(posixpath.basename(path), excludes):
+            continue
+        if default_phase_isa(path, _kind(objects[ref_id])) == "PBXSourcesBuildPhase":
+            report.add("missing_from_phases", f"{posixpath.basename(path)} is not built by any target", [ref_id], path)
+
+    if disk and project.path is not None:
+        _check_disk(report, project, layout, root, excludes, keep, setting_files)
+    return report
+
+
+def _check_disk(report, project, layout, root, excludes, keep, setting_files):
+    base_dir = project.path.parent.parent
+    files, dirs, _ = _sync.scan_tree(base_dir, root, excludes)
+    referenced = set(setting_files)
+    for ref_id, path in layout.file_paths.items():
+        referenced.add(path)
+        if _sync._excluded(posixpath.basename(path), keep):
+            continue
+        if _sync._under(path, root):
+            exists = path in files or path in dirs
+        else:
+            exists = os.path.exists(os.path.join(base_dir, path))
+        if not exists:
+            report.add("missing_file", f"{path} does not exist", [ref_id], path)
+    # Files inside referenced folders (folder references, packages) count as referenced.
+    folders = {p for p in referenced if p in dirs}
+    for path in sorted(files - referenced):
+        if _sync._excluded(posixpath.basename(path), keep):
+            continue
+        parent = posixpath.dirname(path)
+        covered = False
+        while parent and parent != root:
+            if parent in folders:
+                covered = True
+                break
+            parent = posixpath.dirname(parent)
+        if not covered:
+            report.add("untracked_file", f"{path} is not in the project", [], path)
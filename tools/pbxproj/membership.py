@@ -0,0 +1,184 @@
+"""
+Target x file membership matrix.
+
+Which targets build which files is spread over PBXNativeTarget ->
+build phase -> PBXBuildFile -> file reference links, so answering "who
+compiles X?" by walking them costs a scan of every phase. Membership
+flattens that once into bitsets: every file reference gets a column, and
+every (target, phase kind) pair a row held as one Python int with a bit
+per column. Each column also keeps the mask of targets building it, so
+
+    membership = project.membership
+    membership.targets_of("FirebaseAuthService.swift", "PBXSourcesBuildPhase")
+    membership.files_in("on brand", under="on brandTests")
+
+are a couple of dict lookups and big-int ANDs rather than a walk. Sets of
+files are themselves bitsets over the columns (`select`, `under`), so
+bulk questions such as "what does the app build from the test folders"
+combine with `&` and `|` before any ID is looked at.
+
+The matrix is a snapshot: the project drops it whenever targets, phases,
+build files or the group tree change, and `project.membership` builds a
+new one on next use. Bulk moves go through Transaction.move_files(),
+which plans with the matrix and applies the result as one operation.
+"""
+
+from .objects import BUILD_PHASE_ISAS, GROUP_ISAS, TARGET_ISAS
+
+# Objects whose edits can change the matrix.
+AFFECTED_ISAS = BUILD_PHASE_ISAS | GROUP_ISAS | TARGET_ISAS | {"PBXBuildFile", "PBXFileReference", "PBXProject"}
+
+
+def _bitset(columns):
+    """An int with the given bit positions set"""
+    if not columns:
+        return 0
+    bits = bytearray((max(columns) >> 3) + 1)
+    for column in columns:
+        bits[column >> 3] |= 1 << (column & 7)
+    return int.from_bytes(bits, "little")
+
+
+def iter_bits(bits):
+    """Positions of the set bits of `bits`, ascending"""
+    text = bin(bits)[:1:-1]
+    position = text.find("1")
+    while position >= 0:
+        yield position
+        position = text.find("1", position + 1)
+
+
+class Membership:
+    """Bitset rows per target and phase kind over one column per file reference"""
+
+    def __init__(self, project):
+        self.project = project
+        objects = project.objects
+        self.targets = [t for t in project.targets() if t.isa in TARGET_ISAS]
+        self._target_rows = {t.id: n for n, t in enumerate(self.targets)}
+        self.refs = []      # column -> file reference (or package product) ID
+        self.columns = {}   # file reference ID -> column
+        for obj in objects.values():
+            if obj.isa == "PBXFileReference":
+                self._column(obj.id)
+        self.paths = project.groups.file_paths
+        self._under = {}
+
+        members = {}  # (target ID, phase isa) -> [column]
+        masks = {}    # phase isa -> {column: target mask}
+        for row, target in enumerate(self.targets):
+            for phase_id in target.build_phases:
+                phase = objects.get(phase_id)
+                if phase is None or phase.isa not in BUILD_PHASE_ISAS:
+                    continue
+                columns = members.setdefault((target.id, phase.isa), [])
+                by_column = masks.setdefault(phase.isa, {})
+                for build_file_id in phase.files:
+                    build_file = objects.get(build_file_id)
+                    if build_file is None:
+                        continue
+                    ref_id = build_file.get("fileRef") or build_file.get("productRef")
+                    if ref_id is None:
+                        continue
+                    column = self._column(ref_id)
+                    columns.append(column)
+                    by_column[column] = by_column.get(column, 0) | 1 << row
+        self.rows = {key: _bitset(columns) for key, columns in members.items()}
+        self.masks = masks
+
+    def _column(self, ref_id):
+        column = self.columns.get(ref_id)
+        if column is None:
+            column = self.columns[ref_id] = len(self.refs)
+            self.refs.append(ref_id)
+        return column
+
+    # -- resolution -----------------------------------------------------
+
+    def _target_id(self, target):
+        if hasattr(target, "id"):
+            return target.id
+        if target in self._target_rows:
+            return target
+        found = self.project.target_named(target)
+        if found is None:
+            raise KeyError(f"target {target!r} not found")
+        return found.id
+
+    def target_bit(self, target):
+        """The bit standing for `target` in target masks"""
+        return 1 << self._target_rows[self._target_id(target)]
+
+    def column_of(self, file_ref):
+        """Column of a file reference given as an object, ID, project path or unique name"""
+        if hasattr(file_ref, "id"):
+            file_ref = file_ref.id
+        column = self.columns.get(file_ref)
+        if column is not None:
+            return column
+        index = self.project.index
+        matches = index.file_references(path=file_ref) or index.file_references(basename=file_ref)
+        if len(matches) != 1:
+            raise KeyError(f"{file_ref!r} matches {len(matches)} file references")
+        return self.columns[matches[0].id]
+
+    # -- queries --------------------------------------------------------
+
+    def row(self, target, isa=None):
+        """Bitset of the files `target` builds (in phases of kind `isa`)"""
+        target_id = self._target_id(target)
+        if isa is not None:
+            return self.rows.get((target_id, isa), 0)
+        bits = 0
+        for (row_target, _), row in self.rows.items():
+            if row_target == target_id:
+                bits |= row
+        return bits
+
+    def target_mask(self, file_ref, isa=None):
+        """Bitmask over self.targets of the targets building `file_ref`"""
+        column = self.column_of(file_ref)
+        if isa is not None:
+            return self.masks.get(isa, {}).get(column, 0)
+        mask = 0
+        for by_column in self.masks.values():
+            mask |= by_column.get(column, 0)
+        return mask
+
+    def targets_of(self, file_ref, isa=None):
+        """Targets that build `file_ref`, e.g. with isa="PBXSourcesBuildPhase" the ones compiling it"""
+        return [self.targets[row] for row in iter_bits(self.target_mask(file_ref, isa))]
+
+    def builds(self, target, file_ref, isa=None):
+        return bool(self.target_mask(file_ref, isa) & self.target_bit(target))
+
+    def select(self, file_refs):
+        """Bitset of the given file references"""
+        return _bitset([self.column_of(ref) for ref in file_refs])
+
+    def where(self, predicate):
+        """Bitset of the files whose project-relative path satisfies `predicate`"""
+        paths = self.paths
+        return _bitset([column for column, ref_id in enumerate(self.refs)
+                        if ref_id in paths and predicate(paths[ref_id])])
+
+    def under(self, directory):
+        """Bitset of the files inside the project-relative `directory` (cached)"""
+        directory = directory.strip("/")
+        bits = self._under.get(directory)
+        if bits is None:
+            prefix = directory + "/"
+            bits = self._under[directory] = self.where(lambda path: path.startswith(prefix))
+        return bits
+
+    def ids(self, bits):
+        """File reference IDs of the columns set in `bits`"""
+        refs = self.refs
+        return [refs[column] for column in iter_bits(bits)]
+
+    def files_in(self, target, isa=None, under=None):
+        """IDs of the files `target` builds, optionally only those under a directory"""
+        bits = self.row(target, isa)
+        if under is not None:
+            bits &= self.under(under)
+        return self.ids(bits)
@@ -0,0 +1,587 @@
+"""
+Structural three-way merge of project.pbxproj.
+
+A textual merge of two branches that both added files produces
+interleaved entries, doubled children and, after a careless resolution,
+the duplicate references fix_duplicates.py exists to clean up. Here the
+three versions are parsed and merged object by object instead:
+
+- objects are matched by ID; an object changed on one side only takes
+  that side's version, one deleted on one side and untouched on the
+  other is deleted
+- fields are merged one by one, nested dictionaries (buildSettings,
+  attributes) key by key
+- lists of object IDs (children, files, buildPhases, targets, ...) are
+  merged by membership: additions from both sides are kept, in the
+  position they had on their side, removals from either side win, and
+  an ID is never listed twice
+- groups both sides added for the same folder are folded into ours, and
+  references both sides added for the same file (and the build files
+  that came with them) are pruned afterwards, keeping ours
+
+Only a field changed differently on both sides, or an object deleted on
+one side and edited on the other, is a conflict. Conflicting entries and
+top-level keys are written with ours' value inside git conflict markers
+next to theirs, so the rest of the file is still merged. The result is
+rendered from ours with the incremental writer, so only entries the merge
+touched change.
+
+Most merges are clean and touch a few entries, so the files are first
+split into raw entries along the lines Xcode writes them, and only the
+entries theirs changed are decoded and merged. A merge that conflicts or
+leaves duplicates to prune or groups to fold goes through the full merge
+of ours instead, which still reads only those entries of base and theirs;
+a file laid out some other way is parsed whole.
+
+    result = merge_texts(base_text, ours_text, theirs_text)
+    if result.conflicts:
+        ...
+
+tools/merge_xcode_project.py wraps merge_files() as a git merge driver.
+"""
+
+import re
+import subprocess
+from collections import namedtuple
+
+from . import objects as _objects
+from .duplicates import BUILD_FILE, FILE_REFERENCE, DuplicateReport, Removal, find_duplicates, prune_duplicates
+from .incremental import SourceMap
+from .parser import parse
+from .project import PBXProj
+from .writer import Writer, quote
+
+# Keys Xcode bumps on upgrade; the newer value wins instead of conflicting.
+_VERSION_KEYS = frozenset({"objectVersion", "archiveVersion", "preferredProjectObjectVersion",
+                           "LastUpgradeCheck", "LastSwiftUpdateCheck"})
+
+_MISSING = object()
+
+GROUP = "group"
+
+# `key` is None for a whole object deleted on one side and edited on the other.
+Conflict = namedtuple("Conflict", ["object_id", "key", "base", "ours", "theirs"])
+
+MergeResult = namedtuple("MergeResult", ["text", "conflicts", "removed_duplicates"])
+
+# One line of the objects table as Xcode writes it: a single-line entry, a
+# multi-line entry up to its closing `\t\t};`, a section marker or a blank.
+_LINE_RE = re.compile(
+    r"\t\t([0-9A-Za-z_]+)(?: /\*[^\n]*?\*/)? = \{(?:[^\n]*\};\n|\n(?:\t\t\t[^\n]*\n)*\t\t\};\n)"
+    r"|/\* (Begin|End) (\w+) section \*/\n|\n"
+)
+_KEY_COMMENT_RE = re.compile(r"\t\t[0-9A-Za-z_]+ /\* (.*?) \*/ = ")
+_OBJECTS_OPEN = "\tobjects = {\n"
+_OBJECTS_CLOSE = "\n\t};\n"
+
+# `spans` maps object ID -> (start, end) of its lines; `head` and `tail`
+# are the text before and after the objects table.
+_Layout = namedtuple("_Layout", ["text", "head", "tail", "spans", "markers"])
+
+
+def _newer(ours, theirs):
+    try:
+        return ours if int(ours) >= int(theirs) else theirs
+    except (TypeError, ValueError):
+        return None
+
+
+class _Merger:
+    def __init__(self, base, ours, theirs, ids=None):
+        self.base = base
+        self.ours = ours
+        self.theirs = theirs
+        # Every ID in the three versions, which may be more than were decoded.
+        self.ids = ids if ids is not None else set(base) | set(ours) | set(theirs)
+        self.conflicts = []
+
+    def is_id_list(self, value):
+        ids = self.ids
+        return isinstance(value, list) and bool(value) and all(isinstance(i, str) and i in ids for i in value)
+
+    def merge_list(self, base, ours, theirs):
+        """Membership merge of ID lists in ours' order"""
+        base_set, theirs_set = set(base), set(theirs)
+        removed = base_set - theirs_set
+        merged, seen = [], set()
+        for item in ours:
+            if item not in removed and item not in seen:
+                merged.append(item)
+                seen.add(item)
+        # Each addition of theirs follows the nearest earlier item of theirs
+        # that is present, so additions queue up behind those anchors.
+        ours_set = set(ours)
+        after = {}  # anchor (None: the start) -> additions, in theirs' order
+        anchor = None
+        placed = set()
+        for item in theirs:
+            if item in placed:
+                continue
+            if item in seen:
+                anchor = item
+            elif item not in base_set and item not in ours_set:
+                after.setdefault(anchor, []).append(item)
+                placed.add(item)
+        if not after:
+            return merged
+        result = list(after.get(None, ()))
+        for item in merged:
+            result.append(item)
+            result.extend(after.get(item, ()))
+        return result
+
+    def merge_value(self, object_id, key, base, ours, theirs):
+        """(merged value or _MISSING, conflicted)"""
+        if ours == theirs or theirs == base:
+            return ours, False
+        if ours == base:
+            return theirs, False
+        if isinstance(ours, dict) and isinstance(theirs, dict):
+            base = base if isinstance(base, dict) else {}
+            merged, conflicted = {}, False
+            for sub_key in (*ours, *(k for k in theirs if k not in ours)):
+                value, clash = self.merge_value(object_id, key, base.get(sub_key, _MISSING),
+                                                ours.get(sub_key, _MISSING), theirs.get(sub_key, _MISSING))
+                conflicted |= clash
+                if value is not _MISSING:
+                    merged[sub_key] = value
+            return merged, conflicted
+        if (self.is_id_list(ours) or ours == []) and (self.is_id_list(theirs) or theirs == []) \
+                and (base is _MISSING or base == [] or self.is_id_list(base)):
+            return self.merge_list(base if isinstance(base, list) else [], ours, theirs), False
+        if key in _VERSION_KEYS:
+            newer = _newer(ours, theirs)
+            if newer is not None:
+                return newer, False
+        return ours, True
+
+    def merge_fields(self, object_id, base, ours, theirs):
+        """(merged fields, conflicting keys)"""
+        merged, conflicting = {}, []
+        for key in (*ours, *(k for k in theirs if k not in ours)):
+            value, conflicted = self.merge_value(object_id, key, base.get(key, _MISSING),
+                                                 ours.get(key, _MISSING), theirs.get(key, _MISSING))
+            if conflicted:
+                conflicting.append(key)
+                self.conflicts.append(Conflict(object_id, key, base.get(key), ours.get(key), theirs.get(key)))
+            if value is not _MISSING:
+                merged[key] = value
+        return merged, conflicting
+
+
+def _fields(obj):
+    return dict(obj.fields, isa=obj.isa)
+
+
+def _split(text):
+    """The _Layout of `text`, or None when it is not laid out the way Xcode writes it"""
+    start = text.find(_OBJECTS_OPEN)
+    end = text.rfind(_OBJECTS_CLOSE)
+    if start < 0 or end < start:
+        return None
+    pos = start + len(_OBJECTS_OPEN)
+    end += 1
+    spans, markers = {}, []
+    match = _LINE_RE.match
+    while pos < end:
+        line = match(text, pos)
+        if line is None or line.end() > end:
+            return None
+        object_id = line.group(1)
+        if object_id is not None:
+            if object_id in spans:
+                return None  # a duplicated entry needs the parser's rules
+            spans[object_id] = (pos, line.end())
+        elif line.group(2) is not None:
+            markers.append((line.group(2), line.group(3), pos, line.end() - 1))
+        pos = line.end()
+    return _Layout(text, text[:start], text[end:], spans, markers)
+
+
+def _entry(layout, object_id):
+    span = layout.spans.get(object_id)
+    return layout.text[span[0]:span[1]] if span is not None else None
+
+
+def _decode(layout, object_ids):
+    """Fields of the entries of `object_ids` in `layout` (missing ones left out)"""
+    body = "".join(filter(None, (_entry(layout, i) for i in object_ids)))
+    return parse("{\n" + body + "}\n").document if body else {}
+
+
+def _key_comment(layouts, object_id):
+    """The comment the first of `layouts` holding `object_id` writes after it"""
+    for layout in layouts:
+        span = layout.spans.get(object_id)
+        if span is not None:
+            match = _KEY_COMMENT_RE.match(layout.text, span[0])
+            return match.group(1) if match else None
+    return None
+
+
+def _referenced(fields, ids, found):
+    for value in fields.values():
+        if isinstance(value, str):
+            if value in ids:
+                found.add(value)
+        elif isinstance(value, list):
+            found.update(i for i in value if isinstance(i, str) and i in ids)
+        elif isinstance(value, dict):
+            _referenced(value, ids, found)
+    return found
+
+
+def _changed(base, side):
+    """IDs whose entries differ between the `base` and `side` layouts"""
+    return {i for i in base.spans.keys() | side.spans.keys() if _entry(base, i) != _entry(side, i)}
+
+
+def _top_level(layout):
+    """The document of `layout` with an empty objects table"""
+    return parse(layout.head + _OBJECTS_OPEN + layout.tail).document
+
+
+def _merge_entries(layouts, theirs_changed):
+    """
+    MergeResult of a clean merge from the entries theirs changed alone, or
+    None when the full merge is needed
+    """
+    base, ours, theirs = layouts
+    outside = [(layout.head, layout.tail) for layout in layouts]
+    if outside[2] == outside[0]:
+        head_tail = outside[1]
+    elif outside[1] in (outside[0], outside[2]):
+        head_tail = outside[2]
+    else:
+        return None  # top-level keys changed on both sides
+
+    if not theirs_changed and head_tail == outside[1]:
+        return MergeResult(ours.text, [], [])
+    if head_tail == outside[2] and not _changed(base, ours):
+        return MergeResult(theirs.text, [], [])
+
+    ids = sorted(theirs_changed)
+    base_objects, ours_objects, theirs_objects = (_decode(layout, ids) for layout in layouts)
+    all_ids = base.spans.keys() | ours.spans.keys() | theirs.spans.keys()
+    merger = _Merger(base_objects, ours_objects, theirs_objects, ids=all_ids)
+    merged, added, removed = {}, set(), set()
+    for object_id in ids:
+        base_fields = base_objects.get(object_id)
+        mine = ours_objects.get(object_id)
+        other = theirs_objects.get(object_id)
+        if other == base_fields or mine == other:
+            if mine is not None:
+                # Theirs only renamed something this entry mentions: written
+                # again, it takes up the new name.
+                merged[object_id] = mine
+            continue
+        if mine == base_fields:
+            if other is None:
+                removed.add(object_id)
+            else:
+                merged[object_id] = other
+                if mine is None:
+                    added.add(object_id)
+            continue
+        if mine is None or other is None or mine.get("isa") != other.get("isa"):
+            return None
+        fields, conflicting = merger.merge_fields(object_id, base_fields or {}, mine, other)
+        if conflicting:
+            return None
+        merged[object_id] = fields
+    if added and _leaves_duplicates(ours, merged, added):
+        return None
+
+    # Comments the writer cannot work out from the decoded objects alone
+    # are copied, from ours unless only theirs changed the entry.
+    names = {}
+    for object_id in set().union(merged, *(_referenced(f, all_ids, set()) for f in merged.values())):
+        if _entry(ours, object_id) == _entry(base, object_id):
+            comment = _key_comment((theirs, ours, base), object_id)
+        else:
+            comment = _key_comment((ours, theirs, base), object_id)
+        if comment is not None:
+            names[object_id] = comment
+    project = PBXProj({"objects": merged}, source_comments=names)
+    entry_spans = {object_id: [(start + 2, end - 1)] for object_id, (start, end) in ours.spans.items()}
+    source = SourceMap(ours.text, entry_spans, ours.markers)
+    text, _ = source.render(project, set(merged), removed)
+    if text is None:
+        return None
+    if head_tail != outside[1]:
+        text = head_tail[0] + text[len(ours.head):len(text) - len(ours.tail)] + head_tail[1]
+    return MergeResult(text, [], [])
+
+
+def _leaves_duplicates(ours, merged, added):
+    """
+    Whether objects brought in from theirs leave something for
+    _fold_added_groups() or _prune_added_duplicates() to clean up
+    """
+    parents, phases = {}, {}
+    for owner_id, fields in merged.items():
+        for child_id in fields.get("children", ()):
+            parents.setdefault(child_id, owner_id)
+        for build_file_id in fields.get("files", ()):
+            phases.setdefault(build_file_id, []).append(owner_id)
+    placed = {}
+    for object_id in added:
+        if merged[object_id].get("isa") in ("PBXGroup", "PBXFileReference"):
+            if object_id not in parents:
+                return True  # its group did not change on theirs' side alone
+            placed.setdefault(parents[object_id], []).append(object_id)
+    for parent_id, object_ids in placed.items():
+        children = merged[parent_id].get("children", ())
+        known = dict(_decode(ours, [i for i in children if i not in merged]), **merged)
+        groups, files = set(), {}
+        for sibling_id in children:
+            sibling = known.get(sibling_id)
+            if sibling is None:
+                continue
+            if sibling.get("isa") == "PBXGroup" and sibling_id not in added:
+                groups.add((sibling.get("path"), sibling.get("name"), sibling.get("sourceTree")))
+            elif sibling.get("isa") == "PBXFileReference":
+                key = (sibling.get("path"), sibling.get("sourceTree"))
+                files[key] = files.get(key, 0) + 1
+        for object_id in object_ids:
+            fields = merged[object_id]
+            if fields["isa"] == "PBXGroup":
+                if (fields.get("path"), fields.get("name"), fields.get("sourceTree")) in groups:
+                    return True
+            elif files.get((fields.get("path"), fields.get("sourceTree")), 0) > 1:
+                return True
+    targets = {}
+    for object_id in added:
+        fields = merged[object_id]
+        if fields.get("isa") == "PBXBuildFile":
+            target = fields.get("fileRef") or fields.get("productRef")
+            for phase_id in phases.get(object_id, ()):
+                targets.setdefault(phase_id, []).append(target)
+    for phase_id, added_targets in targets.items():
+        files = set(merged[phase_id].get("files", ()))
+        # Ours holds no build file for a reference only theirs has, so the
+        # phase's other entries are only read for references both share.
+        shared = [i for i in files if i not in merged] if any(t not in added for t in added_targets) else []
+        known = dict(_decode(ours, sorted(shared)), **merged)
+        counts = {}
+        for build_file_id in files:
+            fields = known.get(build_file_id, {})
+            target = fields.get("fileRef") or fields.get("productRef")
+            counts[target] = counts.get(target, 0) + 1
+        if any(target is not None and counts.get(target, 0) > 1 for target in added_targets):
+            return True
+    return False
+
+
+def merge_texts(base_text, ours_text, theirs_text, marker_size=7, labels=("ours", "base", "theirs")):
+    """Merge three versions of project.pbxproj text; returns a MergeResult"""
+    layouts = [_split(text) for text in (base_text, ours_text, theirs_text)]
+    if None in layouts:
+        base_doc = parse(base_text).document
+        theirs_doc = parse(theirs_text).document
+        base_objects = base_doc.get("objects", {})
+        theirs_objects = theirs_doc.get("objects", {})
+        ids = None
+    else:
+        theirs_changed = _changed(layouts[0], layouts[2])
+        fast = _merge_entries(layouts, theirs_changed)
+        if fast is not None:
+            return fast
+        # Entries theirs left alone keep ours' version, so only the others
+        # are decoded.
+        base_doc, theirs_doc = _top_level(layouts[0]), _top_level(layouts[2])
+        ids = sorted(theirs_changed)
+        base_objects, theirs_objects = _decode(layouts[0], ids), _decode(layouts[2], ids)
+    ours = PBXProj.loads(ours_text)
+    ours_objects = {object_id: _fields(obj) for object_id, obj in ours.objects.items()}
+    if ids is None:
+        merger = _Merger(base_objects, ours_objects, theirs_objects)
+        ids = sorted(merger.ids)
+    else:
+        all_ids = layouts[0].spans.keys() | ours_objects.keys() | layouts[2].spans.keys()
+        merger = _Merger(base_objects, ours_objects, theirs_objects, ids=all_ids)
+
+    # Top-level keys (objectVersion, rootObject, ...).
+    top_conflicted = {}   # key -> theirs' value (_MISSING: deleted by theirs)
+    for key in sorted({*base_doc, *theirs_doc} - {"objects"}):
+        current = _top_level_value(ours, key)
+        value, conflicted = merger.merge_value(None, key, base_doc.get(key, _MISSING), current,
+                                               theirs_doc.get(key, _MISSING))
+        if conflicted:
+            mine = None if current is _MISSING else current
+            merger.conflicts.append(Conflict(None, key, base_doc.get(key), mine, theirs_doc.get(key)))
+            top_conflicted[key] = theirs_doc.get(key, _MISSING)
+        elif key == "rootObject":
+            ours.root_id = value
+        elif value is _MISSING:
+            ours.attributes.pop(key, None)
+        else:
+            ours.attributes[key] = value
+
+    added = set()         # objects brought in from theirs
+    conflicted = {}       # object ID -> theirs' fields (None: deleted by theirs)
+    for object_id in ids:
+        base = base_objects.get(object_id)
+        mine = ours_objects.get(object_id)
+        other = theirs_objects.get(object_id)
+        if other == base or mine == other:
+            continue
+        if mine == base:
+            if other is None:
+                ours.remove(object_id)
+            elif mine is None:
+                ours.add(_objects.create(object_id, dict(other)))
+                added.add(object_id)
+            else:
+                _replace_fields(ours[object_id], other)
+            continue
+        if mine is None or other is None:
+            # Deleted on one side, edited on the other.
+            merger.conflicts.append(Conflict(object_id, None, base, mine, other))
+            if mine is None:
+                ours.add(_objects.create(object_id, dict(other)))
+                conflicted[object_id] = None
+            else:
+                conflicted[object_id] = other
+            continue
+        if mine.get("isa") != other.get("isa"):
+            merger.conflicts.append(Conflict(object_id, "isa", base and base.get("isa"), mine["isa"], other["isa"]))
+            conflicted[object_id] = other
+            continue
+        merged, keys = merger.merge_fields(object_id, base or {}, mine, other)
+        _replace_fields(ours[object_id], merged)
+        if keys:
+            conflicted[object_id] = other
+
+    removed_duplicates = _fold_added_groups(ours, added) + _prune_added_duplicates(ours, added)
+    text = ours.dumps()
+    if conflicted or top_conflicted:
+        text = _write_markers(ours, text, conflicted, top_conflicted, ours_objects, marker_size, labels)
+    return MergeResult(text, merger.conflicts, removed_duplicates)
+
+
+def _replace_fields(obj, fields):
+    for key in [k for k in obj.fields if k not in fields]:
+        del obj[key]
+    for key, value in fields.items():
+        if key != "isa" and obj.fields.get(key, _MISSING) != value:
+            obj[key] = value
+
+
+def _fold_added_groups(project, added):
+    """Merge groups brought in from theirs into a sibling of ours for the same folder"""
+    groups = project.groups
+    candidates = [i for i in added if project[i].isa == "PBXGroup"]
+    removals = []
+    # Parents first, so nested folders find their twin once the parent is folded.
+    for group_id in sorted(candidates, key=lambda i: (groups.depth(i), i)):
+        group = project[group_id]
+        parent = groups.parent(group_id)
+        if parent is None:
+            continue
+        key = (group.get("path"), group.get("name"), group.get("sourceTree"))
+        twin = next((
+            sibling for sibling in (project.get(c) for c in parent.children)
+            if sibling is not None and sibling.id != group_id and sibling.id not in added
+            and sibling.isa == "PBXGroup"
+            and (sibling.get("path"), sibling.get("name"), sibling.get("sourceTree")) == key
+        ), None)
+        if twin is None:
+            continue
+        children = list(group.children)
+        while parent.remove_child(group_id):
+            pass
+        project.remove(group_id)
+        for child_id in children:
+            if child_id not in twin.children:
+                twin.add_child(child_id)
+        removals.append(Removal(GROUP, group_id, twin.id))
+    return removals
+
+
+def _prune_added_duplicates(project, added):
+    """Prune duplicate references and build files involving objects brought in from theirs"""
+    if not added:
+        return []
+    report = find_duplicates(project)
+    relevant = DuplicateReport(dup for dup in report if dup.kind in (FILE_REFERENCE, BUILD_FILE))
+    return prune_duplicates(project, relevant, keep="first", scope=added)
+
+
+def _top_level_value(project, key):
+    return project.root_id if key == "rootObject" else project.attributes.get(key, _MISSING)
+
+
+def _write_markers(project, text, conflicted, top_conflicted, ours_objects, marker_size, labels):
+    """
+    Wrap each conflicting entry and top-level key in conflict markers with
+    theirs' version
+    """
+    writer = Writer(project)
+    ours_label, _, theirs_label = labels
+    start, middle, end = "<" * marker_size, "=" * marker_size, ">" * marker_size
+    replacements = []  # (ours' text, or "" for a key ours does not have, ours' version, theirs' version)
+    for object_id, theirs in sorted(conflicted.items()):
+        obj = project.get(object_id)
+        if obj is None:
+            continue
+        ours_entry = f"\t\t{writer.object_entry(obj)}\n"
+        mine = ours_entry if object_id in ours_objects else ""
+        if theirs is not None:
+            other = _objects.create(object_id, dict(theirs))
+            other.project = project
+            theirs_entry = f"\t\t{writer.object_entry(other)}\n"
+            other.project = None
+        else:
+            theirs_entry = ""
+        replacements.append((ours_entry, mine, theirs_entry))
+    for key, theirs in sorted(top_conflicted.items()):
+        lines = [
+            "" if value is _MISSING else f"\t{quote(key)} = {writer.value(value, key, 1, False)};\n"
+            for value in (_top_level_value(project, key), theirs)
+        ]
+        replacements.append((lines[0], *lines))
+    for ours_text, mine, theirs_text in replacements:
+        block = f"{start} {ours_label}\n{mine}{middle}\n{theirs_text}{end} {theirs_label}\n"
+        if not ours_text:
+            # A key ours does not have goes last in the top-level dictionary.
+            position = text.rstrip().rfind("}")
+        else:
+            # Whole lines only: "\tname = ...;" also ends deeper lines.
+            position = text.find("\n" + ours_text)
+            if position >= 0:
+                position += 1
+        if position < 0:
+            # Entry shares a line with another one: fall back to a full rewrite.
+            return _write_markers(project, project.dumps(canonical=True), conflicted, top_conflicted,
+                                  ours_objects, marker_size, labels)
+        text = text[:position] + block + text[position + len(ours_text):]
+    return text
+
+
+def merge_files(base_path, ours_path, theirs_path, marker_size=7, labels=("ours", "base", "theirs")):
+    """
+    Merge in place the way git expects of a merge driver: the result goes
+    to `ours_path`. Returns the number of conflicts. Files that do not
+    parse (e.g. already holding conflict markers) fall back to
+    `git merge-file`.
+    """
+    texts = []
+    for path in (base_path, ours_path, theirs_path):
+        with open(path, "r", encoding="utf-8") as f:
+            texts.append(f.read())
+    try:
+        result = merge_texts(*texts, marker_size=marker_size, labels=labels)
+    except ValueError:
+        return _merge_file(base_path, ours_path, theirs_path, marker_size, labels)
+    with open(ours_path, "w", encoding="utf-8") as f:
+        f.write(result.text)
+    return len(result.conflicts)
+
+
+def _merge_file(base_path, ours_path, theirs_path, marker_size, labels):
+    ours_label, base_label, theirs_label = labels
+    command = ["git", "merge-file", f"--marker-size={marker_size}", "-L", ours_label, "-L", base_label,
+               "-L", theirs_label, str(ours_path), str(base_path), str(theirs_path)]
+    completed = subprocess.run(command)
+    return completed.returncode if completed.returncode >= 0 else 1
@@ -0,0 +1,411 @@
+"""
+Typed object model for project.pbxproj entries.
+
+Every entry in the `objects = { ... }` table becomes a PBXObject subclass
+chosen by its `isa`. Objects keep their fields in a plain dict (minus
+`isa`) so that unknown keys round-trip untouched; the subclasses only add
+convenience accessors for the keys the tools care about.
+"""
+
+# Keys whose values look like object IDs but are not references, so the
+# writer must not annotate them with comments.
+NON_REFERENCE_KEYS = frozenset({"remoteGlobalIDString", "TestTargetID"})
+
+# Default display names Xcode uses for unnamed build phases.
+DEFAULT_PHASE_NAMES = {
+    "PBXSourcesBuildPhase": "Sources",
+    "PBXFrameworksBuildPhase": "Frameworks",
+    "PBXResourcesBuildPhase": "Resources",
+    "PBXHeadersBuildPhase": "Headers",
+    "PBXCopyFilesBuildPhase": "CopyFiles",
+    "PBXShellScriptBuildPhase": "ShellScript",
+    "PBXRezBuildPhase": "Rez",
+}
+
+_REGISTRY = {}
+
+
+def register(cls):
+    """Class decorator mapping an `isa` name to its PBXObject subclass"""
+    _REGISTRY[cls.__name__] = cls
+    return cls
+
+
+def create(object_id, fields):
+    """Build the typed object for a parsed `{isa = ...; ...}` dict"""
+    isa = fields.pop("isa", None)
+    cls = _REGISTRY.get(isa, PBXObject)
+    obj = cls(object_id, fields)
+    if cls is PBXObject:
+        obj.isa = isa
+    return obj
+
+
+class PBXObject:
+    """A single entry in the objects table"""
+
+    isa = None
+
+    def __init__(self, object_id, fields=None):
+        self.id = object_id
+        self.fields = dict(fields or {})
+        self.project = None
+
+    def __repr__(self):
+        return f"<{self.isa} {self.id} {self.display_name()!r}>"
+
+    def __contains__(self, key):
+        return key in self.fields
+
+    def __getitem__(self, key):
+        return self.fields[key]
+
+    def __setitem__(self, key, value):
+        project = self.project
+        if project is not None:
+            project._will_change(self, key)
+        self.fields[key] = value
+        if project is not None:
+            project._did_change(self, key)
+
+    def __delitem__(self, key):
+        project = self.project
+        if project is not None:
+            project._will_change(self, key)
+        del self.fields[key]
+        if project is not None:
+            project._did_change(self, key)
+
+    def get(self, key, default=None):
+        return self.fields.get(key, default)
+
+    def insert_reference(self, key, object_id, index=None):
+        """Add `object_id` to the list field `key` (at the end by default)"""
+        items = self.fields.setdefault(key, [])
+        if index is None:
+            items.append(object_id)
+        else:
+            items.insert(index, object_id)
+        if self.project is not None:
+            self.project._list_changed(self, key, added=(object_id,))
+
+    def remove_reference(self, key, object_id, last=False):
+        """Remove the first (or `last`) `object_id` from the list field `key`"""
+        items = self.fields.get(key)
+        if not items or object_id not in items:
+            return False
+        if last:
+            del items[len(items) - 1 - items[::-1].index(object_id)]
+        else:
+            items.remove(object_id)
+        if self.project is not None:
+            self.project._list_changed(self, key, removed=(object_id,))
+        return True
+
+    def remove_references(self, key, object_ids, keep_first=False):
+        """
+        Remove every occurrence of `object_ids` from the list field `key` in
+        one pass, or with `keep_first` every occurrence but the first
+        """
+        items = self.fields.get(key)
+        if not items:
+            return []
+        doomed = set(object_ids)
+        if keep_first:
+            kept, removed, seen = [], [], set()
+            for item in items:
+                if item in seen:
+                    removed.append(item)
+                else:
+                    kept.append(item)
+                    if item in doomed:
+                        seen.add(item)
+        else:
+            kept = [item for item in items if item not in doomed]
+            removed = [item for item in items if item in doomed]
+        if not removed:
+            return []
+        items[:] = kept
+        if self.project is not None:
+            self.project._list_changed(self, key, removed=removed)
+        return removed
+
+    @property
+    def name(self):
+        return self.fields.get("name")
+
+    @property
+    def path(self):
+        return self.fields.get("path")
+
+    def display_name(self):
+        """Name Xcode shows for this object (also used in comments)"""
+        return self.fields.get("name") or self.fields.get("path")
+
+    def references(self):
+        """Yield every object ID this object points at"""
+        yield from _walk_references(self.fields, self.project)
+
+
+def _walk_references(value, project, key=None):
+    if isinstance(value, str):
+        if key not in NON_REFERENCE_KEYS and project is not None and value in project.objects:
+            yield value
+    elif isinstance(value, list):
+        for item in value:
+            yield from _walk_references(item, project, key)
+    elif isinstance(value, dict):
+        for sub_key, item in value.items():
+            yield from _walk_references(item, project, sub_key)
+
+
+@register
+class PBXBuildFile(PBXObject):
+    isa = "PBXBuildFile"
+
+    @property
+    def file_ref(self):
+        return self.fields.get("fileRef")
+
+    @property
+    def product_ref(self):
+        return self.fields.get("productRef")
+
+
+@register
+class PBXFileReference(PBXObject):
+    isa = "PBXFileReference"
+
+    @property
+    def source_tree(self):
+        return self.fields.get("sourceTree")
+
+
+@register
+class PBXReferenceProxy(PBXFileReference):
+    isa = "PBXReferenceProxy"
+
+
+@register
+class PBXGroup(PBXObject):
+    isa = "PBXGroup"
+
+    @property
+    def children(self):
+        """Child IDs; use add_child/remove_child to edit"""
+        return tuple(self.fields.get("children", ()))
+
+    def add_child(self, object_id, index=None):
+        self.insert_reference("children", object_id, index)
+
+    def remove_child(self, object_id):
+        return self.remove_reference("children", object_id)
+
+    @property
+    def source_tree(self):
+        return self.fields.get("sourceTree")
+
+
+@register
+class PBXVariantGroup(PBXGroup):
+    isa = "PBXVariantGroup"
+
+
+@register
+class XCVersionGroup(PBXGroup):
+    isa = "XCVersionGroup"
+
+
+GROUP_ISAS = frozenset({"PBXGroup", "PBXVariantGroup", "XCVersionGroup"})
+
+
+@register
+class PBXFileSystemSynchronizedRootGroup(PBXObject):
+    isa = "PBXFileSystemSynchronizedRootGroup"
+
+
+class PBXBuildPhase(PBXObject):
+    """Common base for the *BuildPhase objects"""
+
+    @property
+    def files(self):
+        """Build file IDs; use add_file/remove_file to edit"""
+        return tuple(self.fields.get("files", ()))
+
+    def add_file(self, build_file_id, index=None):
+        self.insert_reference("files", build_file_id, index)
+
+    def remove_file(self, build_file_id):
+        return self.remove_reference("files", build_file_id)
+
+    def display_name(self):
+        return self.fields.get("name") or DEFAULT_PHASE_NAMES.get(self.isa)
+
+
+@register
+class PBXSourcesBuildPhase(PBXBuildPhase):
+    isa = "PBXSourcesBuildPhase"
+
+
+@register
+class PBXFrameworksBuildPhase(PBXBuildPhase):
+    isa = "PBXFrameworksBuildPhase"
+
+
+@register
+class PBXResourcesBuildPhase(PBXBuildPhase):
+    isa = "PBXResourcesBuildPhase"
+
+
+@register
+class PBXHeadersBuildPhase(PBXBuildPhase):
+    isa = "PBXHeadersBuildPhase"
+
+
+@register
+class PBXCopyFilesBuildPhase(PBXBuildPhase):
+    isa = "PBXCopyFilesBuildPhase"
+
+
+@register
+class PBXShellScriptBuildPhase(PBXBuildPhase):
+    isa = "PBXShellScriptBuildPhase"
+
+
+@register
+class PBXRezBuildPhase(PBXBuildPhase):
+    isa = "PBXRezBuildPhase"
+
+
+BUILD_PHASE_ISAS = frozenset(DEFAULT_PHASE_NAMES)
+
+
+class PBXTarget(PBXObject):
+    """Common base for native, aggregate and legacy targets"""
+
+    @property
+    def build_phases(self):
+        return tuple(self.fields.get("buildPhases", ()))
+
+    @property
+    def build_configuration_list(self):
+        return self.fields.get("buildConfigurationList")
+
+    def display_name(self):
+        return self.fields.get("name")
+
+
+@register
+class PBXNativeTarget(PBXTarget):
+    isa = "PBXNativeTarget"
+
+
+@register
+class PBXAggregateTarget(PBXTarget):
+    isa = "PBXAggregateTarget"
+
+
+@register
+class PBXLegacyTarget(PBXTarget):
+    isa = "PBXLegacyTarget"
+
+
+TARGET_ISAS = frozenset({"PBXNativeTarget", "PBXAggregateTarget", "PBXLegacyTarget"})
+
+
+@register
+class PBXProject(PBXObject):
+    isa = "PBXProject"
+
+    @property
+    def targets(self):
+        return tuple(self.fields.get("targets", ()))
+
+    @property
+    def main_group(self):
+        return self.fields.get("mainGroup")
+
+    @property
+    def build_configuration_list(self):
+        return self.fields.get("buildConfigurationList")
+
+    def display_name(self):
+        return "Project object"
+
+
+@register
+class XCBuildConfiguration(PBXObject):
+    isa = "XCBuildConfiguration"
+
+    @property
+    def build_settings(self):
+        return self.fields.setdefault("buildSettings", {})
+
+    @property
+    def base_configuration_reference(self):
+        return self.fields.get("baseConfigurationReference")
+
+
+@register
+class XCConfigurationList(PBXObject):
+    isa = "XCConfigurationList"
+
+    @property
+    def build_configurations(self):
+        return tuple(self.fields.get("buildConfigurations", ()))
+
+    def display_name(self):
+        # The owner is only known at project level; the writer fills it in.
+        return None
+
+
+@register
+class PBXContainerItemProxy(PBXObject):
+    isa = "PBXContainerItemProxy"
+
+    def display_name(self):
+        return self.isa
+
+
+@register
+class PBXTargetDependency(PBXObject):
+    isa = "PBXTargetDependency"
+
+    def display_name(self):
+        return self.isa
+
+
+@register
+class PBXBuildRule(PBXObject):
+    isa = "PBXBuildRule"
+
+    def display_name(self):
+        return self.isa
+
+
+@register
+class XCRemoteSwiftPackageReference(PBXObject):
+    isa = "XCRemoteSwiftPackageReference"
+
+    def display_name(self):
+        url = self.fields.get("repositoryURL", "")
+        repo = url.rstrip("/").rsplit("/", 1)[-1]
+        if repo.endswith(".git"):
+            repo = repo[:-4]
+        return f'{self.isa} "{repo}"'
+
+
+@register
+class XCLocalSwiftPackageReference(PBXObject):
+    isa = "XCLocalSwiftPackageReference"
+
+    def display_name(self):
+        return f'{self.isa} "{self.fields.get("relativePath", "")}"'
+
+
+@register
+class XCSwiftPackageProductDependency(PBXObject):
+    isa = "XCSwiftPackageProductDependency"
+
+    def display_name(self):
+        return self.fields.get("productName")
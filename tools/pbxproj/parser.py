@@ -0,0 +1,272 @@
+"""
+Single-pass parser for the OpenStep plist format used by project.pbxproj.
+
+The parser runs over the UTF-8 bytes of the file, which PBXProj.load maps
+into memory instead of reading, and never builds a token list: a small
+recursive-descent parser matches one compiled regex at the current
+offset and decodes a string only when it becomes part of the document.
+`/* ... */` comments are not part of the data model, so they are skipped
+as offsets; the comment that follows an object ID is decoded at the end
+(once per ID) so that references to objects missing from the table can
+still be written back the way they were read. The cost is linear in the
+file size no matter how many edits are applied afterwards.
+"""
+
+import re
+from bisect import bisect_right
+from collections import namedtuple
+
+
+class ParseError(ValueError):
+    """Raised when project.pbxproj is not valid OpenStep plist text"""
+
+    def __init__(self, message, text=None, offset=None):
+        if text is not None and offset is not None:
+            newline = "\n" if isinstance(text, str) else b"\n"
+            line = text[:offset].count(newline) + 1
+            message = f"{message} (line {line})"
+        super().__init__(message)
+        self.offset = offset
+
+
+# Whitespace, `//` lines and `/* */` comments between tokens.
+_SKIP = rb"(?:\s+|//[^\n]*|/\*.*?\*/)*"
+
+# A bare or quoted string plus the comment right after it, which is how
+# the file names the object behind an ID.
+_STR = rb"""((?:[^\s{}()=;,"/]|/(?![*/]))+|"(?:[^"\\]|\\.)*")(?:[ \t]*/\*(.*?)\*/)?"""
+_STRING_RE = re.compile(_SKIP + _STR, re.S)
+# Fast paths covering nearly every line of a project: a whole `key = value;`
+# member with a string value (or the bracket opening a nested one), and an
+# array item with the separator after it. Anything else, errors included,
+# goes through the general methods.
+_MEMBER_RE = re.compile(
+    _SKIP + rb"(?:(})|" + _STR + _SKIP + rb"=" + _SKIP + rb"(?:" + _STR + _SKIP + rb";|([{(])))", re.S
+)
+_ITEM_RE = re.compile(_SKIP + rb"(?:(\))|" + _STR + _SKIP + rb"(?:,|(?=\))))", re.S)
+_SKIP_RE = re.compile(_SKIP, re.S)
+_BLANK_RE = re.compile(rb"(?:\s+|//[^\n]*)*")
+_SECTION_RE = re.compile(rb"\s*(Begin|End) (\w+) section\s*")
+_NON_ASCII_RE = re.compile(rb"[\x80-\xff]+")
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", '"': '"', "\\": "\\"}
+_ESCAPE_RE = re.compile(r"\\(.)", re.S)
+
+ParseResult = namedtuple(
+    "ParseResult", ["document", "comments", "duplicate_ids", "entry_spans", "section_markers"]
+)
+
+
+def unquote(raw):
+    """Strip the quotes from a quoted token and resolve its escapes"""
+    body = raw[1:-1]
+    if "\\" not in body:
+        return body
+    return _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), body)
+
+
+def _char_offsets(buffer):
+    """Byte offset -> str offset for the UTF-8 `buffer`, or None if it is ASCII"""
+    ends = []
+    extra = []
+    total = 0
+    for match in _NON_ASCII_RE.finditer(buffer):
+        # Continuation bytes are the ones that do not start a character.
+        total += sum(1 for byte in match.group() if byte < 0xC0)
+        ends.append(match.end())
+        extra.append(total)
+    if not ends:
+        return None
+
+    def convert(offset):
+        i = bisect_right(ends, offset)
+        return offset - extra[i - 1] if i else offset
+
+    return convert
+
+
+class _Parser:
+    def __init__(self, buffer):
+        self.buffer = buffer
+        # object ID -> (start, end) of the comment seen next to it
+        self.comment_spans = {}
+        # object IDs that appeared more than once in the objects table
+        self.duplicate_ids = []
+        # object ID -> [(start, end)] of each `ID = {...};` entry
+        self.entry_spans = {}
+        # [(kind, isa, start, end)] for `/* Begin/End X section */` markers
+        self.section_markers = []
+
+    def error(self, message, offset):
+        raise ParseError(message, self.buffer, offset)
+
+    def unexpected(self, pos, expected):
+        pos = _SKIP_RE.match(self.buffer, pos).end()
+        found = self.buffer[pos:pos + 1]
+        if not found:
+            self.error("Unexpected end of file", pos)
+        if found in b"{}()=;,":
+            if expected is None:
+                self.error(f"Unexpected {found.decode()!r}", pos)
+            self.error(f"Expected {expected}, found {found.decode()!r}", pos)
+        self.error(f"Unexpected character {found.decode('utf-8', 'replace')!r}", pos)
+
+    def expect(self, pos, char):
+        pos = _SKIP_RE.match(self.buffer, pos).end()
+        if self.buffer[pos:pos + 1] != char:
+            self.unexpected(pos, repr(char.decode()))
+        return pos + 1
+
+    def decode(self, match, group):
+        """The string in `group` of `match`, noting the comment in the group after it"""
+        raw = match.group(group)
+        value = unquote(raw.decode()) if raw[:1] == b'"' else raw.decode()
+        # Remember `ID /* comment */` pairs for references to missing objects
+        if match.start(group + 1) >= 0 and value not in self.comment_spans:
+            self.comment_spans[value] = match.span(group + 1)
+        return value
+
+    def string(self, pos):
+        match = _STRING_RE.match(self.buffer, pos)
+        if match is None:
+            self.unexpected(pos, "a string")
+        return self.decode(match, 1), match.end()
+
+    def member(self, pos, root=False):
+        """(key, value, end) of the next `key = value;`, or (None, None, end) at '}'"""
+        match = _MEMBER_RE.match(self.buffer, pos)
+        if match is None:
+            key, pos = self.string(pos)
+            pos = self.expect(pos, b"=")
+        elif match.start(1) >= 0:
+            return None, None, match.end()
+        else:
+            key = self.decode(match, 2)
+            if match.start(4) >= 0:
+                return key, self.decode(match, 4), match.end()
+            pos = match.end() - 1
+        if root and key == "objects":
+            value, pos = self.objects_table(pos)
+        else:
+            value, pos = self.value(pos)
+        return key, value, self.expect(pos, b";")
+
+    def value(self, pos):
+        pos = _SKIP_RE.match(self.buffer, pos).end()
+        char = self.buffer[pos:pos + 1]
+        if char == b"{":
+            return self.dictionary(pos)
+        if char == b"(":
+            return self.array(pos)
+        if _STRING_RE.match(self.buffer, pos) is None:
+            self.unexpected(pos, None)
+        return self.string(pos)
+
+    def array(self, pos):
+        buffer = self.buffer
+        skip = _SKIP_RE.match
+        item = _ITEM_RE.match
+        items = []
+        pos += 1
+        while True:
+            match = item(buffer, pos)
+            if match is not None:
+                if match.start(1) >= 0:
+                    return items, match.end()
+                items.append(self.decode(match, 2))
+                pos = match.end()
+                continue
+            pos = skip(buffer, pos).end()
+            if buffer[pos:pos + 1] == b")":
+                return items, pos + 1
+            value, pos = self.value(pos)
+            items.append(value)
+            pos = skip(buffer, pos).end()
+            char = buffer[pos:pos + 1]
+            if char == b",":
+                pos += 1
+            elif char != b")":
+                self.error("Expected ',' or ')' in array", pos)
+
+    def dictionary(self, pos):
+        result = {}
+        pos += 1
+        while True:
+            key, value, pos = self.member(pos)
+            if key is None:
+                return result, pos
+            result[key] = value
+
+    def objects_table(self, pos):
+        """The `objects` dictionary, recording where every entry lives"""
+        pos = self.expect(pos, b"{")
+        result = {}
+        while True:
+            pos = self.record_sections(pos)
+            if self.buffer[pos:pos + 1] == b"}":
+                return result, pos + 1
+            start = pos
+            key, value, pos = self.member(pos)
+            if key in result:
+                self.duplicate_ids.append(key)
+            result[key] = value
+            self.entry_spans.setdefault(key, []).append((start, pos))
+
+    def record_sections(self, pos):
+        buffer = self.buffer
+        while True:
+            pos = _BLANK_RE.match(buffer, pos).end()
+            if buffer[pos:pos + 2] != b"/*":
+                return pos
+            close = buffer.find(b"*/", pos + 2)
+            if close < 0:
+                self.unexpected(pos, "'*/'")
+            match = _SECTION_RE.fullmatch(buffer, pos + 2, close)
+            if match:
+                self.section_markers.append((match.group(1).decode(), match.group(2).decode(), pos, close + 2))
+            pos = close + 2
+
+    def document(self):
+        pos = self.expect(0, b"{")
+        result = {}
+        while True:
+            key, value, pos = self.member(pos, root=True)
+            if key is None:
+                break
+            result[key] = value
+        pos = _SKIP_RE.match(self.buffer, pos).end()
+        if pos != len(self.buffer):
+            self.error("Trailing content after the root dictionary", pos)
+        return result
+
+    def comments(self):
+        buffer = self.buffer
+        return {key: buffer[start:end].decode().strip() for key, (start, end) in self.comment_spans.items()}
+
+
+def parse(source):
+    """
+    Parse project.pbxproj text, given as a str or as UTF-8 bytes (any
+    buffer, such as an mmap of the file).
+
+    Returns a ParseResult whose `document` is the root dictionary with
+    plain dict/list/str values. The remaining fields describe the source
+    layout: comments seen after IDs, IDs repeated in the objects table, the
+    character span of every object entry in the decoded text and the
+    section markers.
+    """
+    if isinstance(source, str):
+        buffer, ascii = source.encode("utf-8"), source.isascii()
+    elif isinstance(source, bytes):
+        buffer, ascii = source, source.isascii()
+    else:
+        buffer, ascii = source, _NON_ASCII_RE.search(source) is None
+    parser = _Parser(buffer)
+    document = parser.document()
+    entry_spans = parser.entry_spans
+    section_markers = parser.section_markers
+    convert = None if ascii else _char_offsets(buffer)
+    if convert is not None:
+        entry_spans = {key: [(convert(s), convert(e)) for s, e in spans] for key, spans in entry_spans.items()}
+        section_markers = [(kind, isa, convert(s), convert(e)) for kind, isa, s, e in section_markers]
+    return ParseResult(document, parser.comments(), parser.duplicate_ids, entry_spans, section_markers)
@@ -0,0 +1,450 @@
+"""
+In-memory Xcode project: the parsed objects table plus load/save helpers.
+"""
+
+import copy
+import mmap
+import os
+from pathlib import Path
+
+from . import objects as _objects
+from .cache import default_cache
+from .groups import GroupTree
+from .ids import IDAllocator
+from .incremental import SourceMap
+from .index import ProjectIndex
+from .membership import AFFECTED_ISAS as _MEMBERSHIP_ISAS, Membership
+from .parser import parse
+from .writer import dumps
+
+# Fields whose value shows up in the comments other entries write next to
+# a reference, so changing them makes the referring entries stale too.
+_COMMENT_KEYS = frozenset({"name", "path", "productName", "repositoryURL", "relativePath", "fileRef", "productRef"})
+
+PBXPROJ_NAME = "project.pbxproj"
+
+
+def _decode(data):
+    """Project bytes as text, with newlines translated as open() would"""
+    text = str(data, "utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def resolve_pbxproj_path(path):
+    """Accept either an .xcodeproj bundle or the project.pbxproj inside it"""
+    path = Path(path)
+    if path.suffix == ".xcodeproj" or path.is_dir():
+        path = path / PBXPROJ_NAME
+    return path
+
+
+class PBXProj:
+    """
+    A parsed project.pbxproj.
+
+    `objects` maps object ID to a typed PBXObject. `attributes` holds the
+    remaining top-level keys (archiveVersion, classes, objectVersion) so
+    they are written back unchanged.
+
+    A project loaded from text remembers that text, and edits made through
+    the object API mark the touched entries dirty so that save() only
+    re-renders those entries and copies the rest of the file verbatim.
+    Code that mutates `fields` in place must call mark_dirty() itself.
+    """
+
+    def __init__(self, document, source_comments=None, duplicate_ids=None, path=None):
+        document = dict(document)
+        raw_objects = document.pop("objects", {})
+        self.root_id = document.pop("rootObject", None)
+        self.attributes = document
+        self.source_comments = source_comments or {}
+        self.duplicate_ids = duplicate_ids or []
+        self.path = Path(path) if path else None
+        self.objects = {}
+        self._index = None
+        self._membership = None
+        self._groups = None
+        self._ids = None
+        self._source = None
+        self._source_top = None
+        self._cache = None
+        self._dirty = set()
+        self._removed = set()
+        self._renamed = set()
+        for object_id, fields in raw_objects.items():
+            self._attach(_objects.create(object_id, dict(fields)))
+
+    # -- loading and saving ---------------------------------------------
+
+    @classmethod
+    def loads(cls, text, path=None):
+        result = parse(text)
+        project = cls(result.document, result.comments, result.duplicate_ids, path)
+        project._set_source(text, result)
+        return project
+
+    @classmethod
+    def load(cls, path, cache=True):
+        """
+        Parse the project at `path`. `cache` is a ParseCache, True for the
+        default one (see pbxproj/cache.py) or False to always parse.
+        """
+        path = resolve_pbxproj_path(path)
+        if cache is True:
+            cache = default_cache()
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            # Hashing and parsing read the mapped file in place; only the
+            # text kept for incremental saves is a copy.
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        try:
+            text = _decode(buffer)
+            cached = cache.get(path, buffer, stat) if cache else None
+            if cached is not None:
+                result, tables = cached
+            else:
+                # Offsets into the bytes only line up with the text when it
+                # is ASCII and no newlines were translated, i.e. when both
+                # have the same length.
+                result, tables = parse(buffer if len(text) == len(buffer) else text), None
+            project = cls(result.document, result.comments, result.duplicate_ids, path)
+            project._set_source(text, result)
+            project._cache = cache or None
+            if tables is not None:
+                project._index = ProjectIndex.from_tables(project, tables)
+            elif cache:
+                cache.put(path, buffer, result, project.index.tables(), stat)
+        finally:
+            if isinstance(buffer, mmap.mmap):
+                buffer.close()
+        return project
+
+    def dumps(self, canonical=False):
+        """
+        Project text. By default only the entries changed since loading are
+        re-rendered; `canonical=True` rewrites the whole file in Xcode's
+        layout (sorted sections and entries, regenerated comments).
+        """
+        return self._render(canonical)[0]
+
+    def save(self, path=None, canonical=False):
+        """Write the project, replacing the target file atomically"""
+        path = resolve_pbxproj_path(path) if path else self.path
+        if path is None:
+            raise ValueError("No path given and project was not loaded from disk")
+        text, plan = self._render(canonical)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.path = path
+        if plan is not None:
+            self._source.commit(plan)
+        else:
+            result = parse(text)
+            self._set_source(text, result)
+            if self._cache is not None:
+                # The next load of this file can skip the parse too.
+                self._cache.put(path, text.encode("utf-8"), result, stat=os.stat(path))
+        self._dirty.clear()
+        self._removed.clear()
+        self._renamed.clear()
+
+    @property
+    def modified(self):
+        """Whether anything was changed since loading or the last save"""
+        return bool(self._dirty or self._removed)
+
+    def _set_source(self, text, result):
+        self._source = SourceMap(text, result.entry_spans, result.section_markers)
+        self._source_top = (self.root_id, copy.deepcopy(self.attributes))
+
+    def _render(self, canonical):
+        """(text, splice plan) where the plan is None for a full rewrite"""
+        if not canonical and self._source is not None and self._source_top == (self.root_id, self.attributes):
+            # Renames are kept until the save, so every render finds the
+            # entries whose comments they made stale.
+            changed, comments = self._stale_comments()
+            self._dirty |= changed
+            text, plan = self._source.render(self, self._dirty, self._removed, comments)
+            if text is not None:
+                return text, plan
+        return dumps(self), None
+
+    def _stale_comments(self):
+        """
+        (entries to re-render, {entry ID: referenced IDs}) after renames.
+        The first are objects whose own comment may read differently now;
+        the entries that mention them only need those comments replaced,
+        which the reverse index finds without a scan of the project.
+        """
+        renamed = {i for i in self._renamed if i in self.objects}
+        if not renamed:
+            return set(), {}
+        changed = set(renamed)
+        index = self.index
+        for object_id in renamed:
+            obj = self.objects[object_id]
+            if obj.isa in _objects.TARGET_ISAS or obj.isa == "PBXProject":
+                # Configuration lists are named after their owner.
+                config_list = obj.get("buildConfigurationList")
+                if config_list in self.objects:
+                    changed.add(config_list)
+            elif obj.isa in _objects.BUILD_PHASE_ISAS:
+                # Build files are named "<file> in <phase>".
+                changed.update(obj.files)
+            for referrer in index.referring(object_id):
+                if referrer.isa == "PBXBuildFile":
+                    changed.add(referrer.id)
+        comments = {}
+        for object_id in changed:
+            for referrer in index.referring(object_id):
+                comments.setdefault(referrer.id, set()).add(object_id)
+        return changed, comments
+
+    def transaction(self):
+        """Start a batch of edits that is checked and saved as one unit"""
+        from .transaction import Transaction
+
+        return Transaction(self)
+
+    # -- queries --------------------------------------------------------
+
+    @property
+    def name(self):
+        """Project name, taken from the enclosing .xcodeproj bundle"""
+        if self.path is not None and self.path.parent.suffix == ".xcodeproj":
+            return self.path.parent.stem
+        return None
+
+    @property
+    def index(self):
+        """Reverse lookups, built on first use and then kept current"""
+        if self._index is None:
+            self._index = ProjectIndex(self)
+        return self._index
+
+    @property
+    def membership(self):
+        """Target x file membership matrix, rebuilt on first use after an edit"""
+        if self._membership is None:
+            self._membership = Membership(self)
+        return self._membership
+
+    @property
+    def groups(self):
+        """The group tree with memoized paths, kept current across edits"""
+        if self._groups is None:
+            self._groups = GroupTree(self)
+        return self._groups
+
+    @property
+    def ids(self):
+        """The IDAllocator behind new_id(); assign one to change the mode"""
+        if self._ids is None:
+            self._ids = IDAllocator(self)
+        return self._ids
+
+    @ids.setter
+    def ids(self, allocator):
+        self._ids = allocator
+
+    @property
+    def root(self):
+        return self.objects.get(self.root_id)
+
+    def __contains__(self, object_id):
+        return object_id in self.objects
+
+    def __getitem__(self, object_id):
+        return self.objects[object_id]
+
+    def get(self, object_id, default=None):
+        return self.objects.get(object_id, default)
+
+    def objects_of(self, *isas):
+        """Iterate over the objects whose isa is one of `isas`"""
+        wanted = set(isas)
+        return (obj for obj in self.objects.values() if obj.isa in wanted)
+
+    def targets(self):
+        root = self.root
+        if root is None:
+            return []
+        return [self.objects[t] for t in root.targets if t in self.objects]
+
+    def target_named(self, name):
+        for target in self.targets():
+            if target.name == name:
+                return target
+        return None
+
+    def build_phases(self, target, isa=None):
+        phases = (self.objects[p] for p in target.build_phases if p in self.objects)
+        return [p for p in phases if isa is None or p.isa == isa]
+
+    def main_group(self):
+        root = self.root
+        return self.objects.get(root.main_group) if root is not None else None
+
+    def group_for_path(self, path):
+        """
+        Find a group by walking `path` ("on brand/Features/Developer")
+        down from the main group, matching each component against the
+        child groups' path or name. Returns None when any step is missing.
+        """
+        group = self.main_group()
+        for component in (c for c in str(path).split("/") if c):
+            if group is None:
+                return None
+            group = next(
+                (
+                    child
+                    for child in (self.objects.get(c) for c in group.children)
+                    if child is not None
+                    and child.isa in _objects.GROUP_ISAS
+                    and component in (child.get("path"), child.get("name"))
+                ),
+                None,
+            )
+        return group
+
+    # -- mutation -------------------------------------------------------
+
+    def _attach(self, obj):
+        obj.project = self
+        self.objects[obj.id] = obj
+        if self._index is not None:
+            self._index.add_object(obj)
+        return obj
+
+    def _will_change(self, obj, key=None):
+        if self._index is not None:
+            self._index.remove_object(obj)
+
+    def _did_change(self, obj, key=None):
+        if self._index is not None:
+            self._index.add_object(obj)
+        if self._membership is not None and obj.isa in _MEMBERSHIP_ISAS:
+            self._membership = None
+        if self._groups is not None:
+            if obj.isa == "PBXProject" or key == "children":
+                self._groups = None
+            else:
+                self._groups.object_changed(obj, key)
+        self._dirty.add(obj.id)
+        if key is None or key in _COMMENT_KEYS:
+            self._renamed.add(obj.id)
+
+    def _list_changed(self, obj, key, added=(), removed=()):
+        if self._index is not None:
+            self._index.list_changed(obj, key, added, removed)
+        if self._membership is not None and obj.isa in _MEMBERSHIP_ISAS:
+            self._membership = None
+        if self._groups is not None and key == "children" and obj.isa in _objects.GROUP_ISAS:
+            self._groups.children_changed(obj, added, removed)
+        self._dirty.add(obj.id)
+        if key == "files":
+            # A build file's comment names the phase that holds it.
+            self._dirty.update(added)
+            self._dirty.update(removed)
+
+    def mark_dirty(self, object_id):
+        """Re-render `object_id` on the next save after editing it in place"""
+        if object_id not in self.objects:
+            raise KeyError(object_id)
+        self._dirty.add(object_id)
+        self._renamed.add(object_id)
+        if self._groups is not None:
+            obj = self.objects[object_id]
+            if obj.isa in _objects.GROUP_ISAS or obj.isa == "PBXProject":
+                self._groups = None  # the children may have changed too
+            else:
+                self._groups.object_changed(obj)
+
+    def add(self, obj):
+        """Insert a new object into the table"""
+        if obj.id in self.objects:
+            raise KeyError(f"Object {obj.id} already exists")
+        self._dirty.add(obj.id)
+        return self._attach(obj)
+
+    def new_id(self, *key):
+        """
+        A 24-digit hex ID that is neither used in this project nor handed
+        out before. `key` makes the ID reproducible when the allocator is
+        deterministic.
+        """
+        return self.ids.allocate(*key)
+
+    def new_object(self, isa, object_id, **fields):
+        """Create, register and return a typed object"""
+        return self.add(_objects.create(object_id, dict(fields, isa=isa)))
+
+    def remove(self, object_id):
+        """Remove an object from the table (references are left alone)"""
+        obj = self.objects.pop(object_id)
+        if self._index is not None:
+            self._index.remove_object(obj)
+        if self._membership is not None and obj.isa in _MEMBERSHIP_ISAS:
+            self._membership = None
+        if self._groups is not None:
+            self._groups.object_removed(obj)
+        self._dirty.discard(object_id)
+        self._removed.add(object_id)
+        obj.project = None
+        return obj
+
+    def remove_build_file(self, build_file_id):
+        """Remove a PBXBuildFile and its entries in every build phase"""
+        for phase in self.index.phases(build_file_id):
+            while phase.remove_file(build_file_id):
+                pass
+        return self.remove(build_file_id)
+
+    def remove_file_reference(self, file_ref_id):
+        """
+        Remove a file reference together with its build files and its
+        entries in every group. Returns the removed build file IDs.
+        """
+        index = self.index
+        removed = []
+        for build_file in index.build_files(file_ref_id):
+            self.remove_build_file(build_file.id)
+            removed.append(build_file.id)
+        for group_id in list(index.parents.get(file_ref_id, ())):
+            group = self.objects.get(group_id)
+            while group is not None and group.remove_child(file_ref_id):
+                pass
+        self.remove(file_ref_id)
+        return removed
+
+    def remove_file_references(self, file_ref_ids):
+        """
+        remove_file_reference() for many references, rewriting each build
+        phase and group once rather than once per reference. Returns the
+        removed build file IDs.
+        """
+        index = self.index
+        entries = {}  # (phase or group ID, list key) -> IDs to take out
+        removed = []
+        for file_ref_id in file_ref_ids:
+            for build_file in index.build_files(file_ref_id):
+                for phase_id in index.phases_by_build_file.get(build_file.id, ()):
+                    entries.setdefault((phase_id, "files"), set()).add(build_file.id)
+                removed.append(build_file.id)
+            for group_id in index.parents.get(file_ref_id, ()):
+                entries.setdefault((group_id, "children"), set()).add(file_ref_id)
+        for (owner_id, key), ids in entries.items():
+            owner = self.objects.get(owner_id)
+            if owner is not None:
+                owner.remove_references(key, ids)
+        for build_file_id in removed:
+            self.remove(build_file_id)
+        for file_ref_id in file_ref_ids:
+            self.remove(file_ref_id)
+        return removed
@@ -0,0 +1,338 @@
+"""
+Effective build settings without xcodebuild.
+
+Xcode resolves a setting for a target and configuration by stacking, from
+lowest to highest:
+
+1. built-ins (TARGET_NAME, CONFIGURATION, SRCROOT, ...) and `defaults`
+2. the project configuration's xcconfig (baseConfigurationReference)
+3. the project configuration's buildSettings
+4. the target configuration's xcconfig
+5. the target configuration's buildSettings
+
+Each assignment's `$(inherited)` stands for the value below it; inside an
+xcconfig (and the files it #includes) that is the previous assignment of
+the same setting. Other `$(VAR)` / `${VAR}` references are expanded late,
+against the final values of the same target and configuration, and may
+use the usual operators (`$(PRODUCT_NAME:lower)`, `$(FOO:default=bar)`).
+Conditional assignments (`KEY[sdk=iphoneos*]`) apply when the matching
+condition is passed in `conditions`.
+
+    settings = BuildSettings(project)
+    settings.get("on brand", "Debug", "PRODUCT_BUNDLE_IDENTIFIER")
+    settings.scope("on brand", "Release").all()
+
+xcconfig files are parsed once per resolver, the stack of each target and
+configuration is built once, and every expanded value is memoized in its
+scope, so dumping every setting of every target and configuration is a
+single pass over the assignments. A BuildSettings is a snapshot: create a
+new one after editing the project or its xcconfig files.
+"""
+
+import fnmatch
+import os
+import posixpath
+import re
+
+# Assignment in an xcconfig: KEY[cond=value]... = value
+_ASSIGNMENT_RE = re.compile(r"^\s*([A-Za-z_][A-Za-z0-9_]*)((?:\[[^\]]*\])*)\s*=(.*)$")
+_CONDITION_RE = re.compile(r"\[([^=\]]+)=([^\]]*)\]")
+_INCLUDE_RE = re.compile(r'^\s*#include(\??)\s+"([^"]*)"')
+# Innermost reference: $(NAME...), ${NAME...} or $NAME.
+_REFERENCE_RE = re.compile(r"\$(?:\(([^()$]*)\)|\{([^{}$]*)\}|([A-Za-z_][A-Za-z0-9_]*))")
+_INHERITED_RE = re.compile(r"\$(?:\(inherited\)|\{inherited\}|inherited\b)")
+_NON_IDENTIFIER_RE = re.compile(r"[^A-Za-z0-9_]")
+_NON_RFC1034_RE = re.compile(r"[^A-Za-z0-9.-]")
+
+# Passes over a value before giving up on nested references.
+_MAX_EXPANSION_DEPTH = 32
+
+
+def _split_key(key):
+    """("KEY", ((condition, pattern), ...)) for "KEY[sdk=iphoneos*]" """
+    name, bracket, rest = key.partition("[")
+    if not bracket:
+        return key, ()
+    return name.strip(), tuple((c.strip(), v.strip()) for c, v in _CONDITION_RE.findall(bracket + rest))
+
+
+def _stringify(value):
+    """A pbxproj setting value as xcconfig text (lists are space-separated)"""
+    if isinstance(value, list):
+        return " ".join(f'"{item}"' if " " in item and not item.startswith('"') else item for item in value)
+    return value if isinstance(value, str) else str(value)
+
+
+def parse_xcconfig(text):
+    """[(line number, key, conditions, value) or (line number, "#include", optional, path)]"""
+    entries = []
+    for number, line in enumerate(text.splitlines(), 1):
+        include = _INCLUDE_RE.match(line)
+        if include:
+            entries.append((number, "#include", bool(include.group(1)), include.group(2)))
+            continue
+        # Xcode reads "//" as a comment anywhere on the line, URLs included.
+        line = line.split("//", 1)[0]
+        match = _ASSIGNMENT_RE.match(line)
+        if match is None:
+            continue
+        value = match.group(3).strip()
+        if value.endswith(";"):
+            value = value[:-1].rstrip()
+        conditions = tuple((c.strip(), v.strip()) for c, v in _CONDITION_RE.findall(match.group(2)))
+        entries.append((number, match.group(1), conditions, value))
+    return entries
+
+
+def _transform(value, operator):
+    name, _, argument = operator.partition("=")
+    if name == "lower":
+        return value.lower()
+    if name == "upper":
+        return value.upper()
+    if name == "base":
+        return posixpath.splitext(posixpath.basename(value))[0]
+    if name == "file":
+        return posixpath.basename(value)
+    if name == "dir":
+        return posixpath.dirname(value)
+    if name == "suffix":
+        return posixpath.splitext(value)[1]
+    if name == "standardizepath":
+        return posixpath.normpath(value) if value else value
+    if name == "default":
+        return value or argument
+    if name == "quote":
+        return value.replace("\\", "\\\\").replace(" ", "\\ ")
+    if name == "identifier" or name == "c99extidentifier":
+        return _NON_IDENTIFIER_RE.sub("_", value)
+    if name == "rfc1034identifier":
+        return _NON_RFC1034_RE.sub("-", value)
+    return value
+
+
+class Scope:
+    """Effective settings of one target (or the project) in one configuration"""
+
+    def __init__(self, resolver, stacks, label):
+        self.resolver = resolver
+        self.stacks = stacks  # key -> [raw values, lowest first]
+        self.label = label
+        self._composed = {}
+        self._values = {}
+        self._evaluating = set()
+
+    def __contains__(self, key):
+        return key in self.stacks
+
+    def keys(self):
+        return sorted(self.stacks)
+
+    def raw(self, key):
+        """The value with `$(inherited)` folded in but no other reference expanded"""
+        composed = self._composed.get(key)
+        if composed is None:
+            composed = ""
+            for value in self.stacks.get(key, ()):
+                if "inherited" in value:
+                    value = _INHERITED_RE.sub(lambda _: composed, value).strip()
+                composed = value
+            self._composed[key] = composed
+        return composed
+
+    def get(self, key, default=""):
+        """The expanded value of `key` (memoized); `default` when it is not set"""
+        if key in self._values:
+            return self._values[key]
+        if key not in self.stacks:
+            return default
+        if key in self._evaluating:
+            self.resolver.problems.append(f"{self.label}: {key} refers to itself")
+            return ""
+        self._evaluating.add(key)
+        try:
+            value = self.expand(self.raw(key))
+        finally:
+            self._evaluating.discard(key)
+        self._values[key] = value
+        return value
+
+    def __getitem__(self, key):
+        if key not in self.stacks:
+            raise KeyError(key)
+        return self.get(key)
+
+    def expand(self, text):
+        """`text` with every build setting reference replaced by its value"""
+        for _ in range(_MAX_EXPANSION_DEPTH):
+            if "$" not in text:
+                return text
+            expanded = _REFERENCE_RE.sub(self._substitute, text)
+            if expanded == text:
+                return text
+            text = expanded
+        self.resolver.problems.append(f"{self.label}: references nested too deeply in {text!r}")
+        return text
+
+    def _substitute(self, match):
+        reference = match.group(1) or match.group(2) or match.group(3) or ""
+        name, *operators = reference.split(":")
+        value = self.get(name)
+        for operator in operators:
+            value = _transform(value, operator)
+        return value
+
+    def all(self):
+        """{key: expanded value} for every setting in scope"""
+        return {key: self.get(key) for key in self.keys()}
+
+
+class BuildSettings:
+    """Resolves build settings per target and configuration from the project and its xcconfigs"""
+
+    def __init__(self, project, defaults=None, conditions=None, base_dir=None):
+        self.project = project
+        self.defaults = dict(defaults or {})
+        self.conditions = dict(conditions or {})
+        if base_dir is None and project.path is not None:
+            base_dir = project.path.parent.parent
+        self.base_dir = str(base_dir) if base_dir is not None else None
+        self.problems = []
+        self._files = {}    # path -> flattened [(key, conditions, value)]
+        self._layers = {}   # configuration ID -> [(key, conditions, value)]
+        self._scopes = {}   # (target ID, configuration name) -> Scope
+
+    # -- inputs ---------------------------------------------------------
+
+    def _config_list(self, owner):
+        config_list = self.project.get(owner.get("buildConfigurationList")) if owner is not None else None
+        if config_list is None:
+            return {}
+        configs = (self.project.get(c) for c in config_list.get("buildConfigurations", ()))
+        return {c.get("name"): c for c in configs if c is not None}
+
+    def configurations(self):
+        """Configuration names of the project, in order"""
+        return list(self._config_list(self.project.root))
+
+    def xcconfig(self, path, _including=()):
+        """Assignments of the xcconfig at `path` with its includes inlined (memoized)"""
+        path = os.path.normpath(path)
+        cached = self._files.get(path)
+        if cached is not None:
+            return cached
+        if path in _including:
+            self.problems.append(f"{path}: #include cycle")
+            return []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError as e:
+            self.problems.append(f"{path}: {e.strerror or e}")
+            return []
+        assignments = []
+        for number, key, conditions, value in parse_xcconfig(text):
+            if key == "#include":
+                included = os.path.join(os.path.dirname(path), value) if not os.path.isabs(value) else value
+                if conditions and not os.path.exists(included):
+                    continue  # #include? of a missing file
+                assignments.extend(self.xcconfig(included, (*_including, path)))
+            else:
+                assignments.append((key, conditions, value))
+        self._files[path] = assignments
+        return assignments
+
+    def _layer(self, config):
+        """Assignments of one XCBuildConfiguration: its xcconfig, then its buildSettings"""
+        layer = self._layers.get(config.id)
+        if layer is not None:
+            return layer
+        layer = []
+        base_ref = config.get("baseConfigurationReference")
+        if base_ref is not None:
+            path = self.project.groups.absolute_path(base_ref)
+            if path is None:
+                self.problems.append(f"configuration {config.get('name')}: cannot locate xcconfig {base_ref}")
+            else:
+                layer.extend(self.xcconfig(path))
+        unconditional, conditional = [], []
+        for key, value in (config.get("buildSettings") or {}).items():
+            name, conditions = _split_key(key)
+            (conditional if conditions else unconditional).append((name, conditions, _stringify(value)))
+        layer.extend(unconditional)
+        layer.extend(conditional)
+        self._layers[config.id] = layer
+        return layer
+
+    def _matches(self, conditions, configuration):
+        for condition, pattern in conditions:
+            given = configuration if condition == "config" else self.conditions.get(condition)
+            if given is None or not fnmatch.fnmatchcase(given, pattern):
+                return False
+        return True
+
+    def _builtins(self, target, configuration):
+        project = self.project
+        builtins = {"CONFIGURATION": configuration}
+        if project.name:
+            builtins["PROJECT_NAME"] = project.name
+        if self.base_dir is not None:
+            builtins["SRCROOT"] = builtins["PROJECT_DIR"] = builtins["SOURCE_ROOT"] = self.base_dir
+        if project.path is not None:
+            builtins["PROJECT_FILE_PATH"] = str(project.path.parent)
+        if target is not None:
+            builtins["TARGET_NAME"] = target.name
+        return builtins
+
+    # -- queries --------------------------------------------------------
+
+    def _target(self, target):
+        if target is None or hasattr(target, "id"):
+            return target
+        found = self.project.target_named(target)
+        if found is None:
+            raise KeyError(f"target {target!r} not found")
+        return found
+
+    def scope(self, target=None, configuration="Debug"):
+        """The Scope of `target` (a name or object; None for the project) in `configuration`"""
+        target = self._target(target)
+        key = (target.id if target is not None else None, configuration)
+        scope = self._scopes.get(key)
+        if scope is not None:
+            return scope
+        owners = [self.project.root] + ([target] if target is not None else [])
+        configs = []
+        for owner in owners:
+            config = self._config_list(owner).get(configuration)
+            if config is None and owner is target:
+                raise KeyError(f"target {target.name!r} has no configuration {configuration!r}")
+            if config is not None:
+                configs.append(config)
+        if not configs:
+            raise KeyError(f"project has no configuration {configuration!r}")
+        stacks = {}
+        for name, value in {**self.defaults, **self._builtins(target, configuration)}.items():
+            stacks[name] = [str(value)]
+        for config in configs:
+            for name, conditions, value in self._layer(config):
+                if conditions and not self._matches(conditions, configuration):
+                    continue
+                stacks.setdefault(name, []).append(value)
+        label = f"{target.name if target is not None else 'project'} ({configuration})"
+        scope = self._scopes[key] = Scope(self, stacks, label)
+        return scope
+
+    def get(self, target, configuration, key, default=""):
+        """Effective value of `key` for `target` in `configuration`"""
+        return self.scope(target, configuration).get(key, default)
+
+    def table(self, targets=None, configurations=None):
+        """{(target name, configuration): {key: value}} for every target and configuration"""
+        targets = self.project.targets() if targets is None else [self._target(t) for t in targets]
+        result = {}
+        for target in targets:
+            names = configurations or list(self._config_list(target))
+            for configuration in names:
+                result[(target.name, configuration)] = self.scope(target, configuration).all()
+        return result
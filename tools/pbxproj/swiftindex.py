@@ -0,0 +1,261 @@
+"""
+Index of the Swift sources under the app folder.
+
+Scripts that patch Swift files used to decide what to touch by hand:
+fix_contenttab_imports.py listed six paths and grepped them for
+"ContentTab", fix_duplicate_profile_components.py listed the component
+files known to exist twice. build_index() reads every .swift file under
+"on brand/" once and records, per file:
+
+- the modules it imports
+- its top-level declarations (class, struct, enum, protocol, actor,
+  typealias and extension), with their line numbers
+- the capitalised identifiers it uses, comments and string literals
+  excluded, as a cheap stand-in for the types it refers to
+
+    index = build_index(".")
+    index.declarers("ContentTab")       # [Declaration(path, kind, name, line)]
+    index.duplicates()                  # {name: [Declaration, ...]} for types declared in several files
+    index.references_to("ContentTab")   # files using it without declaring it
+
+The index is kept on disk next to the sync cache, keyed by each file's
+mtime and size: later runs stat every file but re-read only those that
+changed, on a process pool when there are enough of them to be worth the
+start-up. Queries run against lookup tables built once per index.
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+from collections import namedtuple
+from pathlib import Path
+
+from .sync import DEFAULT_ROOT, PACKAGE_SUFFIXES
+
+_CACHE_VERSION = 1
+
+# Fewer changed files than this are parsed inline: starting worker
+# processes costs more than scanning the ~120 files of the app.
+_POOL_THRESHOLD = 256
+
+TYPE_KINDS = frozenset({"class", "struct", "enum", "protocol", "actor", "typealias"})
+
+Declaration = namedtuple("Declaration", ["path", "kind", "name", "line"])
+
+# Comments and string literals, blanked out before anything is matched.
+# Multi-line strings come first so `"""` is not read as an empty string.
+_NOISE_RE = re.compile(r'(?=[/"#])(?:/\*.*?\*/|//[^\n]*|#*"""[\s\S]*?"""#*|#*"(?:[^"\\\n]|\\.)*"#*)', re.S)
+_DECLARATION_RE = re.compile(
+    r"^\s*(?:@[A-Za-z_][\w.]*(?:\([^)]*\))?\s+)*"
+    r"(?:(?:public|private|fileprivate|internal|open|package|final|indirect|nonisolated)(?:\([^)]*\))?\s+)*"
+    r"(class|struct|enum|protocol|actor|typealias|extension)\s+([A-Za-z_][\w.]*)"
+)
+_IMPORT_RE = re.compile(r"^\s*(?:@[A-Za-z_]\w*\s+)*import\s+(?:(?:typealias|struct|class|enum|protocol|var|func)\s+)?"
+                        r"([A-Za-z_][\w.]*)")
+_TYPE_NAME_RE = re.compile(r"\b[A-Z][A-Za-z0-9_]*\b")
+
+
+def default_index_path(base_dir, root=DEFAULT_ROOT):
+    """Per-folder index file under $XDG_CACHE_HOME (or ~/.cache)"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    folder = os.path.join(os.path.abspath(base_dir), root)
+    key = hashlib.sha1(folder.encode("utf-8")).hexdigest()[:16]
+    return Path(base) / "pbxproj" / f"swift-index-{key}.json"
+
+
+def _blank(match):
+    # Keep the newlines so line numbers still count.
+    return "\n" * match.group(0).count("\n")
+
+
+def scan_swift(text):
+    """{"imports": [...], "declarations": [[kind, name, line], ...], "references": [...]} for Swift source"""
+    code = _NOISE_RE.sub(_blank, text)
+    imports, declarations = set(), []
+    depth = 0
+    for number, line in enumerate(code.split("\n"), 1):
+        # Imports and the declarations indexed only appear at the top level.
+        if depth <= 0:
+            match = _DECLARATION_RE.match(line)
+            if match is not None:
+                declarations.append([match.group(1), match.group(2), number])
+            elif "import" in line:
+                match = _IMPORT_RE.match(line)
+                if match is not None:
+                    imports.add(match.group(1))
+        depth += line.count("{") - line.count("}")
+    return {
+        "imports": sorted(imports),
+        "declarations": declarations,
+        "references": sorted(set(_TYPE_NAME_RE.findall(code))),
+    }
+
+
+def _scan_file(full_path):
+    """(stamp, record) for one file; runs in the worker processes"""
+    try:
+        with open(full_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            data = f.read()
+    except OSError:
+        return None, None
+    return [stat.st_mtime_ns, stat.st_size], scan_swift(data.decode("utf-8", errors="replace"))
+
+
+def _swift_files(base_dir, root):
+    """{project-relative path: [mtime_ns, size]} for every .swift file under `root`"""
+    found = {}
+    pending = [root]
+    while pending:
+        rel = pending.pop()
+        try:
+            entries = os.scandir(os.path.join(base_dir, rel))
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith("."):
+                    continue
+                path = posixpath.join(rel, name)
+                if entry.is_dir():
+                    if posixpath.splitext(name)[1] not in PACKAGE_SUFFIXES:
+                        pending.append(path)
+                elif name.endswith(".swift"):
+                    stat = entry.stat()
+                    found[path] = [stat.st_mtime_ns, stat.st_size]
+    return found
+
+
+class SwiftIndex:
+    """Declarations, imports and type references of a folder of Swift files"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.files = {}    # project-relative path -> [mtime_ns, size, record]
+        self.parsed = []   # paths read by the last update()
+        self.removed = []  # paths dropped by the last update()
+        self._declarations = None
+        self._referrers = None
+        if self.path is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == _CACHE_VERSION:
+                self.files = data.get("files", {})
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": _CACHE_VERSION, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+    # -- building -------------------------------------------------------
+
+    def update(self, base_dir, root=DEFAULT_ROOT, workers=None):
+        """Re-read the files under `root` whose mtime or size changed; True when anything did"""
+        on_disk = _swift_files(base_dir, root)
+        self.removed = sorted(path for path in self.files if path not in on_disk)
+        for path in self.removed:
+            del self.files[path]
+        self.parsed = sorted(
+            path for path, stamp in on_disk.items()
+            if path not in self.files or self.files[path][:2] != stamp
+        )
+        if not self.parsed and not self.removed:
+            return False
+        full_paths = [os.path.join(base_dir, path) for path in self.parsed]
+        workers = workers or os.cpu_count() or 1
+        pool = None
+        if workers == 1 or len(full_paths) < _POOL_THRESHOLD:
+            results = map(_scan_file, full_paths)
+        else:
+            # Imported here: most runs find nothing to parse.
+            from concurrent.futures import ProcessPoolExecutor
+
+            pool = ProcessPoolExecutor(max_workers=workers)
+            chunk = max(1, len(full_paths) // (workers * 4))
+            results = pool.map(_scan_file, full_paths, chunksize=chunk)
+        try:
+            for path, (stamp, record) in zip(self.parsed, results):
+                if record is None:
+                    self.files.pop(path, None)  # vanished since the walk
+                else:
+                    self.files[path] = [*stamp, record]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self._declarations = self._referrers = None
+        return True
+
+    def _tables(self):
+        if self._declarations is None:
+            declarations, referrers = {}, {}
+            for path in sorted(self.files):
+                record = self.files[path][2]
+                for kind, name, line in record["declarations"]:
+                    declarations.setdefault(name, []).append(Declaration(path, kind, name, line))
+                for name in record["references"]:
+                    referrers.setdefault(name, []).append(path)
+            self._declarations, self._referrers = declarations, referrers
+        return self._declarations, self._referrers
+
+    # -- queries --------------------------------------------------------
+
+    def __len__(self):
+        return len(self.files)
+
+    def declarers(self, name, extensions=False):
+        """Top-level declarations of `name`, in path order; extensions only when asked"""
+        found = self._tables()[0].get(name, ())
+        return [d for d in found if extensions or d.kind != "extension"]
+
+    def extensions_of(self, name):
+        return [d for d in self._tables()[0].get(name, ()) if d.kind == "extension"]
+
+    def duplicates(self):
+        """{type name: declarations} for types declared at top level in more than one file"""
+        duplicates = {}
+        for name, found in self._tables()[0].items():
+            types = [d for d in found if d.kind in TYPE_KINDS]
+            if len({d.path for d in types}) > 1:
+                duplicates[name] = types
+        return dict(sorted(duplicates.items()))
+
+    def references_to(self, name):
+        """Files that use `name` without declaring it"""
+        declaring = {d.path for d in self.declarers(name)}
+        return [path for path in self._tables()[1].get(name, ()) if path not in declaring]
+
+    def imports(self, path):
+        entry = self.files.get(path)
+        return list(entry[2]["imports"]) if entry is not None else []
+
+    def declarations(self, path):
+        """Top-level declarations of one file, in source order"""
+        entry = self.files.get(path)
+        if entry is None:
+            return []
+        return [Declaration(path, kind, name, line) for kind, name, line in entry[2]["declarations"]]
+
+
+def build_index(base_dir, root=DEFAULT_ROOT, use_cache=True, cache_path=None, workers=None):
+    """
+    The SwiftIndex of the .swift files under `root` (relative to
+    `base_dir`), brought up to date and saved. Without `use_cache` every
+    file is read again and nothing is written.
+    """
+    if use_cache:
+        index = SwiftIndex(cache_path or default_index_path(base_dir, root))
+    else:
+        index = SwiftIndex()
+    if index.update(base_dir, root, workers=workers):
+        index.save()
+    return index
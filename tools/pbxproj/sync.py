@@ -0,0 +1,396 @@
+"""
+Filesystem-to-project sync.
+
+sync_project() walks a source directory ("on brand/" by default), compares
+it with the project's group tree and brings the project in line in one
+transaction:
+
+- files on disk without a reference are added to the group for their
+  directory (intermediate groups are created) and to the default build
+  phase of the app target
+- references under the directory whose file no longer exists are removed
+- a removed and an added file with the same name are a move: the reference
+  is moved to the new group and keeps its build files
+- references filed in the wrong group (e.g. "Recovered References") are
+  moved to the group for their directory
+- build files sitting in the wrong kind of phase are moved to the right one
+
+The walk runs os.scandir on a thread pool one directory level at a time.
+Directory listings are cached on disk together with their mtimes: every
+directory is still stat'ed, but only directories whose mtime changed are
+listed again, and when neither the tree nor the project changed since the
+last sync the diff is skipped entirely.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import posixpath
+from pathlib import Path
+
+from .filetypes import default_phase_isa, file_type
+
+DEFAULT_ROOT = "on brand"
+
+# Names never synced: hidden files, tooling and documentation.
+DEFAULT_EXCLUDES = (".*", "Scripts", "*.md", "*.txt", "*.py", "*.sh", "*.lproj", "*.xcodeproj", "*.xcworkspace")
+
+# References kept even when their file is missing: per-environment secrets
+# and Firebase configs are not committed, so most checkouts lack some.
+DEFAULT_KEEP = ("Secrets*.xcconfig", "GoogleService-Info*.plist")
+
+# Directories Xcode treats as a single file.
+PACKAGE_SUFFIXES = frozenset({".xcassets", ".framework", ".xcframework", ".bundle", ".xcdatamodeld", ".scnassets"})
+
+# Path components whose files belong to a test target, not the app.
+_TEST_DIR_SUFFIX = "Tests"
+
+_CACHE_VERSION = 1
+
+
+def default_cache_path(project_path):
+    """Per-project cache file under $XDG_CACHE_HOME (or ~/.cache)"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    key = hashlib.sha1(str(Path(project_path).resolve()).encode("utf-8")).hexdigest()[:16]
+    return Path(base) / "pbxproj" / f"sync-{key}.json"
+
+
+class DirectoryCache:
+    """Directory listings keyed by path, valid while the mtime matches"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.dirs = {}
+        self.project_stamp = None
+        self.settings = None
+        if self.path is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == _CACHE_VERSION:
+                self.dirs = {k: (v[0], v[1], v[2]) for k, v in data.get("dirs", {}).items()}
+                self.project_stamp = data.get("project")
+                self.settings = data.get("settings")
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": _CACHE_VERSION,
+            "project": self.project_stamp,
+            "settings": self.settings,
+            "dirs": {k: list(v) for k, v in self.dirs.items()},
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+
+def _excluded(path, excludes):
+    """Patterns match either the file name or the project-relative path"""
+    name = posixpath.basename(path)
+    return any(fnmatch.fnmatchcase(name, p) or fnmatch.fnmatchcase(path, p) for p in excludes)
+
+
+def _is_package(name):
+    return posixpath.splitext(name)[1] in PACKAGE_SUFFIXES
+
+
+def scan_tree(base_dir, root, excludes=DEFAULT_EXCLUDES, cache=None, workers=8):
+    """
+    Walk `root` (relative to `base_dir`). Returns (files, dirs, changed):
+    project-relative POSIX paths of every file and directory that is not
+    excluded, and whether any listing differed from the cache.
+    """
+    cache = cache if cache is not None else DirectoryCache()
+    files, dirs = set(), set()
+    changed = False
+
+    def listing(rel):
+        full = os.path.join(base_dir, rel)
+        try:
+            mtime = os.stat(full).st_mtime_ns
+        except OSError:
+            return rel, None, False
+        cached = cache.dirs.get(rel)
+        if cached is not None and cached[0] == mtime:
+            return rel, cached, False
+        names, subdirs = [], []
+        with os.scandir(full) as entries:
+            for entry in entries:
+                if entry.is_dir() and not _is_package(entry.name):
+                    subdirs.append(entry.name)
+                else:
+                    names.append(entry.name)
+        return rel, (mtime, sorted(names), sorted(subdirs)), True
+
+    seen = set()
+    level = [root]
+    # Imported here: concurrent.futures costs more to import than a cached
+    # sync takes, and pbxtool loads this module for its defaults alone.
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while level:
+            next_level = []
+            for rel, entry, fresh in pool.map(listing, level):
+                if entry is None:
+                    changed = changed or rel in cache.dirs
+                    continue
+                seen.add(rel)
+                cache.dirs[rel] = entry
+                changed = changed or fresh
+                dirs.add(rel)
+                for name in entry[1]:
+                    path = posixpath.join(rel, name)
+                    if not _excluded(path, excludes):
+                        files.add(path)
+                for name in entry[2]:
+                    path = posixpath.join(rel, name)
+                    if not _excluded(path, excludes):
+                        next_level.append(path)
+            level = next_level
+    # Forget directories that disappeared under the root.
+    for rel in [r for r in cache.dirs if (r == root or r.startswith(root + "/")) and r not in seen]:
+        del cache.dirs[rel]
+        changed = True
+    return files, dirs, changed
+
+
+def _under(path, root):
+    return path == root or path.startswith(root + "/")
+
+
+def _default_target(project):
+    targets = project.targets()
+    for target in targets:
+        if target.get("productType") == "com.apple.product-type.application":
+            return target
+    return targets[0] if targets else None
+
+
+class TargetRules:
+    """
+    Decides which target a new file joins: `target` (a name; the app
+    target by default), unless the file is not built, lives in a "*Tests"
+    directory, or the target already builds a file with the same name.
+    """
+
+    def __init__(self, project, target=None):
+        self.target = project.target_named(target) if target else _default_target(project)
+        if target and self.target is None:
+            raise ValueError(f"target {target!r} not found")
+        self.built_names = set()
+        if self.target is not None:
+            for phase in project.build_phases(self.target):
+                for build_file_id in phase.files:
+                    build_file = project.get(build_file_id)
+                    ref = project.get(build_file.file_ref) if build_file is not None else None
+                    if ref is not None and ref.get("path"):
+                        self.built_names.add(posixpath.basename(ref.get("path")))
+
+    def targets_for(self, path):
+        """Target names for a new file, or None when its name collides"""
+        if self.target is None or default_phase_isa(path) is None:
+            return []
+        if any(c.endswith(_TEST_DIR_SUFFIX) for c in path.split("/")[:-1]):
+            return []
+        name = posixpath.basename(path)
+        if name in self.built_names:
+            # Xcode refuses two build inputs with one output name.
+            return None
+        self.built_names.add(name)
+        return [self.target.name]
+
+    def forget(self, path):
+        """A built file was removed, so its name is free again"""
+        self.built_names.discard(posixpath.basename(path))
+
+
+class SyncPlan:
+    """What a sync changes (or would change, for a dry run)"""
+
+    def __init__(self):
+        self.added = []       # (path, target names)
+        self.removed = []     # (file ref ID, path)
+        self.moved = []       # (file ref ID, old path, new path)
+        self.regrouped = []   # (file ref ID, path)
+        self.rephased = []    # (file ref ID, path)
+        self.new_groups = []  # dirs
+        self.conflicts = []   # paths added without a target: same name already built
+        self.skipped = False  # nothing changed since the last sync
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.moved or self.regrouped or self.rephased)
+
+    def to_dict(self):
+        return {
+            "added": [{"path": p, "targets": t} for p, t in self.added],
+            "removed": [{"id": i, "path": p} for i, p in self.removed],
+            "moved": [{"id": i, "from": old, "to": new} for i, old, new in self.moved],
+            "regrouped": [{"id": i, "path": p} for i, p in self.regrouped],
+            "rephased": [{"id": i, "path": p} for i, p in self.rephased],
+            "new_groups": list(self.new_groups),
+            "conflicts": list(self.conflicts),
+            "skipped": self.skipped,
+        }
+
+
+def _project_stamp(project):
+    if project.path is None:
+        return None
+    try:
+        stat = os.stat(project.path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _pair_moves(plan, new_paths):
+    """
+    Turn a stale reference and a new file with the same name, when neither
+    name is ambiguous, into a move out of plan.removed
+    """
+    stale = {}
+    for ref_id, path in plan.removed:
+        stale.setdefault(posixpath.basename(path), []).append((ref_id, path))
+    new = {}
+    for path in new_paths:
+        new.setdefault(posixpath.basename(path), []).append(path)
+    moved = set()
+    for name, candidates in stale.items():
+        if len(candidates) == 1 and len(new.get(name, ())) == 1:
+            ref_id, old = candidates[0]
+            plan.moved.append((ref_id, old, new[name][0]))
+            moved.add(ref_id)
+    plan.moved.sort(key=lambda m: m[2])
+    plan.removed = [(ref_id, path) for ref_id, path in plan.removed if ref_id not in moved]
+
+
+def sync_project(project, root=DEFAULT_ROOT, excludes=DEFAULT_EXCLUDES, keep=DEFAULT_KEEP, target=None,
+                 remove_stale=True, regroup=True, dry_run=False, cache_path=None, use_cache=True, workers=8,
+                 save=True):
+    """
+    Sync the project with the files under `root` (relative to the folder
+    holding the .xcodeproj) and save it once. New files join `target` (a
+    name; the app target by default) unless they live in a "*Tests"
+    directory or a file of the same name is already built by the target.
+    Missing files matching `keep`, or used as a configuration's xcconfig,
+    are never removed. Returns the SyncPlan; with `dry_run` nothing is
+    changed. With `save=False` the edits are only applied in memory and
+    the caller saves. A `root` that is not a directory is a ValueError.
+    """
+    if project.path is None:
+        raise ValueError("sync needs a project loaded from disk")
+    base_dir = project.path.parent.parent
+    root = posixpath.normpath(root)
+    if not os.path.isdir(os.path.join(base_dir, root)):
+        # Scanning nothing would read as "every file was deleted".
+        raise ValueError(f"{root}: no such directory in {base_dir}")
+    settings = {"root": root, "excludes": list(excludes), "keep": list(keep), "target": target,
+                "remove_stale": remove_stale, "regroup": regroup}
+    if use_cache:
+        cache = DirectoryCache(cache_path or default_cache_path(project.path.parent))
+    else:
+        cache = DirectoryCache()
+    plan = SyncPlan()
+
+    files, dirs, changed = scan_tree(base_dir, root, excludes, cache, workers)
+    # The stamp is of the file on disk, so it says nothing about edits
+    # still in memory.
+    if (not changed and not project.modified and cache.settings == settings
+            and cache.project_stamp == _project_stamp(project)):
+        plan.skipped = True
+        return plan
+
+    layout = project.groups
+    referenced = {}
+    for ref_id, path in layout.file_paths.items():
+        if _under(path, root):
+            referenced.setdefault(path, []).append(ref_id)
+
+    config_files = {
+        obj.get("baseConfigurationReference") for obj in project.objects_of("XCBuildConfiguration")
+    }
+
+    for path, ref_ids in sorted(referenced.items()):
+        exists = path in files or path in dirs
+        if not exists:
+            parts = path.split("/")
+            if any(_excluded("/".join(parts[:i]), excludes) for i in range(1, len(parts) + 1)):
+                continue  # not scanned, so not known to be stale
+            if _excluded(path, keep) or not remove_stale or os.path.exists(os.path.join(base_dir, path)):
+                continue
+            plan.removed.extend((ref_id, path) for ref_id in ref_ids if ref_id not in config_files)
+            continue
+        for ref_id in ref_ids:
+            # A reference whose path climbs through directories (as in
+            # "Recovered References") resolves to the right file but is
+            # shown outside the group for its directory.
+            parent = project.index.parent(ref_id)
+            if regroup and parent is not None and layout.group_dirs.get(parent.id) != posixpath.dirname(path):
+                plan.regrouped.append((ref_id, path))
+            ref = project[ref_id]
+            expected = default_phase_isa(ref.get("path") or "", ref.get("lastKnownFileType"))
+            phases = [p for bf in project.index.build_files(ref_id) for p in project.index.phases(bf.id)]
+            if any(p.isa != expected for p in phases):
+                plan.rephased.append((ref_id, path))
+
+    new_paths = sorted(files - referenced.keys())
+    _pair_moves(plan, new_paths)
+    moved_to = {new for _, _, new in plan.moved}
+    # Names of removed files are free again before new files are placed,
+    # or a file moved next to a name clash would lose its target.
+    rules = TargetRules(project, target)
+    for _, path in plan.removed:
+        rules.forget(path)
+    for path in new_paths:
+        if path in moved_to:
+            continue
+        targets = rules.targets_for(path)
+        if targets is None:
+            plan.conflicts.append(path)
+        plan.added.append((path, targets or []))
+
+    if dry_run or not plan:
+        if not dry_run:
+            cache.project_stamp = _project_stamp(project)
+            cache.settings = settings
+            cache.save()
+        return plan
+
+    # New groups are queued on the transaction too, so a sync that fails
+    # its checks leaves the project as it was. They come first, so a new
+    # group lists its subgroups before its files.
+    tx = project.transaction()
+    groups = {}
+    for path in [p for p, _ in plan.added] + [p for _, _, p in plan.moved] + [p for _, p in plan.regrouped]:
+        directory = posixpath.dirname(path)
+        if directory not in groups:
+            groups[directory] = layout.ensure_group(directory, plan.new_groups, tx=tx)
+    for path, targets in plan.added:
+        tx.add_file(posixpath.basename(path), groups[posixpath.dirname(path)], targets=targets,
+                    last_known_file_type=file_type(path))
+    for ref_id, _ in plan.removed:
+        tx.remove_file(ref_id)
+    for ref_id, _, path in plan.moved:
+        tx.reparent(ref_id, groups[posixpath.dirname(path)], path=posixpath.basename(path))
+    for ref_id, path in plan.regrouped:
+        tx.reparent(ref_id, groups[posixpath.dirname(path)], path=posixpath.basename(path))
+    for ref_id, _ in plan.rephased:
+        tx.fix_build_phases(ref_id)
+    if not save:
+        # The project file is rewritten later, so there is no stamp to record.
+        tx.apply()
+        return plan
+    tx.commit()
+
+    cache.project_stamp = _project_stamp(project)
+    cache.settings = settings
+    cache.save()
+    return plan
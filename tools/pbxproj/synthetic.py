@@ -0,0 +1,230 @@
+"""
+Synthetic projects for benchmarks.
+
+generate() builds a project shaped like this one at any size: an app
+target plus unit and UI test targets (and app extensions beyond three
+targets), a PBXGroup tree nested `depth` folders deep, mostly Swift
+sources with some resources, and a configurable share of the mess real
+projects accumulate (duplicate references, doubled build files and group
+entries) so dedupe has work to do. Output is deterministic for a seed.
+
+    synthetic = generate(files=10_000, seed=1)
+    materialize("/tmp/bench", synthetic)   # project file plus the files on disk
+"""
+
+import os
+import random
+from collections import namedtuple
+
+from .project import PBXProj
+from .writer import dumps
+
+# (extension, lastKnownFileType, phase, weight)
+_FILE_KINDS = [
+    (".swift", "sourcecode.swift", "PBXSourcesBuildPhase", 85),
+    (".json", "text.json", "PBXResourcesBuildPhase", 4),
+    (".png", "image.png", "PBXResourcesBuildPhase", 5),
+    (".strings", "text.plist.strings", "PBXResourcesBuildPhase", 2),
+    (".storyboard", "file.storyboard", "PBXResourcesBuildPhase", 1),
+    (".m", "sourcecode.c.objc", "PBXSourcesBuildPhase", 2),
+    (".h", "sourcecode.c.h", None, 1),
+]
+
+_FOLDER_NAMES = ["Views", "Models", "Services", "Components", "Screens", "Helpers", "Cells", "Storage"]
+_FILE_STEMS = ["View", "Model", "Service", "Manager", "Cell", "Store", "Router", "Helper", "ViewModel"]
+
+_PRODUCT_TYPES = {
+    "app": ("com.apple.product-type.application", "wrapper.application", ".app"),
+    "unit": ("com.apple.product-type.bundle.unit-test", "wrapper.cfbundle", ".xctest"),
+    "ui": ("com.apple.product-type.bundle.ui-testing", "wrapper.cfbundle", ".xctest"),
+    "extension": ("com.apple.product-type.app-extension", "wrapper.app-extension", ".appex"),
+}
+
+# `paths`: project-relative paths of every referenced file (with duplicates
+# collapsed); `targets`: target names, app first.
+SyntheticProject = namedtuple("SyntheticProject", ["text", "paths", "targets", "object_count"])
+
+
+class _Builder:
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.objects = {}
+        self.used = set()
+
+    def new_id(self):
+        while True:
+            object_id = f"{self.random.getrandbits(96):024X}"
+            if object_id not in self.used:
+                self.used.add(object_id)
+                return object_id
+
+    def add(self, isa, **fields):
+        object_id = self.new_id()
+        self.objects[object_id] = dict(fields, isa=isa)
+        return object_id
+
+    def group(self, path):
+        return self.add("PBXGroup", children=[], path=path, sourceTree="<group>")
+
+    def config_list(self, settings):
+        configs = [
+            self.add("XCBuildConfiguration", name=name, buildSettings=dict(settings, SWIFT_OPTIMIZATION_LEVEL=opt))
+            for name, opt in (("Debug", "-Onone"), ("Release", "-O"))
+        ]
+        return self.add("XCConfigurationList", buildConfigurations=configs, defaultConfigurationIsVisible="0",
+                        defaultConfigurationName="Release")
+
+
+def _folder_tree(rng, folders, depth):
+    """[(relative dir, level)] with `folders` entries at most `depth` deep"""
+    tree = [("", 0)]
+    counters = {}
+    while len(tree) < folders:
+        parent, level = tree[rng.randrange(len(tree))]
+        if level >= depth:
+            continue
+        counters[parent] = counters.get(parent, 0) + 1
+        n = counters[parent]
+        if level == 0:
+            name = f"Feature{n}"
+        else:
+            name = _FOLDER_NAMES[(n - 1) % len(_FOLDER_NAMES)] + (str(n // len(_FOLDER_NAMES)) if n > 8 else "")
+        tree.append((f"{parent}/{name}" if parent else name, level + 1))
+    return tree
+
+
+def _pick_kind(rng):
+    total = sum(k[3] for k in _FILE_KINDS)
+    roll = rng.randrange(total)
+    for kind in _FILE_KINDS:
+        roll -= kind[3]
+        if roll < 0:
+            return kind
+    return _FILE_KINDS[0]
+
+
+def generate(files=1000, targets=3, depth=5, seed=0, duplicate_rate=0.01, name="Synthetic"):
+    """Build a project with about `files` file references; returns a SyntheticProject"""
+    b = _Builder(seed)
+    rng = b.random
+    target_kinds = ["app", "unit", "ui"][:max(1, targets)] + ["extension"] * max(0, targets - 3)
+    suffixes = {"app": "", "unit": "Tests", "ui": "UITests"}
+    target_names = [name + suffixes.get(kind, f"Ext{i - 2}") for i, kind in enumerate(target_kinds)]
+
+    # Share of the files each target owns: tests and extensions get a little.
+    shares = [1.0] + [0.05 if k == "unit" else 0.02 for k in target_kinds[1:]]
+    scale = sum(shares)
+    counts = [max(1, int(files * s / scale)) for s in shares]
+    counts[0] += files - sum(counts)
+
+    main_children = []
+    product_ids = []
+    target_ids = []
+    paths = []
+    for target_name, kind, count in zip(target_names, target_kinds, counts):
+        phases = {isa: b.add(isa, buildActionMask="2147483647", files=[], runOnlyForDeploymentPostprocessing="0")
+                  for isa in ("PBXSourcesBuildPhase", "PBXFrameworksBuildPhase", "PBXResourcesBuildPhase")}
+        folders = _folder_tree(rng, max(1, count // 8), depth if kind == "app" else 2)
+        groups = {}
+        for rel, _ in folders:
+            groups[rel] = b.group(rel.rpartition("/")[2] if rel else target_name)
+            if rel:
+                b.objects[groups[rel.rpartition("/")[0]]]["children"].append(groups[rel])
+        main_children.append(groups[""])
+        leaf_dirs = [rel for rel, level in folders if level > 0] or [""]
+        for n in range(count):
+            folder = leaf_dirs[rng.randrange(len(leaf_dirs))]
+            ext, file_type, phase_isa, _ = _pick_kind(rng)
+            stem = _FILE_STEMS[n % len(_FILE_STEMS)]
+            file_name = f"{stem}{n}{ext}" if kind == "app" else f"{stem}{n}Tests{ext}"
+            ref = b.add("PBXFileReference", lastKnownFileType=file_type, path=file_name, sourceTree="<group>")
+            b.objects[groups[folder]]["children"].append(ref)
+            paths.append("/".join(p for p in (target_name, folder, file_name) if p))
+            if phase_isa is not None:
+                b.objects[phases[phase_isa]]["files"].append(b.add("PBXBuildFile", fileRef=ref))
+        if kind == "app":
+            assets = b.add("PBXFileReference", lastKnownFileType="folder.assetcatalog", path="Assets.xcassets",
+                           sourceTree="<group>")
+            plist = b.add("PBXFileReference", lastKnownFileType="text.plist.xml", path="Info.plist",
+                          sourceTree="<group>")
+            b.objects[groups[""]]["children"].extend([assets, plist])
+            b.objects[phases["PBXResourcesBuildPhase"]]["files"].append(b.add("PBXBuildFile", fileRef=assets))
+            paths.extend([f"{target_name}/Assets.xcassets", f"{target_name}/Info.plist"])
+            app_phases = phases
+
+        product_type, wrapper, suffix = _PRODUCT_TYPES[kind]
+        product = b.add("PBXFileReference", explicitFileType=wrapper, includeInIndex="0",
+                        path=f"{target_name}{suffix}", sourceTree="BUILT_PRODUCTS_DIR")
+        product_ids.append(product)
+        settings = {"PRODUCT_BUNDLE_IDENTIFIER": f"com.example.{target_name}", "PRODUCT_NAME": "$(TARGET_NAME)",
+                    "SWIFT_VERSION": "5.0"}
+        if kind == "app":
+            settings["INFOPLIST_FILE"] = f"{target_name}/Info.plist"
+        target_ids.append(b.add(
+            "PBXNativeTarget", buildConfigurationList=b.config_list(settings),
+            buildPhases=list(phases.values()), buildRules=[], dependencies=[], name=target_name,
+            productName=target_name, productReference=product, productType=product_type,
+        ))
+
+    # Accumulated mess for dedupe: duplicate references with their own
+    # build file, build files listed twice and group entries listed twice.
+    group_ids = [i for i, o in b.objects.items() if o["isa"] == "PBXGroup" and o["children"]]
+    build_files = app_phases["PBXSourcesBuildPhase"]
+    for _ in range(int(files * duplicate_rate)):
+        group_id = group_ids[rng.randrange(len(group_ids))]
+        group = b.objects[group_id]
+        original = b.objects.get(group["children"][rng.randrange(len(group["children"]))])
+        if original["isa"] == "PBXFileReference":
+            copy = b.add("PBXFileReference", **{k: v for k, v in original.items() if k != "isa"})
+            group["children"].append(copy)
+            b.objects[build_files]["files"].append(b.add("PBXBuildFile", fileRef=copy))
+        roll = rng.randrange(3)
+        if roll == 0 and b.objects[build_files]["files"]:
+            sources = b.objects[build_files]["files"]
+            sources.append(sources[rng.randrange(len(sources))])
+        elif roll == 1:
+            group["children"].append(group["children"][0])
+
+    products = b.add("PBXGroup", children=product_ids, name="Products", sourceTree="<group>")
+    main_group = b.add("PBXGroup", children=main_children + [products], sourceTree="<group>")
+    attributes = {"BuildIndependentTargetsInParallel": "1", "LastUpgradeCheck": "1520", "TargetAttributes": {
+        t: {"CreatedOnToolsVersion": "15.2"} for t in target_ids}}
+    root = b.add(
+        "PBXProject", attributes=attributes,
+        buildConfigurationList=b.config_list({"SDKROOT": "iphoneos", "IPHONEOS_DEPLOYMENT_TARGET": "17.0"}),
+        compatibilityVersion="Xcode 14.0", developmentRegion="en", hasScannedForEncodings="0",
+        knownRegions=["en", "Base"], mainGroup=main_group, productRefGroup=products, projectDirPath="",
+        projectRoot="", targets=target_ids,
+    )
+    document = {"archiveVersion": "1", "classes": {}, "objectVersion": "56", "objects": b.objects,
+                "rootObject": root}
+    project = PBXProj(document)
+    return SyntheticProject(dumps(project), sorted(set(paths)), target_names, len(b.objects))
+
+
+def materialize(base_dir, synthetic, name="Synthetic", untracked=0.01, missing=0.01, seed=0):
+    """
+    Write `synthetic` to base_dir/<name>.xcodeproj and create empty files
+    for its references, leaving out a `missing` share and adding an
+    `untracked` share of new files, so a sync has work in both directions.
+    Returns the project path.
+    """
+    rng = random.Random(seed)
+    project_dir = os.path.join(base_dir, f"{name}.xcodeproj")
+    os.makedirs(project_dir, exist_ok=True)
+    with open(os.path.join(project_dir, "project.pbxproj"), "w", encoding="utf-8") as f:
+        f.write(synthetic.text)
+    made = set()
+    for path in synthetic.paths:
+        if rng.random() < missing:
+            continue
+        directory = os.path.join(base_dir, os.path.dirname(path))
+        if directory not in made:
+            os.makedirs(directory, exist_ok=True)
+            made.add(directory)
+        open(os.path.join(base_dir, path), "w").close()
+    directories = sorted(made)
+    for n in range(int(len(synthetic.paths) * untracked)):
+        directory = directories[rng.randrange(len(directories))]
+        open(os.path.join(directory, f"Untracked{n}.swift"), "w").close()
+    return project_dir
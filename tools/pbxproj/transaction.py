@@ -0,0 +1,692 @@
+"""
+Batched project edits.
+
+A Transaction queues file and group additions, removals, target
+moves/copies (one file at a time or in bulk), build phase fixes and group
+re-parenting,
+checks all of them against the project (and against each other) before
+touching anything, then applies them in order and saves once with an
+atomic rename:
+
+    project = PBXProj.load("on brand.xcodeproj")
+    with project.transaction() as tx:
+        ref = tx.add_file("FirebaseDeal.swift", "on brand/Features/CreatorRequirements/Models",
+                          targets=["on brand"])
+        tx.move_to_target("FirebaseTestView.swift", "on brand", source_target="on brandTests")
+
+Leaving the `with` block normally commits; an exception discards the queue
+without writing anything.
+"""
+
+import itertools
+import posixpath
+
+from .filetypes import default_phase_isa, file_type
+from .objects import GROUP_ISAS, TARGET_ISAS
+
+
+class TransactionError(Exception):
+    """Raised when queued edits conflict or reference missing objects"""
+
+    def __init__(self, problems):
+        self.problems = list(problems)
+        super().__init__("; ".join(self.problems))
+
+
+class _Plan:
+    """Projected state used to check queued operations against each other"""
+
+    def __init__(self, project):
+        self.project = project
+        self.added = {}          # file ref ID -> (group ID, path)
+        self.added_paths = set() # (group ID, path)
+        self.removed = set()     # file ref IDs
+        self.parents = {}        # object ID -> new parent group ID
+        self.groups = {}         # queued group ID -> name
+        self._child_paths = {}   # group ID -> {path: [child IDs]}, built on first use
+
+    def exists(self, object_id):
+        return (object_id in self.project.objects or object_id in self.added) and object_id not in self.removed
+
+    def child_paths(self, group):
+        """{path: [child IDs]} of the group's current children"""
+        paths = self._child_paths.get(group.id)
+        if paths is None:
+            paths = self._child_paths[group.id] = {}
+            for child_id in group.children:
+                child = self.project.get(child_id)
+                if child is not None:
+                    paths.setdefault(child.get("path"), []).append(child_id)
+        return paths
+
+
+class _Operation:
+    def check(self, tx, plan):
+        return []
+
+    def apply(self, tx):
+        raise NotImplementedError
+
+    def batch_key(self):
+        """Consecutive operations with the same key (None: never) are applied by one apply_batch()"""
+        return None
+
+    @classmethod
+    def apply_batch(cls, tx, ops):
+        for op in ops:
+            op.apply(tx)
+
+
+class _AddFile(_Operation):
+    def __init__(self, file_ref_id, path, group, targets, name, last_known_file_type):
+        self.file_ref_id = file_ref_id
+        self.path = path
+        self.group = group
+        self.targets = targets
+        self.name = name
+        self.last_known_file_type = last_known_file_type
+        self.build_file_ids = {}
+
+    def check(self, tx, plan):
+        problems = []
+        group_id = tx._planned_group_id(self.group, plan)
+        if group_id is None:
+            return [f"add {self.path}: group {self.group!r} not found"]
+        if _taken(tx, plan, group_id, self.path):
+            problems.append(f"add {self.path}: already referenced in group {_group_name(tx, plan, group_id)!r}")
+        key = (group_id, self.path)
+        plan.added_paths.add(key)
+        plan.added[self.file_ref_id] = key
+        phase_isa = default_phase_isa(self.path, self.last_known_file_type)
+        for target_key in self.targets:
+            target = tx._target(target_key)
+            if target is None:
+                problems.append(f"add {self.path}: target {target_key!r} not found")
+            elif phase_isa and not tx.project.build_phases(target, phase_isa):
+                problems.append(f"add {self.path}: target {target.name!r} has no {phase_isa}")
+        return problems
+
+    def apply(self, tx):
+        project = tx.project
+        fields = {"path": self.path, "sourceTree": "<group>"}
+        if self.last_known_file_type:
+            fields["lastKnownFileType"] = self.last_known_file_type
+        if self.last_known_file_type and self.last_known_file_type.startswith("sourcecode."):
+            fields["fileEncoding"] = "4"
+        if self.name:
+            fields["name"] = self.name
+        project.new_object("PBXFileReference", self.file_ref_id, **fields)
+        tx._group(self.group).add_child(self.file_ref_id)
+        phase_isa = default_phase_isa(self.path, self.last_known_file_type)
+        if phase_isa:
+            for target_key in self.targets:
+                target = tx._target(target_key)
+                phase = project.build_phases(target, phase_isa)[0]
+                build_file_id = tx._new_id("PBXBuildFile", target.id, self.file_ref_id)
+                project.new_object("PBXBuildFile", build_file_id, fileRef=self.file_ref_id)
+                phase.add_file(build_file_id)
+                self.build_file_ids[target.id] = build_file_id
+
+
+class _AddGroup(_Operation):
+    def __init__(self, group_id, name, parent):
+        self.group_id = group_id
+        self.name = name
+        self.parent = parent
+
+    def check(self, tx, plan):
+        parent_id = tx._planned_group_id(self.parent, plan)
+        if parent_id is None:
+            return [f"add group {self.name}: group {self.parent!r} not found"]
+        problems = []
+        if _taken(tx, plan, parent_id, self.name):
+            problems.append(f"add group {self.name}: already referenced in group "
+                            f"{_group_name(tx, plan, parent_id)!r}")
+        plan.added_paths.add((parent_id, self.name))
+        plan.groups[self.group_id] = self.name
+        plan.parents[self.group_id] = parent_id
+        return problems
+
+    def apply(self, tx):
+        tx.project.new_object("PBXGroup", self.group_id, children=[], path=self.name, sourceTree="<group>")
+        tx._group(self.parent).add_child(self.group_id)
+
+
+class _RemoveFile(_Operation):
+    def __init__(self, file_ref):
+        self.file_ref = file_ref
+
+    def check(self, tx, plan):
+        file_ref_id = tx._file_ref_id(self.file_ref)
+        if file_ref_id is None:
+            return [tx._missing("remove", self.file_ref)]
+        if file_ref_id in plan.removed:
+            return [f"remove {self.file_ref!r}: already removed in this transaction"]
+        plan.removed.add(file_ref_id)
+        return []
+
+    def apply(self, tx):
+        tx.project.remove_file_reference(tx._file_ref_id(self.file_ref))
+
+    def batch_key(self):
+        return "remove"
+
+    @classmethod
+    def apply_batch(cls, tx, ops):
+        tx.project.remove_file_references([tx._file_ref_id(op.file_ref) for op in ops])
+
+
+class _TargetMembership(_Operation):
+    def __init__(self, file_ref, target, source_target, copy):
+        self.file_ref = file_ref
+        self.target = target
+        self.source_target = source_target
+        self.copy = copy
+
+    @property
+    def verb(self):
+        return "copy" if self.copy else "move"
+
+    def check(self, tx, plan):
+        problems = []
+        file_ref_id = tx._file_ref_id(self.file_ref)
+        if file_ref_id is None:
+            return [tx._missing(self.verb, self.file_ref)]
+        if file_ref_id in plan.removed:
+            problems.append(f"{self.verb} {self.file_ref!r}: file is removed in this transaction")
+        target = tx._target(self.target)
+        if target is None:
+            problems.append(f"{self.verb} {self.file_ref!r}: target {self.target!r} not found")
+        if self.source_target is not None and tx._target(self.source_target) is None:
+            problems.append(f"{self.verb} {self.file_ref!r}: target {self.source_target!r} not found")
+        path = _planned_path(tx, plan, file_ref_id)
+        phase_isa = default_phase_isa(path or "", _planned_type(tx, plan, file_ref_id))
+        if phase_isa is None:
+            problems.append(f"{self.verb} {self.file_ref!r}: file type is not built by any phase")
+        elif target is not None and not tx.project.build_phases(target, phase_isa):
+            problems.append(f"{self.verb} {self.file_ref!r}: target {target.name!r} has no {phase_isa}")
+        return problems
+
+    def apply(self, tx):
+        project = tx.project
+        index = project.index
+        file_ref_id = tx._file_ref_id(self.file_ref)
+        target = tx._target(self.target)
+        file_ref = project[file_ref_id]
+        phase_isa = default_phase_isa(file_ref.get("path") or "", file_ref.get("lastKnownFileType"))
+        destination = project.build_phases(target, phase_isa)[0]
+        if self.copy:
+            source_phases = []
+        elif self.source_target is not None:
+            source_phases = project.build_phases(tx._target(self.source_target), phase_isa)
+        else:
+            source_phases = [
+                phase
+                for other in project.targets()
+                if other is not target
+                for phase in project.build_phases(other, phase_isa)
+            ]
+        build_files = index.build_files(file_ref_id)
+        in_destination = any(destination in index.phases(bf.id) for bf in build_files)
+        for build_file in build_files:
+            phases = index.phases(build_file.id)
+            if not any(p in source_phases for p in phases):
+                continue
+            for phase in source_phases:
+                while phase.remove_file(build_file.id):
+                    pass
+            if in_destination:
+                if not index.phases(build_file.id):
+                    project.remove_build_file(build_file.id)
+            else:
+                # Reuse the build file so its settings travel with it.
+                destination.add_file(build_file.id)
+                in_destination = True
+        if not in_destination:
+            build_file_id = tx._new_id("PBXBuildFile", target.id, file_ref_id)
+            project.new_object("PBXBuildFile", build_file_id, fileRef=file_ref_id)
+            destination.add_file(build_file_id)
+
+    def batch_key(self):
+        return ("membership", _key(self.target), _key(self.source_target), self.copy)
+
+    @classmethod
+    def apply_batch(cls, tx, ops):
+        first = ops[0]
+        _BulkMembership([op.file_ref for op in ops], first.target, first.source_target, first.copy).apply(tx)
+
+
+class _BulkMembership(_Operation):
+    """Many files moved or copied into one target, planned on the membership matrix"""
+
+    def __init__(self, file_refs, target, source_target, copy):
+        self.members = [_TargetMembership(f, target, source_target, copy) for f in file_refs]
+        self.target = target
+        self.source_target = source_target
+        self.copy = copy
+
+    def check(self, tx, plan):
+        problems = []
+        for member in self.members:
+            problems.extend(member.check(tx, plan))
+        return problems
+
+    def apply(self, tx):
+        project = tx.project
+        index = project.index
+        membership = project.membership
+        target = tx._target(self.target)
+        if self.copy:
+            sources = []
+        elif self.source_target is not None:
+            sources = [tx._target(self.source_target)]
+        else:
+            sources = [t for t in project.targets() if t is not target]
+
+        by_isa = {}
+        for member in self.members:
+            file_ref = project[tx._file_ref_id(member.file_ref)]
+            isa = default_phase_isa(file_ref.get("path") or "", file_ref.get("lastKnownFileType"))
+            by_isa.setdefault(isa, []).append(file_ref.id)
+
+        # Plan everything against the matrix first: editing a phase drops it.
+        removals = {}  # phase -> [build file IDs]
+        additions = []  # (destination phase, build file ID or None for a new one, file ref ID)
+        orphans = []
+        for isa, file_ref_ids in by_isa.items():
+            destination = project.build_phases(target, isa)[0]
+            source_phases = {p.id for t in sources for p in project.build_phases(t, isa)}
+            target_bit = membership.target_bit(target)
+            source_bits = 0
+            for source in sources:
+                source_bits |= membership.target_bit(source)
+            for file_ref_id in dict.fromkeys(file_ref_ids):
+                mask = membership.target_mask(file_ref_id, isa)
+                in_destination = bool(mask & target_bit)
+                if in_destination and not mask & source_bits:
+                    continue
+                for build_file in index.build_files(file_ref_id):
+                    phases = index.phases(build_file.id)
+                    leaving = [p for p in phases if p.id in source_phases]
+                    if not leaving:
+                        continue
+                    for phase in leaving:
+                        removals.setdefault(phase, []).append(build_file.id)
+                    if in_destination:
+                        if len(leaving) == len(phases):
+                            orphans.append(build_file.id)
+                    else:
+                        # Reuse the build file so its settings travel with it.
+                        additions.append((destination, build_file.id, file_ref_id))
+                        in_destination = True
+                if not in_destination:
+                    additions.append((destination, None, file_ref_id))
+
+        for phase, build_file_ids in removals.items():
+            phase.remove_references("files", build_file_ids)
+        for build_file_id in orphans:
+            project.remove(build_file_id)
+        for destination, build_file_id, file_ref_id in additions:
+            if build_file_id is None:
+                build_file_id = tx._new_id("PBXBuildFile", target.id, file_ref_id)
+                project.new_object("PBXBuildFile", build_file_id, fileRef=file_ref_id)
+            destination.add_file(build_file_id)
+
+
+class _Reparent(_Operation):
+    def __init__(self, object_id, group, path):
+        self.object_id = object_id
+        self.group = group
+        self.path = path
+
+    def check(self, tx, plan):
+        if not plan.exists(self.object_id):
+            return [f"reparent {self.object_id}: object not found"]
+        group_id = tx._planned_group_id(self.group, plan)
+        if group_id is None:
+            return [f"reparent {self.object_id}: group {self.group!r} not found"]
+        # Refuse to move a group underneath itself.
+        ancestor_id = group_id
+        seen = set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            if ancestor_id == self.object_id:
+                return [f"reparent {self.object_id}: would create a group cycle"]
+            seen.add(ancestor_id)
+            parent_id = plan.parents.get(ancestor_id)
+            if parent_id is None:
+                parent = tx.project.index.parent(ancestor_id)
+                parent_id = parent.id if parent is not None else None
+            ancestor_id = parent_id
+        plan.parents[self.object_id] = group_id
+        return []
+
+    def apply(self, tx):
+        project = tx.project
+        group = tx._group(self.group)
+        parent_ids = list(project.index.parents.get(self.object_id, ()))
+        if parent_ids != [group.id]:
+            # A rename within the same group keeps its place in the list.
+            for parent_id in parent_ids:
+                parent = project.get(parent_id)
+                while parent is not None and parent.remove_child(self.object_id):
+                    pass
+            group.add_child(self.object_id)
+        self._rename(project)
+
+    def _rename(self, project):
+        if self.path is not None:
+            obj = project[self.object_id]
+            obj["path"] = self.path
+            if obj.get("name") == posixpath.basename(self.path):
+                del obj["name"]
+
+    def batch_key(self):
+        return "reparent"
+
+    @classmethod
+    def apply_batch(cls, tx, ops):
+        if len({op.object_id for op in ops}) < len(ops):
+            # Moved twice: the second move starts where the first ended.
+            super().apply_batch(tx, ops)
+            return
+        project = tx.project
+        departures = {}  # parent ID -> IDs leaving it
+        arrivals = []
+        for op in ops:
+            group = tx._group(op.group)
+            parent_ids = project.index.parents.get(op.object_id, ())
+            if list(parent_ids) != [group.id]:
+                for parent_id in parent_ids:
+                    departures.setdefault(parent_id, set()).add(op.object_id)
+                arrivals.append((group, op.object_id))
+        for parent_id, object_ids in departures.items():
+            parent = project.get(parent_id)
+            if parent is not None:
+                parent.remove_references("children", object_ids)
+        for group, object_id in arrivals:
+            group.add_child(object_id)
+        for op in ops:
+            op._rename(project)
+
+
+class _PhasePlacement(_Operation):
+    def __init__(self, file_ref):
+        self.file_ref = file_ref
+
+    def check(self, tx, plan):
+        file_ref_id = tx._file_ref_id(self.file_ref)
+        if file_ref_id is None:
+            return [tx._missing("fix build phases of", self.file_ref)]
+        if file_ref_id in plan.removed:
+            return [f"fix build phases of {self.file_ref!r}: file is removed in this transaction"]
+        return []
+
+    def apply(self, tx):
+        project = tx.project
+        index = project.index
+        file_ref = project[tx._file_ref_id(self.file_ref)]
+        expected = default_phase_isa(file_ref.get("path") or "", file_ref.get("lastKnownFileType"))
+        phase_targets = {
+            phase_id: target
+            for target in project.targets()
+            for phase_id in target.build_phases
+        }
+        for build_file in index.build_files(file_ref.id):
+            for phase in index.phases(build_file.id):
+                if phase.isa == expected:
+                    continue
+                while phase.remove_file(build_file.id):
+                    pass
+                target = phase_targets.get(phase.id)
+                destinations = project.build_phases(target, expected) if target and expected else []
+                if destinations and build_file.id not in destinations[0].files:
+                    destinations[0].add_file(build_file.id)
+            if not index.phases(build_file.id):
+                project.remove(build_file.id)
+
+    def batch_key(self):
+        return "phases"
+
+    @classmethod
+    def apply_batch(cls, tx, ops):
+        project = tx.project
+        index = project.index
+        phase_targets = {
+            phase_id: target
+            for target in project.targets()
+            for phase_id in target.build_phases
+        }
+        removals = {}   # phase -> [build file IDs]
+        additions = []  # (destination phase, build file ID)
+        orphans = []
+        for file_ref_id in dict.fromkeys(tx._file_ref_id(op.file_ref) for op in ops):
+            file_ref = project[file_ref_id]
+            expected = default_phase_isa(file_ref.get("path") or "", file_ref.get("lastKnownFileType"))
+            for build_file in index.build_files(file_ref_id):
+                phases = index.phases(build_file.id)
+                joined = set()
+                for phase in phases:
+                    if phase.isa == expected:
+                        continue
+                    removals.setdefault(phase, []).append(build_file.id)
+                    target = phase_targets.get(phase.id)
+                    destinations = project.build_phases(target, expected) if target and expected else []
+                    if destinations and destinations[0] not in phases and destinations[0].id not in joined:
+                        additions.append((destinations[0], build_file.id))
+                        joined.add(destinations[0].id)
+                if not joined and all(phase.isa != expected for phase in phases):
+                    orphans.append(build_file.id)
+        for phase, build_file_ids in removals.items():
+            phase.remove_references("files", build_file_ids)
+        for destination, build_file_id in additions:
+            destination.add_file(build_file_id)
+        for build_file_id in orphans:
+            project.remove(build_file_id)
+
+
+def _key(obj):
+    return obj.id if hasattr(obj, "id") else obj
+
+
+def _taken(tx, plan, group_id, path):
+    """Whether the group already lists, or is queued to get, a child at `path`"""
+    if (group_id, path) in plan.added_paths:
+        return True
+    group = tx.project.get(group_id)  # None while the group is only queued
+    siblings = plan.child_paths(group).get(path, ()) if group is not None else ()
+    return any(s not in plan.removed for s in siblings)
+
+
+def _group_name(tx, plan, group_id):
+    group = tx.project.get(group_id)
+    return group.display_name() if group is not None else plan.groups[group_id]
+
+
+def _planned_path(tx, plan, file_ref_id):
+    if file_ref_id in plan.added:
+        return plan.added[file_ref_id][1]
+    return tx.project[file_ref_id].get("path")
+
+
+def _planned_type(tx, plan, file_ref_id):
+    if file_ref_id in plan.added:
+        op = next(op for op in tx.operations if isinstance(op, _AddFile) and op.file_ref_id == file_ref_id)
+        return op.last_known_file_type
+    return tx.project[file_ref_id].get("lastKnownFileType")
+
+
+class Transaction:
+    """Queue of project edits applied and saved together"""
+
+    def __init__(self, project):
+        self.project = project
+        self.operations = []
+        self.committed = False
+        self._queued_groups = {}  # (parent group ID, name) -> queued group ID
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
+
+    # -- resolution helpers ---------------------------------------------
+
+    def _new_id(self, *key):
+        # The allocator remembers what it handed out, so IDs queued by this
+        # transaction cannot collide with each other before they are added.
+        return self.project.new_id(*key)
+
+    def _group(self, group):
+        if hasattr(group, "id"):
+            group = group.id
+        obj = self.project.get(group)
+        if obj is not None and obj.isa in GROUP_ISAS:
+            return obj
+        return self.project.group_for_path(group)
+
+    def _planned_group_id(self, group, plan):
+        """ID of an existing group, or of one queued earlier in this transaction; None for neither"""
+        resolved = self._group(group)
+        if resolved is not None:
+            return resolved.id
+        group = _key(group)
+        return group if group in plan.groups else None
+
+    def _target(self, target):
+        if hasattr(target, "id"):
+            target = target.id
+        obj = self.project.get(target)
+        if obj is not None and obj.isa in TARGET_ISAS:
+            return obj
+        return self.project.target_named(target)
+
+    def _candidates(self, file_ref):
+        if hasattr(file_ref, "id"):
+            file_ref = file_ref.id
+        if file_ref in self.project.objects:
+            return [file_ref]
+        if any(isinstance(op, _AddFile) and op.file_ref_id == file_ref for op in self.operations):
+            return [file_ref]
+        index = self.project.index
+        matches = index.file_references(path=file_ref) or index.file_references(basename=file_ref)
+        return [m.id for m in matches]
+
+    def _file_ref_id(self, file_ref):
+        candidates = self._candidates(file_ref)
+        return candidates[0] if len(candidates) == 1 else None
+
+    def _missing(self, verb, file_ref):
+        count = len(self._candidates(file_ref))
+        if count > 1:
+            return f"{verb} {file_ref!r}: ambiguous, matches {count} file references"
+        return f"{verb} {file_ref!r}: file reference not found"
+
+    # -- queueing -------------------------------------------------------
+
+    def add_file(self, path, group, targets=(), name=None, last_known_file_type=None):
+        """
+        Queue a new file reference at `path` (relative to `group`) and add
+        it to the matching build phase of each target. Returns the new file
+        reference ID so later operations in the same batch can use it.
+        """
+        resolved = self._group(group)
+        file_ref_id = self._new_id("PBXFileReference", resolved.id if resolved else group, path)
+        kind = last_known_file_type or file_type(path)
+        if name is None and "/" in path:
+            name = posixpath.basename(path)
+        self.operations.append(_AddFile(file_ref_id, path, group, list(targets), name, kind))
+        return file_ref_id
+
+    def add_group(self, name, parent):
+        """
+        Queue a new group at path `name` under `parent` (a group, or the ID
+        add_group returned for one queued earlier). Returns the new group's
+        ID for later operations in the same batch.
+        """
+        resolved = self._group(parent)
+        parent_id = resolved.id if resolved is not None else _key(parent)
+        group_id = self._new_id("PBXGroup", parent_id, name)
+        self.operations.append(_AddGroup(group_id, name, parent_id))
+        self._queued_groups[(parent_id, name)] = group_id
+        return group_id
+
+    def queued_group(self, parent, name):
+        """The ID add_group returned for `name` under `parent`, or None"""
+        return self._queued_groups.get((_key(parent), name))
+
+    def remove_file(self, file_ref):
+        """Queue removal of a file reference, its build files and group entries"""
+        self.operations.append(_RemoveFile(file_ref))
+
+    def move_to_target(self, file_ref, target, source_target=None):
+        """
+        Queue moving a file into `target`, taking it out of `source_target`
+        (or out of every other target when no source is given).
+        """
+        self.operations.append(_TargetMembership(file_ref, target, source_target, copy=False))
+
+    def copy_to_target(self, file_ref, target):
+        """Queue adding a file to `target` while keeping its other memberships"""
+        self.operations.append(_TargetMembership(file_ref, target, None, copy=True))
+
+    def move_files(self, file_refs, target, source_target=None, copy=False):
+        """
+        Queue moving (or with `copy`, copying) many files into `target` as
+        one operation. The files are checked one by one like
+        move_to_target(), but the edit is planned on project.membership and
+        every phase is rewritten once, however many files move.
+        """
+        self.operations.append(_BulkMembership(list(file_refs), target, source_target, copy))
+
+    def reparent(self, object_id, group, path=None):
+        """
+        Queue moving a file reference or group under `group`, optionally
+        rewriting its `path` to stay correct relative to the new parent.
+        """
+        if hasattr(object_id, "id"):
+            object_id = object_id.id
+        self.operations.append(_Reparent(object_id, group, path))
+
+    def fix_build_phases(self, file_ref):
+        """
+        Queue moving a file's build files into the phase its type belongs
+        to (within the same target), or out of every phase for files that
+        are not built, such as Info.plist.
+        """
+        self.operations.append(_PhasePlacement(file_ref))
+
+    # -- execution ------------------------------------------------------
+
+    def check(self):
+        """Return the list of problems with the queued operations"""
+        plan = _Plan(self.project)
+        problems = []
+        for op in self.operations:
+            problems.extend(op.check(self, plan))
+        return problems
+
+    def apply(self):
+        """Check, then apply every operation to the in-memory project"""
+        if self.committed:
+            raise TransactionError(["transaction already committed"])
+        problems = self.check()
+        if problems:
+            raise TransactionError(problems)
+        # Runs of removals, re-parentings, target moves and phase fixes are
+        # applied together so each list is rewritten once, not once per file.
+        for key, run in itertools.groupby(self.operations, key=lambda op: op.batch_key()):
+            run = list(run)
+            if key is None or len(run) == 1:
+                for op in run:
+                    op.apply(self)
+            else:
+                type(run[0]).apply_batch(self, run)
+        self.committed = True
+
+    def commit(self, path=None):
+        """Apply the queued operations and save the project once"""
+        self.apply()
+        self.project.save(path)
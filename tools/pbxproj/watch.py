@@ -0,0 +1,475 @@
+"""
+Watch mode: keep project.pbxproj in sync while files are added, moved and
+deleted under the source folder.
+
+ProjectWatcher keeps the parsed project in memory. File events are
+collected (inotify on Linux, mtime polling elsewhere), debounced into
+batches, coalesced (create + delete cancels out, a delete and a create of
+the same file name become a move) and applied as one transaction per
+batch. Saving goes through the incremental writer, so each batch only
+rewrites the entries it touched and never rescans the whole tree. A batch
+that fails (a conflicting edit, a save error) is logged, the project is
+reloaded from disk without its edits and a full rescan catches up.
+
+    watcher = ProjectWatcher(PBXProj.load("on brand.xcodeproj"))
+    watcher.run()
+"""
+
+import ctypes
+import ctypes.util
+import os
+import posixpath
+import select
+import struct
+import sys
+import time
+
+from . import sync as _sync
+from .filetypes import file_type
+from .project import PBXProj
+from .transaction import TransactionError
+
+# inotify(7) constants
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_ONLYDIR
+_EVENT = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal inotify binding over ctypes (Linux only)"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    @staticmethod
+    def available():
+        return sys.platform.startswith("linux")
+
+    def add_watch(self, path, mask=_WATCH_MASK):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def read(self, timeout):
+        """[(wd, mask, cookie, name)] available within `timeout` seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, cookie, name))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class ChangeBatch:
+    """Coalesced file changes, as project-relative paths"""
+
+    def __init__(self):
+        self.created = set()
+        self.deleted = set()
+        self.moved = {}  # old path -> new path (files and directories)
+        self.rescan = False
+
+    def __bool__(self):
+        return bool(self.created or self.deleted or self.moved or self.rescan)
+
+    def create(self, path):
+        if path in self.deleted:
+            self.deleted.discard(path)  # replaced in place: nothing to do
+        else:
+            self.created.add(path)
+
+    def delete(self, path):
+        if path in self.created:
+            self.created.discard(path)
+            return
+        for old, new in list(self.moved.items()):
+            if new == path:
+                del self.moved[old]
+                self.deleted.add(old)
+                return
+        self.deleted.add(path)
+
+    def move(self, old, new):
+        if old in self.created:
+            self.created.discard(old)
+            self.created.add(new)
+            return
+        for first, target in self.moved.items():
+            if target == old:
+                old = first
+                break
+        if old == new:
+            self.moved.pop(old, None)
+        else:
+            self.moved[old] = new
+
+    def pair_moves(self):
+        """Treat a delete and a create of the same file name as a move"""
+        by_name = {}
+        for path in self.deleted:
+            by_name.setdefault(posixpath.basename(path), []).append(path)
+        for path in sorted(self.created):
+            candidates = by_name.get(posixpath.basename(path))
+            if candidates and len(candidates) == 1:
+                old = candidates.pop()
+                self.deleted.discard(old)
+                self.created.discard(path)
+                self.moved[old] = path
+
+
+class ProjectWatcher:
+    """Applies debounced file events under `root` to an in-memory project"""
+
+    def __init__(self, project, root=_sync.DEFAULT_ROOT, excludes=_sync.DEFAULT_EXCLUDES, target=None,
+                 debounce=0.5, max_delay=5.0, poll_interval=1.0, log=print):
+        if project.path is None:
+            raise ValueError("watch needs a project loaded from disk")
+        self.project = project
+        self.root = posixpath.normpath(root)
+        self.excludes = tuple(excludes)
+        self.target = target
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.log = log
+        self.base_dir = project.path.parent.parent
+        self.batch = ChangeBatch()
+        self._stamp = self._project_stamp()
+        self._layout = None
+        self._paths = None
+        self._inotify = None
+        self._watches = {}  # wd -> project-relative dir
+        self._pending_moves = {}  # cookie -> (path, is_dir)
+        self._snapshot = None  # polling: last set of files
+        self._poll_cache = _sync.DirectoryCache()
+
+    # -- project state --------------------------------------------------
+
+    def _project_stamp(self):
+        try:
+            stat = os.stat(self.project.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _reload(self):
+        self.project = PBXProj.load(self.project.path)
+        self._stamp = self._project_stamp()
+        self._layout = None
+
+    def _reload_if_changed(self):
+        """Pick up edits made to project.pbxproj outside the watcher"""
+        if self._project_stamp() != self._stamp:
+            self.log("project.pbxproj changed on disk, reloading")
+            self._reload()
+
+    def _ensure_layout(self):
+        if self._layout is None:
+            self._layout = self.project.groups
+            self._paths = {}
+            for ref_id, path in self._layout.file_paths.items():
+                self._paths.setdefault(path, []).append(ref_id)
+        return self._layout
+
+    def _excluded(self, path):
+        parts = path.split("/")
+        return any(_sync._excluded("/".join(parts[:i]), self.excludes) for i in range(1, len(parts) + 1))
+
+    # -- event sources --------------------------------------------------
+
+    def _watch_tree(self, rel):
+        """Watch `rel` and its subdirectories; returns the files found"""
+        found = []
+        stack = [rel]
+        while stack:
+            current = stack.pop()
+            try:
+                wd = self._inotify.add_watch(os.path.join(self.base_dir, current))
+            except OSError:
+                continue
+            self._watches[wd] = current
+            try:
+                entries = list(os.scandir(os.path.join(self.base_dir, current)))
+            except OSError:
+                continue
+            for entry in entries:
+                path = posixpath.join(current, entry.name)
+                if self._excluded(path):
+                    continue
+                if entry.is_dir() and not _sync._is_package(entry.name):
+                    stack.append(path)
+                else:
+                    found.append(path)
+        return found
+
+    def _handle_inotify(self, events):
+        for wd, mask, cookie, name in events:
+            if mask & IN_Q_OVERFLOW:
+                self.batch.rescan = True
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = posixpath.join(directory, name)
+            if self._excluded(path):
+                continue
+            is_dir = bool(mask & IN_ISDIR) and not _sync._is_package(name)
+            if mask & IN_CREATE:
+                if is_dir:
+                    # Files may land before the watch exists; pick them up now.
+                    for found in self._watch_tree(path):
+                        self.batch.create(found)
+                else:
+                    self.batch.create(path)
+            elif mask & IN_DELETE:
+                if not is_dir:
+                    self.batch.delete(path)
+                else:
+                    self.batch.delete(path + "/")
+            elif mask & IN_MOVED_FROM:
+                self._pending_moves[cookie] = (path, is_dir)
+            elif mask & IN_MOVED_TO:
+                source = self._pending_moves.pop(cookie, None)
+                if source is not None:
+                    self.batch.move(source[0], path)
+                    if is_dir:
+                        self._rename_watches(source[0], path)
+                elif is_dir:
+                    for found in self._watch_tree(path):
+                        self.batch.create(found)
+                else:
+                    self.batch.create(path)
+
+    def _rename_watches(self, old_dir, new_dir):
+        # Watch descriptors follow the inode, so only their paths change.
+        for wd, directory in self._watches.items():
+            if _sync._under(directory, old_dir):
+                self._watches[wd] = new_dir + directory[len(old_dir):]
+
+    def _flush_unpaired_moves(self):
+        # Moved out of the watched tree: the file is gone for our purposes.
+        for path, is_dir in self._pending_moves.values():
+            self.batch.delete(path + "/" if is_dir else path)
+        self._pending_moves.clear()
+
+    def _poll(self):
+        files, _, _ = _sync.scan_tree(self.base_dir, self.root, self.excludes, self._poll_cache)
+        if self._snapshot is not None:
+            for path in files - self._snapshot:
+                self.batch.create(path)
+            for path in self._snapshot - files:
+                self.batch.delete(path)
+        self._snapshot = files
+
+    # -- applying -------------------------------------------------------
+
+    def apply(self, batch):
+        """Apply one batch to the project and save it; returns a summary"""
+        self._reload_if_changed()
+        if batch.rescan:
+            plan = _sync.sync_project(self.project, root=self.root, excludes=self.excludes,
+                                      target=self.target, use_cache=False)
+            self._layout = None
+            self._stamp = self._project_stamp()
+            return plan.to_dict()
+
+        batch.pair_moves()
+        project = self.project
+        layout = self._ensure_layout()
+        paths = self._paths
+        summary = {"added": [], "removed": [], "moved": [], "new_groups": []}
+        rules = _sync.TargetRules(project, self.target)
+        plan = _sync.SyncPlan()
+        removing = set()
+        touched_groups = set()
+
+        created = set(batch.created)
+        tx = project.transaction()
+        for old, new in sorted(batch.moved.items()):
+            group_id = layout.dir_groups.get(old)
+            if group_id is not None:
+                # A directory moved: its group moves and the children follow.
+                ids = [group_id]
+            else:
+                ids = paths.get(old, ())
+            if not ids:
+                # Moved from somewhere the project never knew about, such as
+                # an excluded folder: for the project it is new.
+                created.update(self._files_at(new))
+                continue
+            for object_id in ids:
+                old_parent = project.index.parent(object_id)
+                touched_groups.add(old_parent.id if old_parent is not None else None)
+                group = layout.ensure_group(posixpath.dirname(new), plan.new_groups, tx=tx)
+                tx.reparent(object_id, group, path=posixpath.basename(new))
+                summary["moved"].append([old, new])
+        for path in sorted(batch.deleted):
+            if path.endswith("/"):
+                prefix = path
+                doomed = [p for p in paths if p.startswith(prefix)]
+            else:
+                doomed = [path]
+            for ref_path in doomed:
+                for ref_id in paths.get(ref_path, ()):
+                    if ref_id in removing:
+                        continue
+                    removing.add(ref_id)
+                    parent = project.index.parent(ref_id)
+                    touched_groups.add(parent.id if parent is not None else None)
+                    tx.remove_file(ref_id)
+                    rules.forget(ref_path)
+                    summary["removed"].append(ref_path)
+        for path in sorted(created):
+            if paths.get(path) or not _sync._under(path, self.root):
+                continue
+            if not os.path.exists(os.path.join(self.base_dir, path)):
+                continue  # created and deleted again before the batch ran
+            group = layout.ensure_group(posixpath.dirname(path), plan.new_groups, tx=tx)
+            targets = rules.targets_for(path) or []
+            tx.add_file(posixpath.basename(path), group, targets=targets, last_known_file_type=file_type(path))
+            summary["added"].append(path)
+        tx.apply()
+        touched_groups.discard(None)
+        self._prune_groups(touched_groups, layout)
+        summary["new_groups"] = plan.new_groups
+        project.save()
+        self._stamp = self._project_stamp()
+        # Paths under moved groups change wholesale; re-derive them lazily.
+        self._layout = None
+        return summary
+
+    def _files_at(self, path):
+        """The files a move brought to `path`: the file itself, or those under a moved directory"""
+        full = os.path.join(self.base_dir, path)
+        if self._excluded(path):
+            return set()
+        if os.path.isdir(full) and not _sync._is_package(posixpath.basename(path)):
+            files, _, _ = _sync.scan_tree(self.base_dir, path, self.excludes)
+            return set(files)
+        return {path}
+
+    def _recover(self, error):
+        """
+        After a failed batch: drop whatever it changed in memory by reloading
+        the project, then rescan the whole tree. A failed rescan is retried
+        with the next batch.
+        """
+        self.log(f"Batch failed: {error}; reloading the project and rescanning")
+        rescan = ChangeBatch()
+        rescan.rescan = True
+        try:
+            self._reload()
+            return self.apply(rescan)
+        except (TransactionError, OSError, ValueError) as e:
+            self.log(f"Rescan failed: {e}")
+            self.batch.rescan = True
+            return None
+
+    def _prune_groups(self, group_ids, layout):
+        """Drop groups left empty whose directory no longer exists"""
+        project = self.project
+        pending = list(group_ids)
+        while pending:
+            group_id = pending.pop()
+            group = project.get(group_id)
+            directory = layout.group_dirs.get(group_id)
+            if group is None or group.children or directory is None or not _sync._under(directory, self.root):
+                continue
+            if directory == self.root or os.path.isdir(os.path.join(self.base_dir, directory)):
+                continue
+            parent = project.index.parent(group_id)
+            if parent is None:
+                continue
+            parent.remove_child(group_id)
+            project.remove(group_id)
+            pending.append(parent.id)
+
+    # -- main loop ------------------------------------------------------
+
+    def run(self, stop=None, max_batches=None, poll=False):
+        """
+        Watch until `stop()` returns true (or `max_batches` batches were
+        applied, or Ctrl-C). Uses inotify on Linux and polling elsewhere
+        or when `poll` is set.
+        """
+        use_inotify = Inotify.available() and not poll
+        if use_inotify:
+            self._inotify = Inotify()
+            self._watch_tree(self.root)
+        else:
+            self._poll()
+        self.log(f"Watching {self.root} ({'inotify' if use_inotify else 'polling'})")
+        first = last = None
+        applied = 0
+        try:
+            while not (stop and stop()):
+                if use_inotify:
+                    events = self._inotify.read(self.debounce)
+                    self._handle_inotify(events)
+                    got = bool(events)
+                else:
+                    time.sleep(self.poll_interval)
+                    before = (len(self.batch.created), len(self.batch.deleted))
+                    self._poll()
+                    got = (len(self.batch.created), len(self.batch.deleted)) != before
+                now = time.monotonic()
+                if got:
+                    last = now
+                    first = first or now
+                pending = self.batch or self._pending_moves
+                if pending and last is not None and (now - last >= self.debounce or now - first >= self.max_delay):
+                    self._flush_unpaired_moves()
+                    batch, self.batch = self.batch, ChangeBatch()
+                    first = last = None
+                    if not batch:
+                        continue
+                    try:
+                        summary = self.apply(batch)
+                    except (TransactionError, OSError, ValueError) as e:
+                        summary = self._recover(e)
+                    if summary is not None:
+                        self.log(f"Applied batch: {summary}")
+                    applied += 1
+                    if max_batches is not None and applied >= max_batches:
+                        break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+        return applied
@@ -0,0 +1,192 @@
+"""
+Serializer that writes a parsed project back in Xcode's own formatting.
+
+Xcode's layout rules are reproduced exactly: sections ordered by `isa`,
+objects ordered by ID, `isa` first and every other key sorted, single-line
+entries for PBXBuildFile/PBXFileReference, and `/* ... */` comments
+generated from the referenced object rather than copied from the input.
+"""
+
+import re
+
+from .objects import NON_REFERENCE_KEYS, TARGET_ISAS
+
+HEADER = "// !$*UTF8*$!\n"
+
+# Objects Xcode writes on a single line.
+SINGLE_LINE_ISAS = frozenset({"PBXBuildFile", "PBXFileReference"})
+
+_UNQUOTED_RE = re.compile(r"[A-Za-z0-9_$/:.]+")
+_ESCAPE_TABLE = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\t": "\\t", "\r": "\\r"})
+
+
+def quote(value):
+    """Quote a string the way Xcode does (only when it has to)"""
+    if _UNQUOTED_RE.fullmatch(value) and "___" not in value and "//" not in value:
+        return value
+    return '"' + value.translate(_ESCAPE_TABLE) + '"'
+
+
+class CommentResolver:
+    """
+    Computes the `/* ... */` comment Xcode writes after an object ID.
+
+    Build files are named after the phase that owns them (looked up through
+    the project index) and configuration lists after the project or target
+    that owns them, which is collected on first use.
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self.objects = project.objects
+        self.fallback = project.source_comments
+        self.index = project.index
+        self._list_owner = None
+        self._cache = {}
+
+    @property
+    def list_owner(self):
+        if self._list_owner is None:
+            self._list_owner = {}
+            for obj in self.objects.values():
+                if obj.isa in TARGET_ISAS or obj.isa == "PBXProject":
+                    config_list = obj.get("buildConfigurationList")
+                    if config_list:
+                        self._list_owner.setdefault(config_list, obj)
+        return self._list_owner
+
+    def __call__(self, object_id):
+        try:
+            return self._cache[object_id]
+        except KeyError:
+            pass
+        comment = self._compute(object_id)
+        self._cache[object_id] = comment
+        return comment
+
+    def _compute(self, object_id):
+        obj = self.objects.get(object_id)
+        if obj is None:
+            return self.fallback.get(object_id)
+        if obj.isa == "PBXBuildFile":
+            target = obj.get("fileRef") or obj.get("productRef")
+            phase = self.index.phase(object_id)
+            if phase is None:
+                return self.fallback.get(object_id) or f"{self._name(target)} in (null)"
+            return f"{self._name(target)} in {phase.display_name()}"
+        if obj.isa == "XCConfigurationList":
+            owner = self.list_owner.get(object_id)
+            owner_name = None
+            if owner is not None:
+                # PBXProject has no name field; it is named after the bundle.
+                owner_name = self.project.name if owner.isa == "PBXProject" else owner.get("name")
+            if owner_name is None:
+                return self.fallback.get(object_id)
+            return f'Build configuration list for {owner.isa} "{owner_name}"'
+        return obj.display_name()
+
+    def _name(self, object_id):
+        obj = self.objects.get(object_id) if object_id else None
+        if obj is None:
+            return self.fallback.get(object_id, "(null)") if object_id else "(null)"
+        return obj.display_name() or "(null)"
+
+
+class Writer:
+    """Renders a PBXProj as Xcode-formatted text"""
+
+    def __init__(self, project):
+        self.project = project
+        self.comment = CommentResolver(project)
+
+    # -- values ---------------------------------------------------------
+
+    def reference(self, value, key):
+        text = quote(value)
+        if key in NON_REFERENCE_KEYS:
+            return text
+        if value in self.project.objects or value in self.project.source_comments:
+            comment = self.comment(value)
+            if comment:
+                return f"{text} /* {comment} */"
+        return text
+
+    def value(self, value, key, indent, inline):
+        if isinstance(value, str):
+            return self.reference(value, key)
+        if isinstance(value, list):
+            return self.array(value, key, indent, inline)
+        if isinstance(value, dict):
+            return self.dictionary(value, indent, inline)
+        raise TypeError(f"Cannot serialize {type(value).__name__} for key {key!r}")
+
+    def array(self, items, key, indent, inline):
+        if inline:
+            return "(" + "".join(self.value(item, key, indent, True) + ", " for item in items) + ")"
+        pad = "\t" * (indent + 1)
+        lines = ["("]
+        for item in items:
+            lines.append(f"{pad}{self.value(item, key, indent + 1, False)},")
+        lines.append("\t" * indent + ")")
+        return "\n".join(lines)
+
+    def dictionary(self, fields, indent, inline, isa=None):
+        # Keys are never annotated, only values that reference objects.
+        entries = []
+        if isa is not None:
+            entries.append(("isa", quote(isa)))
+        for key in sorted(fields):
+            entries.append((quote(key), self.value(fields[key], key, indent + 1, inline)))
+        if inline:
+            return "{" + "".join(f"{k} = {v}; " for k, v in entries) + "}"
+        pad = "\t" * (indent + 1)
+        lines = ["{"]
+        lines.extend(f"{pad}{k} = {v};" for k, v in entries)
+        lines.append("\t" * indent + "}")
+        return "\n".join(lines)
+
+    # -- objects --------------------------------------------------------
+
+    def object_key(self, obj):
+        comment = self.comment(obj.id)
+        key = quote(obj.id)
+        return f"{key} /* {comment} */" if comment else key
+
+    def object_entry(self, obj, indent=2):
+        """One `ID /* comment */ = {...};` entry, without the leading tabs"""
+        inline = obj.isa in SINGLE_LINE_ISAS
+        body = self.dictionary(obj.fields, indent, inline, isa=obj.isa)
+        return f"{self.object_key(obj)} = {body};"
+
+    def objects_section(self):
+        by_isa = {}
+        for obj in self.project.objects.values():
+            by_isa.setdefault(obj.isa, []).append(obj)
+        parts = ["{\n"]
+        for isa in sorted(by_isa):
+            parts.append(f"\n/* Begin {isa} section */\n")
+            for obj in sorted(by_isa[isa], key=lambda o: o.id):
+                parts.append(f"\t\t{self.object_entry(obj)}\n")
+            parts.append(f"/* End {isa} section */\n")
+        parts.append("\t}")
+        return "".join(parts)
+
+    def document(self):
+        project = self.project
+        top = dict(project.attributes)
+        top["objects"] = None
+        top["rootObject"] = project.root_id
+        lines = [HEADER, "{\n"]
+        for key in sorted(top):
+            if key == "objects":
+                rendered = self.objects_section()
+            else:
+                rendered = self.value(top[key], key, 1, False)
+            lines.append(f"\t{quote(key)} = {rendered};\n")
+        lines.append("}\n")
+        return "".join(lines)
+
+
+def dumps(project):
+    """Serialize `project` to Xcode-formatted project.pbxproj text"""
+    return Writer(project).document()
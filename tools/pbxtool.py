@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Xcode project maintenance: dedupe, sync, move-target, lint and fix-ids.
+See pbxproj/cli.py or run with --help.
+"""
+
+import time
+
+_STARTED = time.perf_counter()
+
+import sys  # noqa: E402
+
+from pbxproj.cli import main  # noqa: E402
+
+if __name__ == "__main__":
+    sys.exit(main(started=_STARTED))
@@ -0,0 +1,79 @@
+"""
+sync_project on a small synthetic project.
+
+    python3 -m unittest discover tools/tests
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pbxproj import PBXProj, sync_project  # noqa: E402
+from pbxproj.synthetic import generate, materialize  # noqa: E402
+
+NAME = "Synthetic"
+
+
+class SyncMoveTest(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        synthetic = generate(files=50, duplicate_rate=0, seed=1, name=NAME)
+        self.project_path = materialize(self.base_dir, synthetic, name=NAME, untracked=0, missing=0)
+
+    def _built_source(self, project):
+        """(file ref ID, path) of a Swift file the app target builds"""
+        app = project.targets()[0]
+        for build_file_id in project.build_phases(app, "PBXSourcesBuildPhase")[0].files:
+            ref_id = project[build_file_id].file_ref
+            path = project.groups.file_paths.get(ref_id)
+            if path and path.endswith(".swift"):
+                return ref_id, path
+        self.fail("no built Swift file")
+
+    def _move(self, old, new):
+        os.makedirs(os.path.dirname(os.path.join(self.base_dir, new)), exist_ok=True)
+        os.rename(os.path.join(self.base_dir, old), os.path.join(self.base_dir, new))
+
+    def test_moved_file_keeps_its_build_file(self):
+        project = PBXProj.load(self.project_path)
+        ref_id, old = self._built_source(project)
+        build_files = [bf.id for bf in project.index.build_files(ref_id)]
+        new = f"{NAME}/Moved/{os.path.basename(old)}"
+        self._move(old, new)
+
+        plan = sync_project(project, root=NAME, use_cache=False)
+
+        self.assertEqual(plan.moved, [(ref_id, old, new)])
+        self.assertEqual(plan.added, [])
+        self.assertEqual(plan.removed, [])
+        project = PBXProj.load(self.project_path)
+        self.assertEqual(project.groups.file_paths[ref_id], new)
+        self.assertEqual([bf.id for bf in project.index.build_files(ref_id)], build_files)
+
+    def test_removed_name_is_free_for_a_new_file(self):
+        project = PBXProj.load(self.project_path)
+        ref_id, old = self._built_source(project)
+        name = os.path.basename(old)
+        # Two new files with the name: not a move, but one of them may
+        # take the removed file's place in the target.
+        self._move(old, f"{NAME}/Moved/{name}")
+        open(os.path.join(self.base_dir, NAME, "Moved", "Other" + name), "w").close()
+        os.makedirs(os.path.join(self.base_dir, NAME, "Again"))
+        open(os.path.join(self.base_dir, NAME, "Again", name), "w").close()
+
+        plan = sync_project(project, root=NAME, use_cache=False)
+
+        self.assertEqual(plan.removed, [(ref_id, old)])
+        added = dict(plan.added)
+        self.assertEqual(added[f"{NAME}/Again/{name}"], [project.targets()[0].name])
+        self.assertEqual(plan.conflicts, [f"{NAME}/Moved/{name}"])
+
+
+if __name__ == "__main__":
+    unittest.main()
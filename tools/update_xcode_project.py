@@ -4,53 +4,51 @@ Update Xcode project.pbxproj file to include new modular ProfileView components
 and remove the old monolithic ProfileView.swift file.
 """
 
-import re
 import sys
 from pathlib import Path
 
+from pbxproj import PBXProj
+from pbxproj.sync import DEFAULT_EXCLUDES, sync_project
+
 def update_xcode_project(project_file_path):
     """Update the Xcode project file to include new modular components"""
-    
-    with open(project_file_path, 'r') as f:
-        content = f.read()
-    
-    # New modular files to add
-    new_files = [
-        "on brand/Features/Profile/Components/ProfileView/ProfileView.swift",
-        "on brand/Features/Profile/Components/ProfileView/ProfileTopNavigationBar.swift",
-        "on brand/Features/Profile/Components/ProfileView/ProfileHeaderSection.swift",
-        "on brand/Features/Profile/Components/ProfileView/ProfileBioSection.swift",
-        "on brand/Features/Profile/Components/ProfileView/ProfileActionButtonsSection.swift",
-        "on brand/Features/Profile/Components/ProfileView/ProfileContentTabsSection.swift",
-        "on brand/Features/Profile/Components/ProfileView/ProfilePhotoGridSection.swift"
-    ]
-    
+
+    project = PBXProj.load(project_file_path)
+
+    # Folder holding the new modular files
+    profile_root = "on brand/Features/Profile"
+
     # Old file to remove
-    old_file = "on brand/Features/Profile/Views/ProfileView.swift"
-    
+    old_file = "Views/ProfileView.swift"
+    old_group = project.group_for_path(profile_root)
+
     print("Updating Xcode project file...")
-    
-    # Remove old ProfileView.swift reference
-    if old_file in content:
-        print(f"Removing old file: {old_file}")
-        # Remove the file reference from the project
-        content = re.sub(rf'.*{re.escape(old_file)}.*\n', '', content)
-    
-    # Add new modular files
-    for file_path in new_files:
-        if file_path not in content:
-            print(f"Adding new file: {file_path}")
-            # Add file reference to the project
-            # This is a simplified approach - in a real scenario, you'd need to
-            # properly generate the UUIDs and add them to the correct sections
-            pass
-    
-    # Write the updated content back
-    with open(project_file_path, 'w') as f:
-        f.write(content)
-    
+
+    # Remove old ProfileView.swift reference (it would collide with the
+    # modular ProfileView.swift in the app target)
+    if old_group is not None:
+        views = project.group_for_path(f"{profile_root}/Views")
+        for child_id in list(views.children if views is not None else ()):
+            child = project.get(child_id)
+            if child is not None and child.path == Path(old_file).name:
+                print(f"Removing old file: {profile_root}/{old_file}")
+                project.remove_file_reference(child_id)
+
+    # Add new modular files, creating their groups, and save once
+    excludes = DEFAULT_EXCLUDES + (f"{profile_root}/{old_file}",)
+    plan = sync_project(project, root=profile_root, excludes=excludes, remove_stale=False, use_cache=False)
+    for path, targets in plan.added:
+        print(f"Adding new file: {path}")
+    for path in plan.conflicts:
+        print(f"Not built (name already used in target): {path}")
+
+    if not plan:
+        project.save()
+
     print("Xcode project file updated successfully!")
 
 if __name__ == "__main__":
     project_file = "on brand.xcodeproj/project.pbxproj"
+    if len(sys.argv) > 1:
+        project_file = sys.argv[1]
     update_xcode_project(project_file)
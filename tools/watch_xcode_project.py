@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Keep the Xcode project in sync while files are added, moved or deleted
+under the app folder. Runs until interrupted with Ctrl-C.
+"""
+
+import argparse
+
+from pbxproj import PBXProj
+from pbxproj.sync import DEFAULT_ROOT
+from pbxproj.watch import ProjectWatcher
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("project", nargs="?", default="on brand.xcodeproj/project.pbxproj")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="folder to watch, relative to the .xcodeproj")
+    parser.add_argument("--target", help="target new files join (default: the app target)")
+    parser.add_argument("--debounce", type=float, default=0.5, help="seconds of quiet before a batch is applied")
+    parser.add_argument("--poll", action="store_true", help="poll instead of using inotify")
+    args = parser.parse_args()
+
+    project = PBXProj.load(args.project)
+    watcher = ProjectWatcher(project, root=args.root, target=args.target, debounce=args.debounce)
+    watcher.run(poll=args.poll)
+
+
+if __name__ == "__main__":
+    main()